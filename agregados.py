@@ -0,0 +1,111 @@
+"""
+Agregados en vivo del experimento, actualizados por eventos.
+
+El motor notifica cada rerun (fase de la sesión), cada respuesta, cada fin de bloque y
+cada resultado final; cada evento actualiza contadores en O(1) bajo un lock:
+- sesiones por fase (y por variante),
+- respuestas por resultado,
+- por variante, grupo y bloque: bloques jugados, bloques exitosos y suma de errores,
+- por variante y grupo: histograma del dinero final (montos exactos; son pocos).
+
+Los contadores viven en `agregados_compartidos`: con varios procesos de Streamlit, cada
+uno escribe en su ranura de memoria compartida y `snapshot()` suma las de todos, así que
+cualquier proceso (también el del panel) ve la corrida completa. `snapshot()` devuelve
+además un número de versión que cambia con cada evento de cualquier proceso, para que
+el panel pueda reutilizar lo que ya calculó si nada cambió. Cada proceso que atiende
+sesiones descarta las suyas sin reruns durante `SESSION_IDLE_S` (las abandonadas) con
+un hilo que las revisa cada `PRUNE_INTERVAL_S` segundos; `snapshot()` solo lee.
+"""
+import threading
+import time
+
+import streamlit as st
+
+import agregados_compartidos
+import instrumentacion
+
+# --- Parámetros de los agregados (constantes) ---
+SESSION_IDLE_S = 300
+PRUNE_INTERVAL_S = 30
+
+
+class LiveAggregates:
+    """Vista de los contadores de todos los procesos; registra los eventos de este."""
+
+    def __init__(self, counters=None):
+        self._lock = threading.Lock() # Protege `_sessions`; los contadores tienen sus locks
+        self._sessions = {} # session_id -> (variante, fase, último instante visto), solo de este proceso
+        self._pruner = None # Hilo que descarta las sesiones inactivas; arranca con la primera sesión
+        self.counters = counters if counters is not None else agregados_compartidos.SharedCounters()
+
+    def observe_rerun(self, phase, wall_s, cpu_s):
+        """Observador de `instrumentacion`: mantiene la fase actual de la sesión."""
+        session_id = instrumentacion.current_session_id()
+        variant = st.session_state.get("variant")
+        phase = st.session_state.get("experiment_phase", phase) # Fase al terminar el rerun
+        now = time.monotonic()
+        with self._lock:
+            if self._pruner is None:
+                self._pruner = threading.Thread(target=self._prune_loop, name="agregados-inactivas", daemon=True)
+                self._pruner.start()
+            previous = self._sessions.get(session_id)
+            if previous is not None and previous[:2] == (variant, phase):
+                self._sessions[session_id] = (variant, phase, now)
+                return
+            if previous is not None:
+                self.counters.add_phase(*previous[:2], -1)
+            if variant is None: # Sesión reiniciada: vuelve a contarse en su próximo rerun
+                self._sessions.pop(session_id, None)
+            else:
+                self._sessions[session_id] = (variant, phase, now)
+                self.counters.add_phase(variant, phase, 1)
+
+    def observe_answer(self, variant, outcome):
+        self.counters.add_answer(variant, outcome)
+
+    def observe_block(self, variant, group, block, success, errors):
+        self.counters.add_block(variant, group, block, success, errors)
+
+    def observe_final_money(self, variant, group, money):
+        self.counters.add_final_money(variant, group, money)
+
+    def version(self):
+        return self.counters.version()
+
+    def prune_idle(self):
+        """Deja de contar las sesiones de este proceso sin reruns durante `SESSION_IDLE_S`."""
+        now = time.monotonic()
+        with self._lock:
+            for session_id, (variant, phase, last_seen) in list(self._sessions.items()):
+                if now - last_seen > SESSION_IDLE_S:
+                    del self._sessions[session_id]
+                    self.counters.add_phase(variant, phase, -1)
+
+    def _prune_loop(self):
+        while True:
+            time.sleep(PRUNE_INTERVAL_S)
+            self.prune_idle()
+
+    def snapshot(self):
+        """(versión, contadores de todos los procesos)."""
+        version, totals = self.counters.totals()
+        layout = self.counters.layout
+        snapshot = {"phases": {}, "answers": {}, "blocks": {}, "money": {}}
+        # Solo las celdas distintas de cero, con las mismas claves que usan los eventos
+        for v, p in zip(*totals["phases"].nonzero()):
+            snapshot["phases"][(layout.variants[v], agregados_compartidos.PHASES[p])] = int(totals["phases"][v, p])
+        for v, o in zip(*totals["answers"].nonzero()):
+            snapshot["answers"][(layout.variants[v], agregados_compartidos.OUTCOMES[o])] = int(totals["answers"][v, o])
+        for v, g, b in zip(*totals["blocks"][..., 0].nonzero()):
+            variant = layout.variants[v]
+            snapshot["blocks"][(variant, layout.groups[variant][g], int(b) + 1)] = tuple(int(x) for x in totals["blocks"][v, g, b])
+        for v, g, m in zip(*totals["money"].nonzero()):
+            variant = layout.variants[v]
+            group = layout.groups[variant][g]
+            low, width = layout.money_bins[(variant, group)]
+            snapshot["money"].setdefault((variant, group), {})[low + int(m) * width] = int(totals["money"][v, g, m])
+        return version, snapshot
+
+
+aggregates = LiveAggregates()
+instrumentacion.add_rerun_listener(aggregates.observe_rerun)
@@ -0,0 +1,264 @@
+"""
+Contadores en memoria compartida para varios procesos de Streamlit.
+
+Cuando varios procesos atienden participantes, los agregados de cada uno solo ven sus
+propias sesiones. Este módulo guarda los contadores de `agregados` en un segmento de
+`multiprocessing.shared_memory` con un arreglo int64 de forma fija:
+
+    [cabecera] + [ranura de proceso] x MAX_PROCESSES
+
+Cada proceso reclama una ranura al arrancar y solo escribe en la suya, así que entre
+procesos no hace falta ningún lock: las escrituras de 8 bytes alineadas no se ven a
+medias y cada celda tiene un único escritor. Dentro del proceso, los hilos se
+coordinan con locks por franja (uno por variante, módulo `LOCK_STRIPES`). Leer la
+vista global es sumar las ranuras con NumPy, sin IPC ni consultas a disco.
+
+La forma del arreglo sale de `variantes.VARIANTS` (variantes, grupos, bloques y los
+montos posibles de dinero final); una huella de esa forma en la cabecera impide que
+procesos con configuraciones distintas mezclen datos. Si el segmento no se puede usar,
+los contadores quedan en memoria privada del proceso (con aviso en el log).
+
+El segmento sobrevive a los procesos (para que reiniciar uno no borre la vista de los
+demás); `destroy()` lo elimina. Las ranuras se reclaman con archivos de exclusión en el
+directorio temporal; la de un proceso que murió se reutiliza y sus sesiones por fase se
+ponen en cero (sus contadores acumulados se conservan).
+"""
+import atexit
+import hashlib
+import logging
+import math
+import os
+import tempfile
+import threading
+import time
+from functools import reduce
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+import variantes
+
+logger = logging.getLogger(__name__)
+
+# --- Parámetros de la memoria compartida (constantes) ---
+SEGMENT_NAME = os.environ.get("EXPERIMENTO_SHM_NAME", "experimento_agregados")
+MAX_PROCESSES = 32
+LOCK_STRIPES = 8
+MAX_MONEY_BINS = 256
+PHASES = ("WELCOME", "INSTRUCTIONS", "EXPERIMENT", "PAUSE_BETWEEN_BLOCKS", "RESULTS")
+OUTCOMES = ("correct", "wrong", "invalid", "late")
+
+_MAGIC = 0x45585041 # "EXPA"
+_HEADER_CELLS = 4 # magic, huella de la forma, ranuras, reservado
+
+
+class _Layout:
+    """Forma de los contadores de una ranura, derivada de las variantes compiladas."""
+
+    def __init__(self, variants):
+        self.variants = tuple(sorted(variants))
+        self.variant_index = {name: index for index, name in enumerate(self.variants)}
+        self.groups = {name: variants[name].group_names for name in self.variants}
+        self.money_bins = {} # (variante, grupo) -> (mínimo, ancho del bin)
+        m = 1
+        for name in self.variants:
+            for group in variants[name].groups.values():
+                amounts = [*group.rewards.success_rewards, *group.rewards.failure_penalties]
+                low = group.initial_money - sum(group.rewards.failure_penalties)
+                high = group.initial_money + sum(group.rewards.success_rewards)
+                width = reduce(math.gcd, amounts, 0) or 1 # Con el MCD cada monto posible cae en su propio bin
+                width = max(width, math.ceil((high - low + 1) / MAX_MONEY_BINS))
+                self.money_bins[(name, group.name)] = (low, width)
+                m = max(m, 1 + (high - low) // width)
+
+        v = len(self.variants)
+        g = max(len(groups) for groups in self.groups.values())
+        b = max(variants[name].max_blocks for name in self.variants)
+        self.shapes = {
+            "meta": (2 + LOCK_STRIPES,), # pid, reservado, versión por franja
+            "phases": (v, len(PHASES)),
+            "answers": (v, len(OUTCOMES)),
+            "blocks": (v, g, b, 3), # jugados, exitosos, errores
+            "money": (v, g, m),
+        }
+        self.offsets = {}
+        offset = 0
+        for section, shape in self.shapes.items():
+            self.offsets[section] = offset
+            offset += int(np.prod(shape))
+        self.slot_cells = offset
+        description = repr((self.variants, sorted(self.groups.items()), sorted(self.money_bins.items()), self.shapes))
+        self.fingerprint = int.from_bytes(hashlib.sha256(description.encode()).digest()[:7], "little")
+
+    def section(self, slot_array, section):
+        start = self.offsets[section]
+        return slot_array[start:start + int(np.prod(self.shapes[section]))].reshape(self.shapes[section])
+
+
+def _claim_path(slot):
+    return os.path.join(tempfile.gettempdir(), f"{SEGMENT_NAME}.ranura{slot}")
+
+
+def _owner_alive(path):
+    """True si el proceso dueño del archivo de la ranura sigue vivo."""
+    if os.name != "posix": # En Windows el dueño mantiene el archivo abierto y no se puede borrar
+        try:
+            os.remove(path)
+        except PermissionError:
+            return True
+        return False
+    try:
+        with open(path, encoding="utf-8") as claim_file:
+            pid = int(claim_file.read().strip() or 0)
+        os.kill(pid, 0)
+    except (OSError, ValueError):
+        return False
+    return True
+
+
+class SharedCounters:
+    """Contadores globales; este proceso escribe solo en su ranura."""
+
+    def __init__(self, variants=None):
+        self.layout = _Layout(variants if variants is not None else variantes.VARIANTS)
+        self._stripes = [threading.Lock() for _ in range(LOCK_STRIPES)]
+        self._segment = None
+        self._claim_fd = None
+        self.shared = False
+        try:
+            self._array = self._attach()
+            self.slot = self._claim_slot()
+            self.shared = True
+        except (OSError, ValueError) as error:
+            logger.warning("Agregados en memoria privada del proceso (sin memoria compartida): %s", error)
+            self._array = np.zeros(_HEADER_CELLS + self.layout.slot_cells, dtype=np.int64)
+            self.slot = 0
+        self._slots = self._array[_HEADER_CELLS:].reshape(-1, self.layout.slot_cells)
+        self._own = self._slots[self.slot]
+        self._views = {section: self.layout.section(self._own, section) for section in self.layout.shapes}
+        self._views["meta"][0] = os.getpid()
+        atexit.register(self.release)
+
+    def _attach(self):
+        size = (_HEADER_CELLS + MAX_PROCESSES * self.layout.slot_cells) * 8
+        try:
+            self._segment = shared_memory.SharedMemory(name=SEGMENT_NAME, create=True, size=size)
+            created = True
+        except FileExistsError:
+            self._segment = shared_memory.SharedMemory(name=SEGMENT_NAME)
+            created = False
+        if os.name == "posix": # Que el segmento no se borre cuando termine este proceso
+            resource_tracker.unregister(self._segment._name, "shared_memory")
+        array = np.ndarray((self._segment.size // 8,), dtype=np.int64, buffer=self._segment.buf)
+        if created:
+            array[:] = 0
+            array[1:_HEADER_CELLS] = (self.layout.fingerprint, MAX_PROCESSES, 0)
+            array[0] = _MAGIC # Último: marca la cabecera como completa
+        else:
+            for _ in range(50): # Otro proceso puede estar terminando de crearlo
+                if array[0] == _MAGIC:
+                    break
+                time.sleep(0.01)
+            if array[0] != _MAGIC or array[1] != self.layout.fingerprint or array[2] != MAX_PROCESSES or \
+                    self._segment.size < size:
+                raise ValueError(f"el segmento {SEGMENT_NAME} tiene otra configuración de variantes; "
+                                 "usar destroy() o EXPERIMENTO_SHM_NAME")
+        return array[:_HEADER_CELLS + MAX_PROCESSES * self.layout.slot_cells]
+
+    def _claim_slot(self):
+        for slot in range(MAX_PROCESSES):
+            path = _claim_path(slot)
+            try:
+                fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                if _owner_alive(path):
+                    continue
+                try: # El dueño murió: se libera el archivo y se vuelve a intentar una vez
+                    if os.path.exists(path):
+                        os.remove(path)
+                    fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                except OSError:
+                    continue
+            os.write(fd, str(os.getpid()).encode())
+            self._claim_fd = fd
+            slot_array = self._array[_HEADER_CELLS:].reshape(-1, self.layout.slot_cells)[slot]
+            self.layout.section(slot_array, "phases")[:] = 0 # Las sesiones del dueño anterior ya no existen
+            return slot
+        raise OSError(f"no hay ranuras libres en {SEGMENT_NAME} ({MAX_PROCESSES} procesos)")
+
+    def release(self):
+        """Libera la ranura de este proceso (sus sesiones por fase vuelven a cero)."""
+        if self._claim_fd is None:
+            return
+        self._views["phases"][:] = 0
+        os.close(self._claim_fd)
+        self._claim_fd = None
+        try:
+            os.remove(_claim_path(self.slot))
+        except OSError:
+            pass
+
+    # --- Escritura (solo en la ranura propia) ---
+
+    def _update(self, variant, apply):
+        index = self.layout.variant_index.get(variant)
+        if index is None: # Variante desconocida para esta configuración
+            return
+        stripe = index % LOCK_STRIPES
+        with self._stripes[stripe]:
+            apply(index)
+            self._views["meta"][2 + stripe] += 1
+
+    def add_phase(self, variant, phase, delta):
+        if phase in PHASES:
+            self._update(variant, lambda v: self._add("phases", (v, PHASES.index(phase)), delta))
+
+    def add_answer(self, variant, outcome):
+        if outcome in OUTCOMES:
+            self._update(variant, lambda v: self._add("answers", (v, OUTCOMES.index(outcome))))
+
+    def add_block(self, variant, group, block, success, errors):
+        group_index = self._group_index(variant, group)
+        if group_index is None or not 1 <= block <= self.layout.shapes["blocks"][2]:
+            return
+
+        self._update(variant, lambda v: self._add("blocks", (v, group_index, block - 1), (1, int(success), errors)))
+
+    def add_final_money(self, variant, group, money):
+        group_index = self._group_index(variant, group)
+        if group_index is None:
+            return
+        low, width = self.layout.money_bins[(variant, group)]
+        money_bin = min(max(0, (money - low) // width), self.layout.shapes["money"][2] - 1)
+        self._update(variant, lambda v: self._add("money", (v, group_index, money_bin)))
+
+    def _add(self, section, index, delta=1):
+        self._views[section][index] += delta
+
+    def _group_index(self, variant, group):
+        groups = self.layout.groups.get(variant, ())
+        return groups.index(group) if group in groups else None
+
+    # --- Lectura (todas las ranuras) ---
+
+    def version(self):
+        return int(self._slots[:, 2:2 + LOCK_STRIPES].sum())
+
+    def totals(self):
+        """(versión, {sección: arreglo sumado sobre las ranuras})."""
+        totals = self._slots.sum(axis=0)
+        return int(totals[2:2 + LOCK_STRIPES].sum()), {
+            section: self.layout.section(totals, section).copy()
+            for section in ("phases", "answers", "blocks", "money")
+        }
+
+
+def destroy(name=SEGMENT_NAME):
+    """Elimina el segmento compartido (por ejemplo, tras cambiar las variantes)."""
+    try:
+        segment = shared_memory.SharedMemory(name=name)
+    except FileNotFoundError:
+        return False
+    segment.close()
+    segment.unlink()
+    return True
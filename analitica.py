@@ -0,0 +1,112 @@
+"""
+Analítica de errores y latencia por paso de la secuencia.
+
+A partir del registro de respuestas (`registro.ANSWERS_FILE`), construye para cada
+variante matrices paso x bloque x grupo con los intentos, los errores y la suma de
+los tiempos de reacción. El paso es la posición de la respuesta esperada en
+`Variant.expected_sequence` (1 = primera resta), así que una celda corresponde a una
+transición concreta, como 1000→987. Cada matriz sale de un único `np.bincount` sobre
+un índice lineal: una pasada sobre las respuestas de la variante, sin agrupar fila por
+fila. Las respuestas "late" (fuera de tiempo) no cuentan como intento.
+
+El módulo no tiene efectos al importarse (no importa `registro` ni `metricas`): sus
+funciones se ejecutan en los procesos de `trabajos`.
+"""
+import os
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+import variantes
+
+# --- Parámetros de la analítica (constantes) ---
+ATTEMPT_OUTCOMES = ("correct", "wrong", "invalid") # "wrong" e "invalid" cuentan como error
+ANSWER_COLUMNS = ("session_id", "variant", "group", "block", "step", "outcome", "reaction_time_ms")
+
+
+@dataclass(frozen=True)
+class StepMatrices:
+    """Matrices (paso, bloque, grupo) de una variante."""
+    variant: str
+    transitions: tuple # Etiqueta de cada paso: "1000→987", "987→974", ...
+    blocks: tuple
+    groups: tuple
+    attempts: np.ndarray
+    errors: np.ndarray
+    latency_sum_ms: np.ndarray
+    latency_count: np.ndarray
+
+    @property
+    def error_rate(self):
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(self.attempts > 0, self.errors / self.attempts, np.nan)
+
+    @property
+    def mean_latency_ms(self):
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(self.latency_count > 0, self.latency_sum_ms / self.latency_count, np.nan)
+
+    def to_frame(self):
+        """Formato largo: una fila por celda (paso, bloque, grupo)."""
+        step_index, block_index, group_index = np.indices(self.attempts.shape).reshape(3, -1)
+        return pd.DataFrame({
+            "step": step_index + 1,
+            "transition": np.asarray(self.transitions)[step_index],
+            "block": np.asarray(self.blocks)[block_index],
+            "group": np.asarray(self.groups)[group_index],
+            "attempts": self.attempts.ravel(),
+            "errors": self.errors.ravel(),
+            "error_rate": self.error_rate.ravel(),
+            "mean_latency_ms": self.mean_latency_ms.ravel(),
+        })
+
+
+def load_answers(path):
+    """Respuestas registradas (solo las columnas que usa la analítica)."""
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return pd.DataFrame(columns=list(ANSWER_COLUMNS))
+    answers = pd.read_json(path, lines=True, dtype=False)
+    return answers.reindex(columns=list(ANSWER_COLUMNS))
+
+
+def build_step_matrices(answers, variant):
+    """Matrices de `variant` a partir de un DataFrame de respuestas (todas las variantes)."""
+    shape = (variant.final_step, variant.max_blocks, len(variant.groups))
+    rows = answers[(answers["variant"] == variant.name) & answers["outcome"].isin(ATTEMPT_OUTCOMES)]
+
+    step_index = pd.to_numeric(rows["step"], errors="coerce").to_numpy(dtype=float) - 1
+    block_index = pd.to_numeric(rows["block"], errors="coerce").to_numpy(dtype=float) - 1
+    group_index = pd.Categorical(rows["group"], categories=variant.group_names).codes
+    valid = (step_index >= 0) & (step_index < shape[0]) & (block_index >= 0) & (block_index < shape[1]) & (group_index >= 0)
+
+    # Índice lineal de la celda de cada respuesta: un bincount por matriz
+    cells = np.ravel_multi_index(
+        (step_index[valid].astype(int), block_index[valid].astype(int), group_index[valid]), shape)
+    size = int(np.prod(shape))
+    is_error = (rows["outcome"].to_numpy()[valid] != "correct").astype(float)
+    latency = pd.to_numeric(rows["reaction_time_ms"], errors="coerce").to_numpy(dtype=float)[valid]
+    has_latency = ~np.isnan(latency)
+
+    return StepMatrices(
+        variant=variant.name,
+        transitions=tuple(f"{a}→{b}" for a, b in zip(variant.expected_sequence, variant.expected_sequence[1:])),
+        blocks=tuple(range(1, variant.max_blocks + 1)),
+        groups=variant.group_names,
+        attempts=np.bincount(cells, minlength=size).reshape(shape),
+        errors=np.bincount(cells, weights=is_error, minlength=size).astype(int).reshape(shape),
+        latency_sum_ms=np.bincount(cells[has_latency], weights=latency[has_latency], minlength=size).reshape(shape),
+        latency_count=np.bincount(cells[has_latency], minlength=size).reshape(shape),
+    )
+
+
+def build_all(answers):
+    """Matrices de todas las variantes que tienen respuestas registradas."""
+    present = set(answers["variant"].dropna().unique())
+    return {name: build_step_matrices(answers, variant)
+            for name, variant in variantes.VARIANTS.items() if name in present}
+
+
+def step_frames(path):
+    """Trabajo de `trabajos`: formato largo de las matrices de cada variante del archivo `path`."""
+    return {name: step_matrices.to_frame() for name, step_matrices in build_all(load_answers(path)).items()}
@@ -0,0 +1,47 @@
+"""
+Reporte de memoria por variante con el modo de diagnóstico de `memoria` (tracemalloc).
+
+Recorre varias sesiones completas de cada `experimento_motivacion*.py` con el mismo
+recorrido que `bench_reruns.py` y muestra, por variante, la asignación neta de cada
+transición de fase, las líneas del script que más memoria retienen y la proyección de
+`st.session_state` para `memoria.PROJECTED_SESSIONS` sesiones simultáneas.
+
+Uso:
+    python benchmarks/bench_memoria.py
+    python benchmarks/bench_memoria.py --variant experimento_motivacion.py --sessions 5
+"""
+import argparse
+import glob
+import os
+import sys
+
+# El modo de diagnóstico se decide al importar `memoria`
+os.environ["EXPERIMENTO_TRACEMALLOC"] = "1"
+
+import bench_reruns # noqa: E402
+import memoria # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--variant", action="append", help="Script a medir (por defecto, todos)")
+    parser.add_argument("--sessions", type=int, default=3, help="Sesiones completas por variante")
+    args = parser.parse_args()
+
+    script_paths = [os.path.join(bench_reruns.REPO_DIR, v) for v in args.variant] if args.variant else \
+        sorted(glob.glob(os.path.join(bench_reruns.REPO_DIR, "experimento_motivacion*.py")))
+    for script_path in script_paths:
+        try:
+            for _ in range(args.sessions):
+                bench_reruns.bench_variant(script_path)
+        except bench_reruns.BenchmarkError as error:
+            print(f"Se omite {os.path.basename(script_path)}: {error}", file=sys.stderr)
+
+    for variant in memoria.tracker.variants():
+        print(memoria.tracker.render(variant))
+    print(f"Reportes escritos en {os.path.abspath(memoria.MEMORY_REPORT_DIR)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,258 @@
+"""
+Benchmark del costo de un rerun por fase para cada variante del experimento.
+
+Para cada `experimento_motivacion*.py` mide el tiempo de ejecución del script y los
+bytes de ForwardMsg (deltas) producidos en cada fase: WELCOME, INSTRUCTIONS,
+EXPERIMENT (respuesta correcta, incorrecta y no numérica), PAUSE_BETWEEN_BLOCKS y
+RESULTS. Los scripts se ejecutan con `streamlit.testing.v1.AppTest`; las respuestas se
+inyectan reemplazando el componente de entrada, que necesita un navegador.
+
+Uso:
+    python benchmarks/bench_reruns.py --save      # guarda la línea base en baselines.json
+    python benchmarks/bench_reruns.py             # compara contra la línea base (exit 1 si hay regresión)
+    python benchmarks/bench_reruns.py --variant experimento_motivacion_ganancia_v2.py
+
+La línea base depende de la máquina: se guarda localmente y no se versiona.
+"""
+import argparse
+import glob
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+from streamlit.runtime.forward_msg_queue import ForwardMsgQueue # noqa: E402
+from streamlit.runtime.scriptrunner import StopException # noqa: E402
+from streamlit.testing.v1 import AppTest # noqa: E402
+
+import entrada_respuesta # noqa: E402
+import instrumentacion # noqa: E402
+import variantes # noqa: E402
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+STEPS = ("WELCOME", "INSTRUCTIONS", "EXPERIMENT_correct", "EXPERIMENT_wrong",
+         "EXPERIMENT_non_numeric", "PAUSE_BETWEEN_BLOCKS", "RESULTS")
+DEFAULT_TIME_TOLERANCE = 0.5 # +50% sobre el tiempo base se considera regresión
+DEFAULT_BYTES_TOLERANCE = 0.02
+
+
+# --- Captura de tiempo y bytes por rerun ---
+
+class _RerunRecorder:
+    """Acumula (fase, segundos, bytes) de cada rerun mientras está activo."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending_bytes = 0
+        self.reruns = []
+
+    def on_enqueue(self, msg):
+        with self._lock:
+            self._pending_bytes += msg.ByteSize()
+
+    def on_rerun(self, phase, wall_s, cpu_s):
+        with self._lock:
+            self.reruns.append((phase, wall_s, self._pending_bytes))
+            self._pending_bytes = 0
+
+    def take(self, phase):
+        """Devuelve y descarta lo acumulado; suma los reruns que comenzaron en `phase`."""
+        with self._lock:
+            reruns, self.reruns, self._pending_bytes = self.reruns, [], 0
+        selected = [(wall_s, sent_bytes) for rerun_phase, wall_s, sent_bytes in reruns if rerun_phase == phase]
+        return sum(wall_s for wall_s, _ in selected), sum(sent_bytes for _, sent_bytes in selected)
+
+
+_recorder = _RerunRecorder()
+_original_enqueue = ForwardMsgQueue.enqueue
+
+
+def _recording_enqueue(self, msg):
+    _recorder.on_enqueue(msg)
+    _original_enqueue(self, msg)
+
+
+ForwardMsgQueue.enqueue = _recording_enqueue
+instrumentacion.add_rerun_listener(_recorder.on_rerun)
+
+
+# --- Respuestas simuladas del componente de entrada ---
+
+class _FakeAnswerInput:
+    """Sustituto del componente: devuelve el último envío simulado."""
+
+    def __init__(self):
+        self.event = None
+        self._nonce = 0
+
+    def submit(self, value):
+        self._nonce += 1
+        now_ms = time.perf_counter() * 1e3
+        self.event = {"value": value, "prompt_id": None, "nonce": self._nonce,
+                      "client_mounted_ms": 0.0, "client_shown_ms": now_ms - 800,
+                      "client_submit_ms": now_ms, "client_epoch_ms": time.time() * 1e3}
+
+    def __call__(self, **kwargs):
+        return self.event
+
+
+_original_sleep = time.sleep
+
+
+def _stop_at_pause_sleep(seconds):
+    # AppTest también duerme (en el hilo principal) mientras espera al script
+    if threading.current_thread() is threading.main_thread():
+        _original_sleep(seconds)
+        return
+    # En el hilo del script corta la espera de la pausa como st.stop(): el rerun que
+    # la renderiza ya se midió
+    raise StopException()
+
+
+# --- Recorrido de las fases ---
+
+class BenchmarkError(Exception):
+    """La variante lanzó una excepción durante el recorrido."""
+
+
+def _run_step(at, phase, action=None):
+    _recorder.take(phase) # Descarta lo anterior
+    if action is not None:
+        action()
+    at.run()
+    if at.exception:
+        raise BenchmarkError(at.exception[0].message)
+    return _recorder.take(phase)
+
+
+def bench_variant(script_path):
+    """Recorre todas las fases una vez y devuelve {paso: (segundos, bytes)}."""
+    fake_input = _FakeAnswerInput()
+    entrada_respuesta._answer_input = fake_input
+    results = {}
+
+    at = AppTest.from_file(script_path, default_timeout=60)
+    _run_step(at, "WELCOME") # Primera ejecución: imports y compilación, no se mide
+    expected_sequence = variantes.get(at.session_state["variant"]).expected_sequence
+    results["WELCOME"] = _run_step(at, "WELCOME")
+    results["INSTRUCTIONS"] = _run_step(at, "INSTRUCTIONS", lambda: at.button[0].click())
+    at.button[0].click().run() # Comienza el primer bloque
+
+    def answer(value_fn):
+        return lambda: fake_input.submit(value_fn())
+
+    next_value = lambda: str(expected_sequence[at.session_state["current_step"] + 1])
+    results["EXPERIMENT_correct"] = _run_step(at, "EXPERIMENT", answer(next_value))
+    results["EXPERIMENT_wrong"] = _run_step(at, "EXPERIMENT", answer(lambda: "1"))
+    results["EXPERIMENT_non_numeric"] = _run_step(at, "EXPERIMENT", answer(lambda: "abc"))
+
+    # Termina el bloque con una respuesta correcta que cruza el umbral
+    time.sleep = _stop_at_pause_sleep
+    try:
+        while at.session_state["experiment_phase"] == "EXPERIMENT":
+            results["PAUSE_BETWEEN_BLOCKS"] = _run_step(at, "PAUSE_BETWEEN_BLOCKS", answer(next_value))
+    finally:
+        time.sleep = _original_sleep
+
+    # Salta al último bloque y lo termina para llegar a RESULTS
+    at.session_state["pause_end_time"] = 0
+    at.run()
+    at.session_state["current_block"] = 10 ** 6
+    while at.session_state["experiment_phase"] == "EXPERIMENT":
+        results["RESULTS"] = _run_step(at, "RESULTS", answer(next_value))
+    return results
+
+
+def bench(script_paths, repeat):
+    """
+    Devuelve {variante: {paso: {"time_ms": mínimo, "bytes": mediana}}}. El mínimo de
+    las repeticiones es el estimador de tiempo menos sensible al ruido de la máquina.
+    """
+    report = {}
+    for script_path in script_paths:
+        samples = {step: [] for step in STEPS}
+        try:
+            bench_variant(script_path) # Calentamiento: cachés de Streamlit y del intérprete
+            for _ in range(repeat):
+                for step, sample in bench_variant(script_path).items():
+                    samples[step].append(sample)
+        except BenchmarkError as error:
+            print(f"Se omite {os.path.basename(script_path)}: {error}", file=sys.stderr)
+            continue
+        report[os.path.basename(script_path)] = {
+            step: {"time_ms": round(min(s for s, _ in values) * 1e3, 3),
+                   "bytes": int(statistics.median([b for _, b in values]))}
+            for step, values in samples.items() if values
+        }
+    return report
+
+
+# --- Reporte y comparación ---
+
+def print_table(report, field):
+    variants = sorted(report)
+    print(f"\n{field}")
+    short_names = [os.path.splitext(v)[0].replace("experimento_motivacion", "").strip("_") or "original" for v in variants]
+    print("paso".ljust(24) + "".join(name[:14].rjust(15) for name in short_names))
+    for step in STEPS:
+        row = step.ljust(24)
+        for variant in variants:
+            value = report[variant].get(step, {}).get(field)
+            row += ("-" if value is None else f"{value:,}").rjust(15)
+        print(row)
+
+
+def compare(report, baseline, time_tolerance, bytes_tolerance):
+    """Devuelve la lista de regresiones respecto de la línea base."""
+    regressions = []
+    for variant, steps in report.items():
+        for step, measured in steps.items():
+            base = baseline.get(variant, {}).get(step)
+            if base is None:
+                continue
+            if measured["time_ms"] > base["time_ms"] * (1 + time_tolerance):
+                regressions.append(f"{variant} {step}: {measured['time_ms']} ms (base {base['time_ms']} ms)")
+            if measured["bytes"] > base["bytes"] * (1 + bytes_tolerance):
+                regressions.append(f"{variant} {step}: {measured['bytes']} bytes (base {base['bytes']} bytes)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--variant", action="append", help="Script a medir (por defecto, todos)")
+    parser.add_argument("--repeat", type=int, default=10, help="Repeticiones por variante")
+    parser.add_argument("--save", action="store_true", help="Guarda el resultado como nueva línea base")
+    parser.add_argument("--time-tolerance", type=float, default=DEFAULT_TIME_TOLERANCE)
+    parser.add_argument("--bytes-tolerance", type=float, default=DEFAULT_BYTES_TOLERANCE)
+    args = parser.parse_args()
+
+    script_paths = [os.path.join(REPO_DIR, v) for v in args.variant] if args.variant else \
+        sorted(glob.glob(os.path.join(REPO_DIR, "experimento_motivacion*.py")))
+    report = bench(script_paths, args.repeat)
+    print_table(report, "time_ms")
+    print_table(report, "bytes")
+
+    if args.save:
+        with open(BASELINE_FILE, "w", encoding="utf-8") as baseline_file:
+            json.dump(report, baseline_file, indent=2, sort_keys=True)
+        print(f"\nLínea base guardada en {BASELINE_FILE}")
+        return 0
+
+    if not os.path.exists(BASELINE_FILE):
+        print("\nNo hay línea base: ejecuta primero con --save")
+        return 0
+    with open(BASELINE_FILE, encoding="utf-8") as baseline_file:
+        baseline = json.load(baseline_file)
+    regressions = compare(report, baseline, args.time_tolerance, args.bytes_tolerance)
+    for regression in regressions:
+        print(f"REGRESIÓN {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
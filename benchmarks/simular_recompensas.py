@@ -0,0 +1,58 @@
+"""
+Simulación por lotes del dinero final de cada grupo de cada variante.
+
+Usa las mismas tablas de `recompensas` que el experimento y las instrucciones: para
+`--participants` participantes simulados, cada bloque se completa con probabilidad
+`--success-rate` (una por bloque, o la misma para todos), y se muestra el dinero final
+medio y sus percentiles. Sirve para comparar los incentivos de las condiciones antes
+de publicar una variante nueva.
+
+Uso:
+    python benchmarks/simular_recompensas.py
+    python benchmarks/simular_recompensas.py --variant ganancia_v2 --success-rate 0.9 0.8 0.7 0.6
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import variantes # noqa: E402
+
+
+def simulate_group(variant, group, success_rates, participants, rng):
+    """Dinero final de `participants` participantes simulados del grupo."""
+    rates = np.broadcast_to(np.asarray(success_rates, dtype=float), (variant.max_blocks,))
+    outcomes = rng.random((participants, variant.max_blocks)) < rates
+    return group.initial_money + group.rewards.simulate(outcomes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--variant", action="append", help="Variante a simular (por defecto, todas)")
+    parser.add_argument("--participants", type=int, default=100_000)
+    parser.add_argument("--success-rate", type=float, nargs="+", default=[0.5],
+                        help="Probabilidad de completar cada bloque (una, o una por bloque)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    names = args.variant or sorted(variantes.VARIANTS)
+    print(f"{'variante':<14} {'grupo':<10} {'tipo':<9} {'inicial':>10} {'media':>10} {'p5':>10} {'p50':>10} {'p95':>10}")
+    for name in names:
+        variant = variantes.get(name)
+        if len(args.success_rate) not in (1, variant.max_blocks):
+            print(f"Se omite {name}: se esperaban 1 o {variant.max_blocks} probabilidades", file=sys.stderr)
+            continue
+        for group in variant.groups.values():
+            final_money = simulate_group(variant, group, args.success_rate, args.participants, rng)
+            p5, p50, p95 = np.percentile(final_money, (5, 50, 95))
+            print(f"{name:<14} {group.name:<10} {group.rewards.kind:<9} {group.initial_money:>10,} "
+                  f"{final_money.mean():>10,.0f} {p5:>10,.0f} {p50:>10,.0f} {p95:>10,.0f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
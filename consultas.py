@@ -0,0 +1,212 @@
+"""
+Capa de consultas columnar sobre el registro de respuestas, bloques y sesiones.
+
+`update_store` copia las filas nuevas de un registro JSONL a un dataset Parquet
+particionado por `variant`, `group` y `date` (directorios `variant=.../group=.../date=...`)
+con las filas de cada archivo ordenadas por bloque, así que los filtros por variante,
+grupo y fecha descartan directorios enteros y los de bloque usan las estadísticas de
+cada grupo de filas. Es incremental: recuerda hasta qué byte del registro ya copió y
+solo lee lo nuevo. Cada actualización agrega un archivo pequeño por partición, así que
+cuando una partición junta más de `COMPACT_FILES` archivos se reescribe como uno solo
+(`compact_partition`): las consultas no tienen que leer el pie de cientos de archivos.
+Es un trabajo de `trabajos` (el módulo no importa `registro` ni tiene efectos al
+importarse).
+
+Las consultas predefinidas (`aggregate`) se resuelven con `pyarrow.dataset`. Las
+consultas SQL libres (`sql`) usan DuckDB embebido sobre los mismos archivos, si está
+instalado (`pip install duckdb`); sin DuckDB, `SQL_AVAILABLE` es False.
+"""
+import datetime
+import json
+import os
+import shutil
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+import exportacion
+
+try:
+    import duckdb
+except ImportError: # Sin DuckDB solo hay consultas predefinidas
+    duckdb = None
+
+# --- Parámetros del almacén de consultas (constantes) ---
+PARTITIONS = ("variant", "group", "date")
+CHUNK_ROWS = 50_000
+COMPACT_FILES = 8 # Archivos por partición a partir de los cuales se compacta
+SQL_AVAILABLE = duckdb is not None
+AGGREGATIONS = ("mean", "approximate_median", "min", "max", "sum", "count")
+
+_OFFSET_FILE = "_offset"
+
+
+def _read_offset(table_dir):
+    try:
+        with open(os.path.join(table_dir, _OFFSET_FILE), encoding="utf-8") as offset_file:
+            return int(offset_file.read().strip() or 0)
+    except FileNotFoundError:
+        return 0
+
+
+def _write_offset(table_dir, offset):
+    path = os.path.join(table_dir, _OFFSET_FILE)
+    with open(f"{path}.tmp", "w", encoding="utf-8") as offset_file:
+        offset_file.write(str(offset))
+    os.replace(f"{path}.tmp", path)
+
+
+def _write_chunk(rows, table_dir, name):
+    # Esquema de todas las filas del bloque: las filas de sesiones, por ejemplo, difieren según la variante
+    table = exportacion.arrow_table(rows, exportacion.arrow_schema(exportacion.column_types(rows)))
+    if "block" in table.column_names:
+        table = table.sort_by("block") # Rangos de bloque estrechos por grupo de filas
+    ds.write_dataset(table, table_dir, format="parquet", partitioning=list(PARTITIONS),
+                     partitioning_flavor="hive", basename_template=f"{name}-{{i}}.parquet",
+                     existing_data_behavior="overwrite_or_ignore")
+
+
+def compact_partition(directory, name):
+    """Reescribe los archivos Parquet de la partición `directory` como uno solo; devuelve si lo hizo."""
+    paths = sorted(os.path.join(directory, file_name) for file_name in os.listdir(directory)
+                   if file_name.endswith(".parquet"))
+    if len(paths) <= COMPACT_FILES:
+        return False
+    table = pa.concat_tables([pq.ParquetFile(path).read() for path in paths], promote_options="permissive")
+    if "block" in table.column_names:
+        table = table.sort_by("block")
+    temporary = os.path.join(directory, f"{name}.tmp") # Sin extensión .parquet: `open_table` no lo ve a medias
+    pq.write_table(table, temporary)
+    os.replace(temporary, os.path.join(directory, f"{name}.parquet"))
+    for path in paths:
+        if os.path.basename(path) != f"{name}.parquet":
+            os.remove(path)
+    return True
+
+
+def _compact(table_dir, name):
+    for directory, _, file_names in os.walk(table_dir):
+        if sum(file_name.endswith(".parquet") for file_name in file_names) > COMPACT_FILES:
+            compact_partition(directory, name)
+
+
+def _row(line):
+    row = json.loads(line)
+    row["date"] = datetime.date.fromtimestamp(row.get("logged_at", 0)).isoformat() # Fecha local, como `exportacion`
+    for key, value in row.items():
+        if isinstance(value, (list, dict)):
+            row[key] = json.dumps(value, ensure_ascii=False)
+    return row
+
+
+def update_store(source, table_dir):
+    """Agrega al dataset `table_dir` las filas de `source` aún no copiadas; devuelve cuántas."""
+    if not os.path.exists(source):
+        return 0
+    os.makedirs(table_dir, exist_ok=True)
+    offset = _read_offset(table_dir)
+    added = 0
+    with open(source, "rb") as log_file:
+        if os.fstat(log_file.fileno()).st_size < offset: # El registro se reemplazó: se vuelve a copiar
+            shutil.rmtree(table_dir)
+            os.makedirs(table_dir)
+            offset = 0
+        log_file.seek(offset)
+        rows = []
+        chunk_start = offset # Nombra los archivos: repetir una copia interrumpida los sobrescribe
+        for line in log_file:
+            if not line.endswith(b"\n"): # Línea que el hilo de `registro` todavía está escribiendo
+                break
+            offset += len(line)
+            if line.strip():
+                rows.append(_row(line))
+            if len(rows) == CHUNK_ROWS:
+                _write_chunk(rows, table_dir, f"part-{chunk_start}")
+                added += len(rows)
+                rows = []
+                chunk_start = offset
+        if rows:
+            _write_chunk(rows, table_dir, f"part-{chunk_start}")
+            added += len(rows)
+    _write_offset(table_dir, offset)
+    if added: # Después del offset: repetir una copia interrumpida no duplica lo ya compactado
+        _compact(table_dir, f"compactado-{offset}")
+    return added
+
+
+def update_stores(tables):
+    """`update_store` de cada {nombre: (registro JSONL, directorio)}; devuelve {nombre: filas agregadas}."""
+    return {name: update_store(source, table_dir) for name, (source, table_dir) in tables.items()}
+
+
+def store_version(table_dir):
+    """Cambia cada vez que `update_store` agrega filas (sirve de clave de caché)."""
+    return _read_offset(table_dir)
+
+
+def open_table(table_dir):
+    """Dataset con las columnas de todos los archivos (las que faltan en uno quedan nulas)."""
+    files = [os.path.join(root, name) for root, _, names in os.walk(table_dir) for name in names
+             if name.endswith(".parquet")]
+    if not files:
+        return None
+    partitioning = ds.partitioning(pa.schema([(key, pa.string()) for key in PARTITIONS]), flavor="hive")
+    schemas = [ds.dataset(path, format="parquet").schema for path in files]
+    schema = pa.unify_schemas(schemas + [partitioning.schema], promote_options="permissive")
+    return ds.dataset(files, schema=schema, format="parquet", partitioning=partitioning,
+                      partition_base_dir=table_dir)
+
+
+def _filter_expression(filters):
+    expression = None
+    for key, value in filters.items():
+        if value is None or value == ():
+            continue
+        if key == "start_date":
+            condition = ds.field("date") >= value.isoformat()
+        elif key == "end_date":
+            condition = ds.field("date") <= value.isoformat()
+        elif isinstance(value, tuple):
+            condition = ds.field(key).isin(list(value))
+        else:
+            condition = ds.field(key) == value
+        expression = condition if expression is None else expression & condition
+    return expression
+
+
+def aggregate(table_dir, column, how, by, filters):
+    """
+    `how` de `column` por las columnas `by`, sobre las filas que cumplen `filters`
+    ({columna: valor o tupla de valores, "start_date"/"end_date": fecha}). Devuelve un
+    DataFrame con `by`, `<column>_<how>` y `rows`; vacío si no hay datos.
+    """
+    if how not in AGGREGATIONS:
+        raise ValueError(f"Agregación desconocida {how!r}; válidas: {AGGREGATIONS}")
+    dataset = open_table(table_dir)
+    if dataset is None or column not in dataset.schema.names:
+        return pa.table({}).to_pandas()
+    table = dataset.to_table(columns=list(dict.fromkeys([*by, column])), filter=_filter_expression(filters))
+    if pa.types.is_boolean(table.schema.field(column).type) and how != "count": # Proporción de verdaderos
+        table = table.set_column(table.schema.get_field_index(column), column, pc.cast(table[column], pa.float64()))
+    result = table.group_by(list(by)).aggregate([(column, how), (column, "count")])
+    result = result.rename_columns([f"{column}_{how}" if name == f"{column}_{how}" else
+                                    "rows" if name == f"{column}_count" else name for name in result.column_names])
+    return result.to_pandas().sort_values(list(by)).reset_index(drop=True)
+
+
+def sql(query, table_dirs):
+    """Ejecuta `query` con DuckDB; cada clave de `table_dirs` es una vista sobre su dataset."""
+    if duckdb is None:
+        raise RuntimeError("Las consultas SQL necesitan DuckDB (pip install duckdb)")
+    connection = duckdb.connect(":memory:")
+    try:
+        for name, table_dir in table_dirs.items():
+            pattern = os.path.join(table_dir, "**", "*.parquet").replace("'", "''")
+            connection.execute(f"CREATE VIEW \"{name}\" AS SELECT * FROM read_parquet('{pattern}', "
+                               "hive_partitioning = true, union_by_name = true)")
+        return connection.execute(query).fetchdf()
+    finally:
+        connection.close()
+
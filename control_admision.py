@@ -0,0 +1,164 @@
+"""
+Control de admisión para proteger la precisión temporal de los bloques.
+
+Cuando el servidor está saturado, la latencia de cada rerun se come parte de los
+`BLOCK_DURATION` segundos del bloque y sesga los datos contra quien renderiza más
+lento. El controlador mide la latencia de los reruns y el uso de CPU del proceso y,
+si se viola el SLO, deja a los participantes nuevos en una sala de espera en la fase
+WELCOME, de modo que los bloques en curso conservan sus garantías de tiempo.
+"""
+import threading
+import time
+from collections import OrderedDict, deque
+
+import streamlit as st
+
+import instrumentacion
+import metricas
+
+# --- Parámetros del control de admisión (constantes) ---
+LATENCY_SLO_S = 0.5 # p95 máximo aceptable de la duración de un rerun
+LATENCY_PERCENTILE = 0.95
+CPU_SLO = 0.9 # Fracción de un núcleo usada por el proceso
+WINDOW_S = 30 # Ventana de observación para latencia y CPU
+MIN_SAMPLES = 20 # Sin suficientes muestras no se considera saturado
+SESSION_TTL_S = 600 # Sesiones admitidas sin actividad se liberan tras este tiempo
+QUEUE_TTL_S = 30 # Participantes en espera que dejan de consultar salen de la cola
+WAITING_POLL_S = 2 # Cada cuánto se refresca la sala de espera
+
+
+class AdmissionController:
+    """Mide la carga del servidor y decide qué sesiones pueden comenzar el experimento."""
+
+    def __init__(self, latency_slo_s=LATENCY_SLO_S, cpu_slo=CPU_SLO, window_s=WINDOW_S):
+        self.latency_slo_s = latency_slo_s
+        self.cpu_slo = cpu_slo
+        self.window_s = window_s
+        self._lock = threading.Lock()
+        self._latencies = deque() # (instante, duración del rerun en s)
+        self._cpu_samples = deque() # (instante de pared, tiempo de CPU del proceso)
+        self._admitted = {} # session_id -> último instante visto
+        self._queue = OrderedDict() # session_id -> último instante visto (FIFO)
+
+    # --- Medición de la carga ---
+
+    def record_rerun(self, phase, wall_s, cpu_s):
+        """Observador de `instrumentacion`: registra la duración de un rerun."""
+        now = time.monotonic()
+        with self._lock:
+            self._latencies.append((now, wall_s))
+            if not self._cpu_samples or now - self._cpu_samples[-1][0] >= 1:
+                self._cpu_samples.append((now, time.process_time()))
+            self._expire(now)
+
+    def _expire(self, now):
+        horizon = now - self.window_s
+        while self._latencies and self._latencies[0][0] < horizon:
+            self._latencies.popleft()
+        # Se conserva siempre una muestra previa a la ventana para poder calcular el delta
+        while len(self._cpu_samples) > 2 and self._cpu_samples[1][0] < horizon:
+            self._cpu_samples.popleft()
+
+    def latency_percentile(self, q=LATENCY_PERCENTILE):
+        """Percentil `q` de la duración de los reruns en la ventana (None sin datos)."""
+        with self._lock:
+            durations = sorted(duration for _, duration in self._latencies)
+        if len(durations) < MIN_SAMPLES:
+            return None
+        return durations[min(len(durations) - 1, int(q * len(durations)))]
+
+    def cpu_utilization(self):
+        """Fracción de un núcleo usada por el proceso en la ventana (None sin datos)."""
+        with self._lock:
+            if len(self._cpu_samples) < 2:
+                return None
+            (first_wall, first_cpu), (last_wall, last_cpu) = self._cpu_samples[0], self._cpu_samples[-1]
+        if last_wall <= first_wall:
+            return None
+        return (last_cpu - first_cpu) / (last_wall - first_wall)
+
+    def is_overloaded(self):
+        """True si la latencia o la CPU observadas violan el SLO."""
+        latency = self.latency_percentile()
+        cpu = self.cpu_utilization()
+        return (latency is not None and latency > self.latency_slo_s) or \
+               (cpu is not None and cpu > self.cpu_slo)
+
+    # --- Admisión de sesiones ---
+
+    def request_admission(self, session_id):
+        """
+        Devuelve 0 si la sesión puede comenzar, o su posición (1..n) en la cola de espera.
+        La cola es FIFO: solo la primera sesión en espera puede ser admitida.
+        """
+        now = time.monotonic()
+        overloaded = self.is_overloaded()
+        with self._lock:
+            self._drop_stale(now)
+            if session_id in self._admitted:
+                self._admitted[session_id] = now
+                return 0
+            self._queue[session_id] = now
+            position = list(self._queue).index(session_id) + 1
+            if position == 1 and not overloaded:
+                del self._queue[session_id]
+                self._admitted[session_id] = now
+                return 0
+            return position
+
+    def release(self, session_id):
+        """Libera el cupo de una sesión (al terminar el experimento o reiniciar)."""
+        with self._lock:
+            self._admitted.pop(session_id, None)
+            self._queue.pop(session_id, None)
+
+    def _drop_stale(self, now):
+        for session_id, last_seen in list(self._admitted.items()):
+            if now - last_seen > SESSION_TTL_S:
+                del self._admitted[session_id]
+        for session_id, last_seen in list(self._queue.items()):
+            if now - last_seen > QUEUE_TTL_S:
+                del self._queue[session_id]
+
+    def queue_depth(self):
+        """Número de sesiones esperando admisión."""
+        with self._lock:
+            return len(self._queue)
+
+    def active_sessions(self):
+        """Número de sesiones admitidas."""
+        with self._lock:
+            return len(self._admitted)
+
+
+@st.cache_resource
+def get_admission_controller():
+    """Controlador único por proceso, compartido por todas las sesiones."""
+    controller = AdmissionController()
+    instrumentacion.add_rerun_listener(controller.record_rerun)
+    metricas.register_queue_gauge("admission_waiting", controller.queue_depth)
+    return controller
+
+
+def wait_for_admission():
+    """
+    Llamar al renderizar WELCOME. Si el servidor está saturado muestra la sala de espera
+    y vuelve a consultar periódicamente; solo retorna cuando la sesión es admitida.
+    """
+    queue_position = get_admission_controller().request_admission(instrumentacion.current_session_id())
+    if queue_position == 0:
+        return
+
+    st.markdown("<h2 style='color:#333333; font-size:2.5em; font-weight:bold;'>Sala de Espera</h2>", unsafe_allow_html=True)
+    st.markdown("<p style='color:#666666; font-size:1.2em;'>En este momento hay muchos participantes realizando el experimento. Comenzarás en cuanto se libere un cupo.</p>", unsafe_allow_html=True)
+    st.info(f"Tu posición en la fila: {queue_position}")
+
+    # Igual que en la pausa entre bloques: espera y vuelve a consultar
+    instrumentacion.end_rerun() # La espera no cuenta como latencia del rerun
+    time.sleep(WAITING_POLL_S)
+    instrumentacion.rerun()
+
+
+def release_admission():
+    """Libera el cupo de la sesión actual (idempotente)."""
+    get_admission_controller().release(instrumentacion.current_session_id())
@@ -0,0 +1,61 @@
+"""
+Cuestionarios posteriores a la tarea.
+
+Una variante pide en `[results] survey` una o más escalas de `SCALES` por nombre
+(`survey = true` equivale a `["animo"]`). Todas las preguntas se muestran en un único
+`st.form`, así que mover los controles no provoca reruns: el cuestionario entero, sea de
+2 o de 20 ítems, se envía con un solo rerun al pulsar el botón. Cada respuesta se guarda
+en los resultados con la clave de su pregunta.
+
+Agregar una escala es agregar una entrada a `SCALES`.
+"""
+from dataclasses import dataclass
+
+DEFAULT_SCALE = "animo"
+
+
+@dataclass(frozen=True)
+class Question:
+    """Ítem de un cuestionario respondido con un slider."""
+    key: str # Columna en los resultados
+    label: str # Pregunta junto al slider
+    summary_label: str # Texto en el resumen de la pantalla de resultados
+    min_value: int
+    max_value: int
+    default: int
+    step: int = 1
+
+
+def _nasa_tlx_item(key, name, question, low, high):
+    # Escala de 0 a 100 en pasos de 5 (21 marcas), como la versión en papel del NASA-TLX
+    return Question(f"nasa_tlx_{key}", f"{name}: {question} (0: {low}, 100: {high})", name, 0, 100, 50, step=5)
+
+
+SCALES = {
+    "animo": (
+        Question("mood_rating",
+                 "Vuelve a confirmar: ¿Cómo te sientes anímicamente? (1: Muy Negativo, 10: Muy Positivo)",
+                 "Anímicamente", 1, 10, 5),
+        Question("mental_fatigue_rating",
+                 "Vuelve a confirmar: ¿Cómo te sientes de desgaste mental? (1: Muy Descansado, 10: Muy Cansado)",
+                 "Desgaste Mental", 1, 10, 5),
+    ),
+    "nasa_tlx": (
+        _nasa_tlx_item("mental", "Exigencia mental", "¿Cuánta actividad mental y perceptiva requirió la tarea?", "Muy baja", "Muy alta"),
+        _nasa_tlx_item("physical", "Exigencia física", "¿Cuánta actividad física requirió la tarea?", "Muy baja", "Muy alta"),
+        _nasa_tlx_item("temporal", "Exigencia temporal", "¿Cuánta presión de tiempo sentiste?", "Muy baja", "Muy alta"),
+        _nasa_tlx_item("performance", "Rendimiento", "¿Qué tan exitoso fuiste en lo que se te pidió?", "Perfecto", "Fracaso"),
+        _nasa_tlx_item("effort", "Esfuerzo", "¿Cuánto tuviste que esforzarte para lograr tu rendimiento?", "Muy bajo", "Muy alto"),
+        _nasa_tlx_item("frustration", "Frustración", "¿Qué tan inseguro, desanimado, irritado o estresado te sentiste?", "Muy baja", "Muy alta"),
+    ),
+}
+
+
+def questions(scale_names):
+    """Preguntas de las escalas `scale_names`, en orden; KeyError si alguna no existe."""
+    return tuple(question for name in scale_names for question in SCALES[name])
+
+
+def default_ratings(survey):
+    """Respuestas iniciales (los valores por defecto) de las preguntas `survey`."""
+    return {question.key: question.default for question in survey}
@@ -0,0 +1,136 @@
+"""
+Detección en línea de sesiones sospechosas (bots o respuestas imposibles).
+
+Cada respuesta registrada por `temporizacion.record_answer` actualiza, en memoria
+constante por sesión, la media y la varianza del tiempo de reacción (algoritmo de
+Welford) y su mínimo en las últimas `ROLLING_WINDOW` respuestas (deque monótona). Una
+sesión se marca como:
+- "demasiado_rapida": el mínimo reciente está por debajo de `MIN_HUMAN_LATENCY_MS`
+  (nadie teclea un número de tres o cuatro cifras y Enter tan rápido),
+- "periodica": tras `MIN_ANSWERS` respuestas, el coeficiente de variación es menor que
+  `PERIODIC_MAX_CV` (los tiempos humanos varían mucho más).
+
+Las marcas quedan en el monitor del proceso (`monitor.suspicious_sessions()`), que
+consulta la página del experimentador, se registran en el log al aparecer y se guardan
+con cada bloque en el registro. No hay consultas a disco por respuesta.
+"""
+import logging
+import math
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+# --- Parámetros de la detección (constantes) ---
+MIN_HUMAN_LATENCY_MS = 200
+ROLLING_WINDOW = 5 # Respuestas que abarca el mínimo reciente
+MIN_ANSWERS = 10 # Respuestas necesarias para juzgar la periodicidad
+PERIODIC_MAX_CV = 0.05
+SESSION_IDLE_S = 3600 # Sesiones sin respuestas durante este tiempo se olvidan
+
+FLAGS = ("demasiado_rapida", "periodica")
+
+
+class LatencyStats:
+    """Estadísticos en línea del tiempo de reacción de una sesión (memoria constante)."""
+
+    __slots__ = ("count", "mean", "_m2", "_window")
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self._window = deque() # (n.º de respuesta, latencia) con latencias crecientes
+
+    def update(self, latency_ms):
+        # Welford: media y suma de cuadrados de las desviaciones, numéricamente estable
+        self.count += 1
+        delta = latency_ms - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (latency_ms - self.mean)
+
+        # Mínimo deslizante: se descartan las latencias mayores que ya no pueden ser mínimo
+        while self._window and self._window[-1][1] >= latency_ms:
+            self._window.pop()
+        self._window.append((self.count, latency_ms))
+        if self._window[0][0] <= self.count - ROLLING_WINDOW:
+            self._window.popleft()
+
+    @property
+    def stdev(self):
+        return math.sqrt(self._m2 / (self.count - 1)) if self.count > 1 else 0.0
+
+    @property
+    def rolling_min(self):
+        return self._window[0][1] if self._window else None
+
+    def flags(self):
+        """Marcas que corresponden a los estadísticos actuales."""
+        flags = []
+        if self.rolling_min is not None and self.rolling_min < MIN_HUMAN_LATENCY_MS:
+            flags.append("demasiado_rapida")
+        if self.count >= MIN_ANSWERS and self.mean > 0 and self.stdev / self.mean < PERIODIC_MAX_CV:
+            flags.append("periodica")
+        return flags
+
+
+class SessionMonitor:
+    """Estadísticos y marcas de todas las sesiones del proceso."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sessions = {} # session_id -> [LatencyStats, variante, último instante, {marca: instante}]
+
+    def observe(self, session_id, variant, latency_ms):
+        """Actualiza la sesión con una respuesta; devuelve las marcas nuevas."""
+        now = time.time()
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                entry = self._sessions[session_id] = [LatencyStats(), variant, now, {}]
+                self._forget_idle(now)
+            stats, _, _, flagged = entry
+            stats.update(latency_ms)
+            entry[2] = now
+            new_flags = [flag for flag in stats.flags() if flag not in flagged]
+            for flag in new_flags:
+                flagged[flag] = now
+        for flag in new_flags:
+            logger.warning("Sesión %s (%s) marcada como %s", session_id, variant, flag)
+        return new_flags
+
+    def flags(self, session_id):
+        """Marcas acumuladas de la sesión."""
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            return sorted(entry[3]) if entry is not None else []
+
+    def suspicious_sessions(self):
+        """Filas (dict) de las sesiones con alguna marca, la más reciente primero."""
+        with self._lock:
+            rows = [{
+                "session_id": session_id,
+                "variant": variant,
+                "flags": ", ".join(sorted(flagged)),
+                "flagged_at": time.strftime("%H:%M:%S", time.localtime(min(flagged.values()))),
+                "answers": stats.count,
+                "mean_ms": round(stats.mean, 1),
+                "stdev_ms": round(stats.stdev, 1),
+                "rolling_min_ms": stats.rolling_min,
+                "last_seen": last_seen,
+            } for session_id, (stats, variant, last_seen, flagged) in self._sessions.items() if flagged]
+        return sorted(rows, key=lambda row: row["last_seen"], reverse=True)
+
+    def forget(self, session_id):
+        """Descarta la sesión (en modo kiosco, al pasar al siguiente participante)."""
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def _forget_idle(self, now):
+        for session_id, entry in list(self._sessions.items()):
+            if now - entry[2] > SESSION_IDLE_S:
+                del self._sessions[session_id]
+
+
+monitor = SessionMonitor()
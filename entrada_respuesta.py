@@ -0,0 +1,47 @@
+"""
+Componente de entrada de respuestas con marcas de tiempo del cliente.
+
+Reemplaza al `st.text_input` dentro de `st.form`: cada envío llega con
+`performance.now()` del navegador (montaje, aparición del número y envío), de modo
+que los tiempos de reacción no incluyen la latencia de red ni la del rerun.
+
+Con `submit_length`, el cliente envía la respuesta en cuanto el texto tiene esa
+longitud (la de la respuesta esperada), sin Enter ni clic: un solo evento al servidor,
+y el tiempo de reacción termina en la última tecla. Las respuestas más cortas se siguen
+enviando con Enter o con el botón.
+"""
+import os
+
+import streamlit as st
+import streamlit.components.v1 as components
+
+import instrumentacion
+
+_COMPONENT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "componentes", "entrada_respuesta")
+_answer_input = components.declare_component("entrada_respuesta", path=_COMPONENT_DIR)
+
+
+def answer_input(label, placeholder, prompt_id, key, submit_length=None):
+    """
+    Muestra la entrada de respuesta y devuelve el envío nuevo (dict) o None.
+
+    `prompt_id` debe cambiar cada vez que cambia lo que el participante debe responder:
+    el cliente reinicia ahí su marca de "número mostrado". El dict devuelto incluye las
+    marcas del cliente (`client_*_ms`) y `server_receipt_ns`, el `perf_counter_ns` del
+    servidor al comenzar el rerun que trajo la respuesta, y `auto_submitted` (True si se
+    envió sola al llegar a `submit_length` caracteres).
+    """
+    event = _answer_input(label=label, placeholder=placeholder, prompt_id=prompt_id, submit_length=submit_length,
+                          key=key, default=None)
+    if not event:
+        return None
+
+    # El valor del componente persiste entre reruns: solo se procesa cada envío una vez
+    event_id = (event["client_mounted_ms"], event["nonce"])
+    seen_key = f"{key}_last_event"
+    if st.session_state.get(seen_key) == event_id:
+        return None
+    st.session_state[seen_key] = event_id
+
+    event["server_receipt_ns"] = instrumentacion.rerun_started_ns()
+    return event
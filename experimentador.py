@@ -0,0 +1,28 @@
+"""
+Acceso a las páginas del experimentador en `servidor.py`.
+
+Las páginas de análisis solo se publican si se define `EXPERIMENTO_ADMIN_TOKEN`, y cada
+una exige `?clave=<token>` en la URL. Los participantes nunca las ven: la navegación
+del servidor está oculta.
+"""
+import hmac
+import os
+
+import streamlit as st
+
+# --- Parámetros del acceso del experimentador (constantes) ---
+ADMIN_TOKEN = os.environ.get("EXPERIMENTO_ADMIN_TOKEN", "") # Vacío = sin páginas del experimentador
+ADMIN_QUERY_PARAM = "clave"
+
+
+def is_authorized():
+    """True si la URL de la sesión actual trae el token del experimentador."""
+    token = st.query_params.get(ADMIN_QUERY_PARAM)
+    return bool(ADMIN_TOKEN) and bool(token) and hmac.compare_digest(token, ADMIN_TOKEN)
+
+
+def require_authorization():
+    """Detiene la página si la sesión no es del experimentador."""
+    if not is_authorized():
+        st.error("Esta página es solo para el experimentador.")
+        st.stop()
@@ -0,0 +1,622 @@
+"""
+Motor común del Experimento de Motivación Cognitiva.
+
+Todas las variantes comparten este código; lo que cambia entre ellas (parámetros de
+la tarea, grupos, tablas de recompensa, textos y pantalla de resultados) viene de la
+`variantes.Variant` compilada a partir de `config_variantes/<nombre>.toml`. Cada
+script `experimento_motivacion*.py` solo llama a `run("<nombre>")`, y `servidor.py`
+publica todas las variantes como páginas de un único proceso.
+
+Al guardar los resultados, el registro final del participante se archiva en `registro`
+(en el hilo de escritura, no en el rerun). Con `EXPERIMENTO_KIOSK=1` (máquinas
+compartidas del laboratorio), la pantalla de resultados termina con "Siguiente
+Participante": archiva al participante si no llegó a guardar, cambia el estado de la sesión
+por uno nuevo armado a partir de una plantilla precalculada por variante y vuelve a la
+bienvenida en un único rerun.
+"""
+import copy
+import functools
+import os
+import random
+import time
+from types import MappingProxyType
+
+import pandas as pd # Marca de tiempo de los resultados
+import streamlit as st
+
+import agregados
+import control_admision
+import cuestionarios
+import deteccion
+import entrada_respuesta
+import exportacion
+import instrumentacion
+import memoria
+import metricas
+import participantes
+import perfilador # noqa: F401 (se activa con ?perfil=<EXPERIMENTO_PROFILE_TOKEN>)
+import puntuacion
+import registro
+import temporizacion
+import variantes
+
+# --- Parámetros del modo kiosco (constantes) ---
+KIOSK_MODE = os.environ.get("EXPERIMENTO_KIOSK", "") == "1"
+
+# --- Parámetros de las descargas del participante (constantes) ---
+DOWNLOAD_GZIP = os.environ.get("EXPERIMENTO_DOWNLOAD_GZIP", "") == "1" # CSV comprimidos (.csv.gz)
+
+# --- Global styles for the Streamlit application ---
+GLOBAL_STYLES = """
+<style>
+/* Custom font Inter */
+@import url('https://fonts.googleapis.com/css2?family=Inter:wght@400;700;800&display=swap');
+html, body, [class*="st-"] {
+    font-family: 'Inter', sans-serif;
+    text-align: center;
+}
+.stApp {
+    background-color: #f0f0f0; /* Light grey background */
+    padding: 20px;
+}
+/* Button styles */
+.stButton>button {
+    background-color: #007BFF; /* Primary blue - MODIFICADO para todos los botones */
+    color: white;
+    border-radius: 8px;
+    font-weight: bold;
+    padding: 10px 25px;
+    margin: 5px;
+    border: none;
+    cursor: pointer;
+    transition: all 0.3s ease;
+    box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
+}
+.stButton>button:hover {
+    background-color: #0056b3; /* Darker blue on hover */
+    transform: translateY(-2px);
+    box-shadow: 0 6px 8px rgba(0, 0, 0, 0.15);
+}
+/* Specific styles for form submit button (overwritten to be blue too) */
+/* Asegura que el botón de enviar dentro del formulario sea azul */
+button[data-testid*="stFormSubmitButton"] {
+    background-color: #007BFF !important; /* Mismo azul que los otros botones, forzado con !important */
+    color: white !important; /* Letra blanca, forzado con !important */
+}
+button[data-testid*="stFormSubmitButton"]:hover {
+    background-color: #0056b3 !important; /* Darker blue on hover, forzado con !important */
+}
+
+/* Text input field styles */
+.stTextInput>div>div>input {
+    text-align: center;
+    font-size: 24px;
+    padding: 10px;
+    border-radius: 8px;
+    border: 2px solid #ccc;
+    transition: border-color 0.3s ease, box-shadow 0.3s ease;
+    background-color: #ffffff; /* White background */
+    color: #000000; /* Black text color */
+}
+.stTextInput>div>div>input:focus {
+    border-color: #0056b3; /* Blue border on focus */
+    outline: none;
+    box-shadow: 0 0 0 0.2rem rgba(0, 86, 179, 0.25); /* Blue shadow on focus */
+}
+/* Slider styles */
+.stSlider .st-fx { /* Track background */
+    background: #e0e0e0;
+    border-radius: 5px;
+}
+.stSlider .st-fy { /* Track fill */
+    background: #007bff; 
+    border-radius: 5px;
+}
+.stSlider .st-fz { /* Slider handle */
+    background: #007bff;
+    border: 2px solid white;
+    box-shadow: 0 2px 4px rgba(0,0,0,0.2);
+}
+/* Styles for titles and texts */
+h1, h2, h3, h4 {
+    color: #333333;
+}
+p {
+    color: #555555;
+    line-height: 1.6;
+}
+/* Content containers for cleaner design */
+.element-container {
+    padding: 10px 0;
+}
+</style>
+"""
+
+
+# --- Inicialización del estado de la sesión de Streamlit ---
+def initialize_session_state(variant):
+    """Initializes session state variables for the experiment."""
+    if st.session_state.get("variant", variant.name) != variant.name:
+        # En `servidor.py` una misma sesión puede abrir otra variante: se empieza de cero
+        control_admision.release_admission()
+        reset_session_state()
+    if 'experiment_phase' not in st.session_state:
+        st.session_state.update(new_participant_state(variant))
+
+
+@functools.lru_cache(maxsize=None)
+def _state_template(variant_name):
+    """Estado inicial que no depende del participante; se arma una vez por variante y proceso."""
+    variant = variantes.get(variant_name)
+    return MappingProxyType({
+        'variant': variant.name,
+        'experiment_phase': 'WELCOME',
+        'current_block': 0, # 0-indexed, increments when starting block
+        'current_sequence_number': variant.start_number,
+        'current_step': 0, # Índice del número actual en `variant.expected_sequence`
+        'block_max_step': 0, # Paso más lejano alcanzado en el bloque
+        'errors_in_current_block': 0,
+        'feedback_message': "",
+        'feedback_color': "black",
+        'block_start_time': 0,
+        'blocks_results': [], # To store results of each block
+        'answers': [], # Respuestas con marcas de tiempo del cliente y del servidor
+        'survey_ratings': cuestionarios.default_ratings(variant.survey), # Respuestas del cuestionario final
+        'block_completed_successfully_counter': 0, # Counts successful blocks for money logic
+        'final_summary_data': {}, # To store data for final display
+        'participant': None, # Hash del código reclamado en modo padrón
+        'roster_error': "",
+        'results_saved': False, # Muestra las descargas en la pantalla de resultados
+        'download_cache': {}, # Descarga -> (huella del contenido, bytes) ya generados
+    })
+
+
+def new_participant_state(variant):
+    """Estado completo de un participante nuevo: copia de la plantilla más el grupo sorteado."""
+    group = variant.groups[random.choice(variant.group_names)] # Un solo grupo = grupo fijo
+    state = {key: copy.copy(value) for key, value in _state_template(variant.name).items()} # Listas y dicts propios
+    state.update({
+        'group': group.name,
+        'initial_money': group.initial_money,
+        'current_money': group.initial_money,
+        'results': {"variant": variant.name, "group": group.name}, # Datos para el CSV final
+    })
+    return state
+
+
+def reset_session_state():
+    """Borra todo el estado de la sesión: el próximo rerun vuelve a la bienvenida."""
+    for key in list(st.session_state.keys()):
+        del st.session_state[key]
+
+
+ROSTER_ERRORS = {
+    participantes.UNKNOWN: "El código de participante no es válido.",
+    participantes.ALREADY_USED: "Este código de participante ya fue usado.",
+}
+
+
+def claim_participant(variant):
+    """Modo padrón (callback): reclama el código ingresado y, si es válido, pasa a las instrucciones."""
+    status, digest = participantes.claim(st.session_state.participant_token, instrumentacion.current_session_id(),
+                                         variant.name)
+    if status != participantes.CLAIMED:
+        st.session_state.roster_error = ROSTER_ERRORS[status]
+        return
+    st.session_state.participant = digest
+    st.session_state.results["participant"] = digest
+    st.session_state.roster_error = ""
+    next_phase('INSTRUCTIONS')
+
+
+def log_participant(variant):
+    """Archiva en `registro` el registro final del participante (se escribe en el hilo de `registro`)."""
+    saved = st.session_state.results_saved
+    # Sin guardar, las calificaciones son los valores iniciales de los sliders, no respuestas
+    ratings = st.session_state.survey_ratings if saved else dict.fromkeys(st.session_state.survey_ratings)
+    record = {
+        **st.session_state.results,
+        "final_money": st.session_state.current_money,
+        **ratings,
+        "results_saved": saved,
+        "summary": st.session_state.final_summary_data,
+        "suspicious_flags": deteccion.monitor.flags(instrumentacion.current_session_id()),
+    }
+    registro.log_session(variant.name, st.session_state.group, record)
+
+
+def start_next_participant(variant):
+    """
+    Modo kiosco (callback del botón): archiva al participante que no guardó sus
+    resultados (los guardados ya se archivaron en `save_results`) y deja la sesión en la
+    bienvenida con un estado nuevo. Corre antes del rerun del clic, así que ese mismo
+    rerun ya muestra la bienvenida y ningún rerun ve el estado a medio cambiar.
+    """
+    if not st.session_state.results_saved:
+        log_participant(variant)
+    deteccion.monitor.forget(instrumentacion.current_session_id()) # Las latencias del siguiente participante no se mezclan
+
+    fresh = new_participant_state(variant)
+    for key in [key for key in st.session_state.keys() if key not in fresh]:
+        del st.session_state[key] # Widgets y claves auxiliares del participante anterior
+    st.session_state.update(fresh)
+
+
+# --- Navigation and experiment logic functions ---
+
+@memoria.track_transition
+def next_phase(phase):
+    """Changes the experiment phase and forces a Streamlit rerender."""
+    st.session_state.experiment_phase = phase
+    instrumentacion.rerun()
+
+
+def start_experiment_task(variant):
+    """Resets variables for the main task and starts the first block."""
+    st.session_state.current_money = st.session_state.initial_money
+    st.session_state.blocks_results = []
+    st.session_state.answers = [] # Respuestas con marcas de tiempo del cliente y del servidor
+    st.session_state.block_completed_successfully_counter = 0
+    st.session_state.current_block = 0 # Reset to ensure start_new_block increments to 1
+    st.session_state.final_summary_data = {} # Clear summary data for a new run
+    start_new_block(variant)
+
+
+@memoria.track_transition
+def start_new_block(variant):
+    """Starts a new task block or ends the experiment if all blocks are completed."""
+    if st.session_state.current_block < variant.max_blocks:
+        st.session_state.current_block += 1
+        st.session_state.current_sequence_number = variant.start_number
+        st.session_state.current_step = 0
+        st.session_state.block_max_step = 0
+        st.session_state.errors_in_current_block = 0
+        st.session_state.feedback_message = ""
+        st.session_state.feedback_color = "black"
+        temporizacion.start_block_clock() # Reloj monotónico del bloque (perf_counter_ns)
+        next_phase('EXPERIMENT')
+    else:
+        calculate_and_store_final_summary(variant) # Calcular antes de mostrar resultados
+        next_phase('RESULTS')
+
+
+@memoria.track_transition
+def handle_block_end(variant, success):
+    """
+    Manages the end of a block (success or failure), updates money,
+    and prepares the next block (or pause).
+    """
+    group = variant.groups[st.session_state.group]
+    # Tiempo según el reloj del cliente, con el reloj monotónico del servidor como respaldo
+    block_duration_taken, block_timing = temporizacion.close_block_clock()
+
+    # Check if the block was completed within the time limit
+    block_was_timed_out = block_duration_taken > variant.block_duration_s
+    completed = success and not block_was_timed_out
+
+    st.session_state.blocks_results.append({
+        "block": st.session_state.current_block,
+        "success": completed,
+        "errors": st.session_state.errors_in_current_block,
+        "max_step": st.session_state.block_max_step, # Hasta dónde llegó en la secuencia (variant.final_step = éxito)
+        "time_taken_s": round(block_duration_taken, 2),
+        **block_timing, # Reloj usado, desfase de relojes y sobrecarga del servidor en el bloque
+        "suspicious_flags": deteccion.monitor.flags(instrumentacion.current_session_id()),
+    })
+    registro.log_block(variant.name, st.session_state.group, st.session_state.blocks_results[-1],
+                       st.session_state.answers[st.session_state.block_first_answer_index:],
+                       participant=st.session_state.participant)
+    agregados.aggregates.observe_block(variant.name, st.session_state.group, st.session_state.current_block,
+                                       completed, st.session_state.errors_in_current_block)
+
+    if completed:
+        st.session_state.block_completed_successfully_counter += 1
+    money_change = group.rewards.money_change(
+        st.session_state.current_block, st.session_state.block_completed_successfully_counter, completed)
+    st.session_state.current_money += money_change
+
+    if money_change > 0:
+        message_summary = f"¡Ganaste ${money_change:,.0f}!"
+    elif money_change < 0:
+        message_summary = f"¡Perdiste ${abs(money_change):,.0f}!"
+    else:
+        message_summary = "¡Bloque completado a tiempo!" if completed else "Bloque no completado a tiempo."
+    outcome = "completado con éxito" if completed else "no completado"
+    st.session_state.feedback_message = f"Bloque {st.session_state.current_block} {outcome}. {message_summary}"
+    st.session_state.feedback_color = "green" if completed else "red"
+
+    # Check if more blocks remain to introduce pause
+    if st.session_state.current_block < variant.max_blocks:
+        st.session_state.pause_message = f"Fin del Bloque {st.session_state.current_block}. Tómate un breve descanso."
+        st.session_state.pause_end_time = time.perf_counter() + variant.pause_duration_s
+        next_phase('PAUSE_BETWEEN_BLOCKS')
+    else:
+        # If no more blocks, proceed directly to results
+        calculate_and_store_final_summary(variant) # Calcular antes de mostrar resultados
+        next_phase('RESULTS')
+
+
+@memoria.track_transition
+def save_results(variant):
+    """
+    Completa los resultados finales y, la primera vez, archiva al participante en
+    `registro`; las descargas se ofrecen en la pantalla de resultados.
+    """
+    # Ensure final summary data is calculated before saving
+    if not st.session_state.final_summary_data: # Calculate only if not already calculated
+        calculate_and_store_final_summary(variant)
+
+    # Update results dictionary with final summary data for CSV export
+    st.session_state.results["final_money"] = st.session_state.current_money
+    st.session_state.results.update(st.session_state.survey_ratings)
+    st.session_state.results["total_errors"] = st.session_state.final_summary_data.get("total_errors", "N/A")
+    st.session_state.results["learning_coefficient"] = st.session_state.final_summary_data.get("learning_coefficient", "N/A")
+    st.session_state.results["money_outcome_description"] = st.session_state.final_summary_data.get("money_outcome_description", "N/A")
+    st.session_state.results["timestamp"] = pd.Timestamp.now()
+    first_save = not st.session_state.results_saved # Reenviar el cuestionario no vuelve a archivar
+    st.session_state.results_saved = True
+    if first_save:
+        log_participant(variant)
+
+
+def _lazy_csv(name, rows):
+    """
+    Contenido diferido de `st.download_button`: el CSV se genera recién al hacer clic
+    (en otro hilo, sin contexto de Streamlit) y se guarda en la caché de descargas de la
+    sesión junto con la huella de `rows`; un nuevo clic con las mismas filas lo reutiliza.
+    """
+    cache = st.session_state.download_cache # El dict mismo: el callable no puede leer st.session_state
+
+    def payload():
+        digest = exportacion.content_hash(rows)
+        cached = cache.get(name)
+        if cached is None or cached[0] != digest:
+            cached = cache[name] = (digest, exportacion.csv_payload(rows, compress=DOWNLOAD_GZIP))
+        return cached[1]
+    return payload
+
+
+def render_downloads(variant):
+    st.success("¡Resultados guardados! Gracias por participar.")
+
+    results = st.session_state.results
+    file_name = f"{variant.results_file_name.format(group=results['group'])}_{results['timestamp'].strftime('%Y%m%d_%H%M%S')}"
+    if st.session_state.participant is not None:
+        file_name += f"_{st.session_state.participant[:12]}" # Prefijo del hash del código del participante
+    extension, mime = ("csv.gz", "application/gzip") if DOWNLOAD_GZIP else ("csv", "text/csv")
+    st.download_button(
+        label="Descargar Resultados (CSV)",
+        data=_lazy_csv("results", [results]),
+        file_name=f"{file_name}.{extension}",
+        mime=mime,
+        on_click="ignore", # Descargar no necesita un rerun
+        help="Descarga un archivo CSV con todos los datos de esta sesión del experimento."
+    )
+    st.download_button(
+        label="Descargar Respuestas (CSV)",
+        data=_lazy_csv("answers", st.session_state.answers),
+        file_name=f"{file_name}_respuestas.{extension}",
+        mime=mime,
+        on_click="ignore",
+        help="Descarga un archivo CSV con cada respuesta de esta sesión y sus marcas de tiempo."
+    )
+
+
+def submit_survey(variant):
+    """Guarda las respuestas del formulario del cuestionario y los resultados (un solo rerun)."""
+    st.session_state.survey_ratings = {question.key: st.session_state[f"survey_{question.key}"]
+                                       for question in variant.survey}
+    save_results(variant)
+
+
+def calculate_and_store_final_summary(variant):
+    """Calculates summary data for final display and stores it in session state."""
+    st.session_state.final_summary_data = puntuacion.score(
+        variant, st.session_state.group, st.session_state.blocks_results, st.session_state.current_money)
+    agregados.aggregates.observe_final_money(variant.name, st.session_state.group, st.session_state.current_money)
+
+
+# --- Render UI based on experiment phase ---
+
+def render_welcome(variant):
+    control_admision.wait_for_admission() # Sala de espera si el servidor está saturado
+    st.markdown("<h1 style='color:#333333; font-size:3.5em; font-weight:800;'>Bienvenido/a al Experimento de Motivación Cognitiva</h1>", unsafe_allow_html=True)
+    st.markdown(f"<p style='color:#666666; font-size:1.2em;'>{variant.welcome_subtitle}</p>", unsafe_allow_html=True)
+    if participantes.ROSTER_MODE and st.session_state.participant is None:
+        # Modo padrón: solo se empieza con un código de participante sin usar
+        with st.form("participant_form"):
+            st.text_input("Código de participante", key="participant_token")
+            st.form_submit_button("Comenzar Experimento", on_click=claim_participant, args=(variant,),
+                                  help="Ingresa el código que te entregó el experimentador.",
+                                  use_container_width=True)
+        if st.session_state.roster_error:
+            st.error(st.session_state.roster_error)
+        return
+    st.button("Comenzar Experimento", on_click=next_phase, args=('INSTRUCTIONS',),
+              help="Haz clic para leer las instrucciones.",
+              use_container_width=True)
+
+
+def render_instructions(variant):
+    st.markdown("<h2 style='color:#333333; font-size:2.5em; font-weight:bold;'>Instrucciones del Experimento</h2>", unsafe_allow_html=True)
+    st.markdown(variant.instructions_html[st.session_state.group], unsafe_allow_html=True) # Precalculado al compilar la variante
+
+    st.markdown("<p style='color:#333333; font-size:1.1em; line-height:1.6; margin-top:20px;'>Presiona <span style='font-weight:bold;'>'Entendido, Iniciar Experimento'</span> cuando estés listo/a.</p>", unsafe_allow_html=True)
+    st.button("Entendido, Iniciar Experimento", on_click=start_experiment_task, args=(variant,),
+              help="Haz clic para comenzar la tarea aritmética.",
+              use_container_width=True)
+
+
+def render_experiment(variant):
+    st.markdown(f"<p style='color:#666666; font-size:1.1em; font-weight:semibold;'>Dinero Actual: <span style='color:#28a745; font-size:1.5em; font-weight:bold;'>${st.session_state.current_money:,.0f}</span></p>", unsafe_allow_html=True)
+    st.markdown(f"<p style='color:#555555; font-size:1.1em;'>Bloque: <span style='font-weight:bold;'>{st.session_state.current_block} / {variant.max_blocks}</span></p>", unsafe_allow_html=True)
+
+    # Calculate elapsed and estimated remaining time
+    time_elapsed = round(temporizacion.block_elapsed_s(), 1)
+    time_remaining_estimated = max(0, variant.block_duration_s - time_elapsed) # Ensure non-negative time
+
+    st.markdown(f"<p style='color:#dc3545; font-size:1.2em; font-weight:bold;'>Tiempo restante estimado: {time_remaining_estimated:.0f}s</p>", unsafe_allow_html=True)
+
+    st.markdown(f"<h3 style='color:#0056b3; font-size:3em; font-weight:bold; margin-top:30px;'>Número actual: {st.session_state.current_sequence_number}</h3>", unsafe_allow_html=True)
+
+    # La respuesta esperada se lee de la secuencia precalculada por su posición
+    step = st.session_state.current_step + 1
+    correct_next_value = variant.expected_sequence[step]
+
+    # Entrada con marcas de tiempo del cliente (performance.now()) para medir tiempos de reacción
+    answer_event = entrada_respuesta.answer_input(
+        "Ingresa tu respuesta:",
+        placeholder=f"El siguiente número es {correct_next_value}", # Suggest correct value
+        prompt_id=f"{st.session_state.current_block}-{len(st.session_state.answers)}",
+        submit_length=len(str(correct_next_value)) if variant.auto_submit else None,
+        key=f"answer_input_{st.session_state.current_block}_form_input")
+
+    if answer_event is not None:
+        # First, check if block time has expired BEFORE processing the answer.
+        if temporizacion.answer_elapsed_s(answer_event) > variant.block_duration_s:
+            temporizacion.record_answer(answer_event, step, correct_next_value, "late")
+            metricas.observe_block_expiry_lag(temporizacion.block_elapsed_s() - variant.block_duration_s) # Retraso en detectar el fin del bloque
+            st.session_state.feedback_message = f"¡El tiempo para el Bloque {st.session_state.current_block} se agotó antes de tu respuesta!"
+            st.session_state.feedback_color = "orange"
+            handle_block_end(variant, False) # Mark block as failed due to timeout
+            instrumentacion.stop() # Stop execution to avoid processing the response
+
+        # If time has not expired, process the answer
+        try:
+            user_answer_int = int(answer_event["value"])
+        except ValueError:
+            temporizacion.record_answer(answer_event, step, correct_next_value, "invalid")
+            st.session_state.feedback_message = "Por favor, ingresa un número válido."
+            st.session_state.feedback_color = "orange"
+            instrumentacion.rerun()
+
+        if user_answer_int == correct_next_value:
+            temporizacion.record_answer(answer_event, step, correct_next_value, "correct")
+            st.session_state.current_sequence_number = user_answer_int
+            st.session_state.current_step = step
+            st.session_state.block_max_step = max(st.session_state.block_max_step, step)
+            st.session_state.feedback_message = "¡Correcto!"
+            st.session_state.feedback_color = "green"
+
+            if step == variant.final_step:
+                handle_block_end(variant, True) # Block completed successfully
+            else:
+                instrumentacion.rerun() # To update UI with new number and feedback
+        else:
+            temporizacion.record_answer(answer_event, step, correct_next_value, "wrong")
+            st.session_state.errors_in_current_block += 1
+            st.session_state.feedback_message = f"Incorrecto. Reiniciando secuencia desde {variant.start_number}."
+            st.session_state.feedback_color = "red"
+            st.session_state.current_sequence_number = variant.start_number # Reset sequence
+            st.session_state.current_step = 0 # El paso en que falló queda en la respuesta registrada
+            instrumentacion.rerun()
+
+    # Feedback messages and error counter
+    st.markdown(f"<p style='color:{st.session_state.feedback_color}; font-weight:bold;'>{st.session_state.feedback_message}</p>", unsafe_allow_html=True)
+    st.markdown(f"<p style='color:#6c757d;'>Errores en este bloque: {st.session_state.errors_in_current_block}</p>", unsafe_allow_html=True)
+
+
+def render_pause(variant):
+    st.markdown(f"<h2 style='color:#333333; font-size:2.5em; font-weight:bold;'>{st.session_state.pause_message}</h2>", unsafe_allow_html=True)
+
+    # Calcular y mostrar el tiempo restante de la pausa
+    time_until_next_block = max(0, int(st.session_state.pause_end_time - time.perf_counter()))
+    st.info(f"El próximo bloque comenzará en {time_until_next_block} segundos.")
+
+    # El script espera un segundo y se vuelve a ejecutar para actualizar la cuenta
+    # regresiva hasta que la pausa termina.
+    if time_until_next_block > 0:
+        instrumentacion.end_rerun() # La espera de la pausa no cuenta como latencia del rerun
+        time.sleep(1)
+        instrumentacion.rerun()
+    else:
+        start_new_block(variant) # Inicia el siguiente bloque cuando la pausa termina
+
+
+def render_results(variant):
+    control_admision.release_admission() # El experimento terminó: libera el cupo para el siguiente participante
+
+    # Calculate summary data only when entering the RESULTS phase for the first time
+    if not st.session_state.final_summary_data:
+        calculate_and_store_final_summary(variant)
+    summary = st.session_state.final_summary_data
+    group_color = variant.groups[st.session_state.group].color
+
+    st.markdown("<h2 style='color:#333333; font-size:2.5em; font-weight:bold;'>Experimento Finalizado</h2>", unsafe_allow_html=True)
+    st.markdown(f"<p style='color:#666666; font-size:1.2em;'>Tu dinero final es: <span style='color:{group_color}; font-size:1.8em; font-weight:bold;'>${st.session_state.current_money:,.0f}</span></p>", unsafe_allow_html=True)
+
+    st.markdown("<h3 style='color:#333333; font-size:1.8em; font-weight:bold; margin-top:30px;'>Resumen de tu Desempeño:</h3>", unsafe_allow_html=True)
+
+    st.markdown(f"<p style='font-size:1.1em;'><strong>Errores Totales:</strong> <span style='font-weight:bold; color:#dc3545;'>{summary['total_errors']}</span></p>", unsafe_allow_html=True)
+    st.markdown(f"<p style='font-size:1.1em;'><strong>{variant.money_summary_label}:</strong> <span style='font-weight:bold; color:{group_color};'>{summary['money_outcome_description']}</span></p>", unsafe_allow_html=True)
+    if "learning_coefficient" in summary:
+        st.markdown(f"<p style='font-size:1.1em;'><strong>Coeficiente de Aprendizaje (basado en errores):</strong> <span style='font-weight:bold; color:#0056b3;'>{summary['learning_coefficient']}</span></p>", unsafe_allow_html=True)
+
+    for question in variant.survey:
+        st.markdown(f"<p style='font-size:1.1em;'><strong>{question.summary_label}:</strong> <span style='font-weight:bold;'>{st.session_state.survey_ratings[question.key]} / {question.max_value}</span></p>", unsafe_allow_html=True)
+
+    if variant.block_detail:
+        # Datos específicos por bloque
+        st.markdown("<br>", unsafe_allow_html=True)
+        st.markdown("<h4 style='color:#333333; font-size:1.4em; font-weight:bold;'>Detalle por Bloque:</h4>", unsafe_allow_html=True)
+        for block in variant.block_detail:
+            st.markdown(f"<p style='font-size:1.0em;'><strong>Errores Bloque {block}:</strong> {summary[f'errors_block{block}']} (<span style='font-size:0.9em;'>Tiempo: {summary[f'time_block{block}_s']}</span>)</p>", unsafe_allow_html=True)
+
+    st.markdown("<br>", unsafe_allow_html=True)
+
+    if variant.survey:
+        # Cuestionario en un formulario: los sliders no provocan reruns hasta enviarlo
+        with st.form("survey_form"):
+            for question in variant.survey:
+                st.slider(question.label, question.min_value, question.max_value,
+                          st.session_state.survey_ratings[question.key], step=question.step,
+                          key=f"survey_{question.key}")
+
+            st.markdown("<br>", unsafe_allow_html=True)
+
+            st.form_submit_button("Guardar Resultados y Salir", on_click=submit_survey, args=(variant,),
+                                  help="Haz clic para guardar tus datos y finalizar.",
+                                  use_container_width=True)
+
+        if st.session_state.results_saved:
+            render_downloads(variant)
+
+    if KIOSK_MODE:
+        st.button("Siguiente Participante", on_click=start_next_participant, args=(variant,),
+                  help="Guarda el registro de esta sesión y vuelve a la bienvenida para el siguiente participante.")
+    # Botón para volver al inicio
+    elif variant.restart_button and st.button("Volver al Inicio", help="Haz clic para reiniciar el experimento."):
+        reset_session_state() # Reinicia todas las variables de sesión
+        instrumentacion.rerun()
+
+
+PHASE_RENDERERS = {
+    'WELCOME': render_welcome,
+    'INSTRUCTIONS': render_instructions,
+    'EXPERIMENT': render_experiment,
+    'PAUSE_BETWEEN_BLOCKS': render_pause,
+    'RESULTS': render_results,
+}
+
+
+def run(variant_name):
+    """Ejecuta un rerun completo del experimento para la variante `variant_name`."""
+    variant = variantes.get(variant_name)
+    metricas.start_exporters() # Una sola vez por proceso
+    registro.start_writer()
+
+    # --- Configuración de la página de Streamlit ---
+    st.set_page_config(layout="centered", page_title=variant.page_title,
+                       initial_sidebar_state="collapsed") # Colapsa el sidebar por defecto
+
+    # Call initialization at the start of the script
+    initialize_session_state(variant)
+
+    # --- Medición del rerun (latencia para el control de admisión) ---
+    instrumentacion.begin_rerun()
+
+    st.markdown(GLOBAL_STYLES, unsafe_allow_html=True)
+    PHASE_RENDERERS[st.session_state.experiment_phase](variant)
+
+    # Cierra la medición del rerun (los caminos con rerun()/stop() ya la cerraron)
+    instrumentacion.end_rerun()
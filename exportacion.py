@@ -0,0 +1,233 @@
+"""
+Exportación del registro de respuestas, bloques y sesiones.
+
+Las funciones de este módulo son trabajos de `trabajos`: se ejecutan en el pool de
+procesos, no en los hilos que atienden a los participantes, y reciben las rutas como
+argumentos (el módulo no importa `registro` ni tiene efectos al importarse).
+
+`export_records` recorre el registro JSONL línea a línea con un generador de bloques de
+`CHUNK_ROWS` filas filtradas (`ExportFilter`: variantes, grupos y rango de fechas) y
+escribe cada bloque en CSV, JSONL o Parquet apenas se completa, en una sola pasada: la
+escritura empieza con el primer bloque y la memoria no depende del tamaño del registro.
+CSV y Parquet necesitan las columnas de antemano: son las del primer bloque, y lo que no
+entra en ellas (claves que aparecen después o, en Parquet, valores de otro tipo que el
+de su columna) se guarda como texto JSON en la columna `EXTRAS_COLUMN`.
+
+`csv_payload` genera además los archivos que descarga cada participante: escribe las
+filas una a una en un único búfer (comprimido con gzip si se pide), sin armar antes un
+DataFrame ni el texto completo del CSV, y `content_hash` permite reutilizarlo mientras
+las filas no cambien.
+"""
+import csv
+import datetime
+import gzip
+import hashlib
+import io
+import itertools
+import json
+import os
+import time
+from dataclasses import dataclass
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError: # Sin pyarrow no se ofrece Parquet
+    pa = pq = None
+
+# --- Parámetros de la exportación (constantes) ---
+CHUNK_ROWS = 10_000
+FORMATS = ("csv", "jsonl", "parquet") if pa is not None else ("csv", "jsonl")
+EXTRAS_COLUMN = "extras" # Claves (y valores) que no entran en las columnas del primer bloque
+
+
+def export_path(export_dir, source, extension):
+    """Ruta nueva en `export_dir` para exportar `source` (con la fecha y hora en el nombre)."""
+    base_name = os.path.splitext(os.path.basename(source))[0]
+    return os.path.join(export_dir, f"{base_name}_{time.strftime('%Y%m%d_%H%M%S')}.{extension}")
+
+
+@dataclass(frozen=True)
+class ExportFilter:
+    """Filas a exportar; un criterio vacío no filtra. Las fechas son días locales inclusivos."""
+    variants: tuple = ()
+    groups: tuple = ()
+    start_date: datetime.date = None
+    end_date: datetime.date = None
+
+    def __post_init__(self):
+        # Rango de `logged_at` (segundos desde la época) equivalente a las fechas
+        start = time.mktime(self.start_date.timetuple()) if self.start_date else None
+        end = time.mktime((self.end_date + datetime.timedelta(days=1)).timetuple()) if self.end_date else None
+        object.__setattr__(self, "_range", (start, end))
+
+    def matches(self, row):
+        if self.variants and row.get("variant") not in self.variants:
+            return False
+        if self.groups and row.get("group") not in self.groups:
+            return False
+        start, end = self._range
+        if start is None and end is None:
+            return True
+        logged_at = row.get("logged_at")
+        return logged_at is not None and (start is None or logged_at >= start) and (end is None or logged_at < end)
+
+
+def _filtered_lines(source, export_filter):
+    """(línea, fila) del registro que pasan el filtro, sin cargar el archivo."""
+    with open(source, encoding="utf-8") as log_file:
+        for line in log_file:
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            if export_filter.matches(row):
+                yield line, row
+
+
+def iter_chunks(source, export_filter=ExportFilter(), chunk_rows=CHUNK_ROWS):
+    """Generador de listas de hasta `chunk_rows` (línea, fila) filtradas de `source`."""
+    chunk = []
+    for item in _filtered_lines(source, export_filter):
+        chunk.append(item)
+        if len(chunk) == chunk_rows:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def column_types(rows):
+    """Columnas de `rows` (dicts), en orden de aparición, con los tipos vistos en cada una."""
+    columns = {}
+    for row in rows:
+        for key, value in row.items():
+            columns.setdefault(key, set()).add(type(value))
+    return columns
+
+
+def _cell(value):
+    """Listas y dicts se exportan como texto JSON."""
+    return json.dumps(value, ensure_ascii=False) if isinstance(value, (list, dict)) else value
+
+
+def _arrow_type(types):
+    types = types - {type(None)}
+    if types == {bool}:
+        return pa.bool_()
+    if types == {int}:
+        return pa.int64()
+    if types and types <= {int, float}:
+        return pa.float64()
+    return pa.string() # Texto, mezclas y columnas siempre nulas
+
+
+def _arrow_value(value, arrow_type):
+    value = _cell(value)
+    if value is not None and arrow_type == pa.string() and not isinstance(value, str):
+        return str(value)
+    return value
+
+
+def _fits(value, arrow_type):
+    """Si `value` se puede guardar en una columna Arrow `arrow_type` (None: columna CSV, sin tipo)."""
+    if value is None or arrow_type is None or arrow_type == pa.string():
+        return True
+    if isinstance(value, bool):
+        return arrow_type == pa.bool_()
+    if isinstance(value, int):
+        return arrow_type in (pa.int64(), pa.float64())
+    return isinstance(value, float) and arrow_type == pa.float64()
+
+
+def _with_extras(row, column_types):
+    """La fila con solo las claves de `column_types` que entran en su tipo, más `EXTRAS_COLUMN`."""
+    known, extras = {}, {}
+    for key, value in row.items():
+        if key in column_types and _fits(value, column_types[key]):
+            known[key] = value
+        else:
+            extras[key] = value
+    known[EXTRAS_COLUMN] = json.dumps(extras, ensure_ascii=False, default=str) if extras else None
+    return known
+
+
+def arrow_schema(columns):
+    """Esquema Arrow para las columnas de `column_types` (las que no son numéricas ni booleanas, como texto)."""
+    return pa.schema([(key, _arrow_type(types)) for key, types in columns.items()])
+
+
+def arrow_table(rows, schema):
+    """Tabla Arrow de `rows` (dicts) con `schema`; las claves que le faltan a una fila quedan nulas."""
+    return pa.Table.from_pydict({
+        field.name: [_arrow_value(row.get(field.name), field.type) for row in rows] for field in schema
+    }, schema=schema)
+
+
+def export_records(source, destination, file_format, export_filter=ExportFilter()):
+    """Exporta las filas filtradas del registro JSONL `source` a `destination`; devuelve (ruta, filas)."""
+    if not os.path.exists(source):
+        raise FileNotFoundError(f"No existe el registro {source}")
+    if file_format not in FORMATS:
+        raise ValueError(f"Formato desconocido {file_format!r}; válidos: {FORMATS}")
+    os.makedirs(os.path.dirname(destination) or ".", exist_ok=True)
+    temporary = f"{destination}.tmp"
+    rows = 0
+    chunks = iter_chunks(source, export_filter, CHUNK_ROWS)
+    first_chunk = next(chunks, [])
+    chunks = itertools.chain([first_chunk], chunks) # El primer bloque también se escribe
+    columns = column_types(row for _, row in first_chunk)
+    if file_format == "jsonl":
+        with open(temporary, "w", encoding="utf-8") as output:
+            for chunk in chunks:
+                output.writelines(line if line.endswith("\n") else line + "\n" for line, _ in chunk) # Las líneas tal cual
+                rows += len(chunk)
+    elif file_format == "csv":
+        types = dict.fromkeys(columns) # CSV: cualquier valor entra en su columna
+        with open(temporary, "w", encoding="utf-8", newline="") as output:
+            writer = csv.DictWriter(output, fieldnames=[*columns, EXTRAS_COLUMN], lineterminator="\n")
+            writer.writeheader()
+            for chunk in chunks:
+                writer.writerows({key: _cell(value) for key, value in _with_extras(row, types).items()}
+                                 for _, row in chunk)
+                rows += len(chunk)
+    else:
+        schema = arrow_schema(columns)
+        types = {field.name: field.type for field in schema}
+        schema = schema.append(pa.field(EXTRAS_COLUMN, pa.string()))
+        with pq.ParquetWriter(temporary, schema) as writer: # Un grupo de filas por bloque
+            for chunk in chunks:
+                writer.write_table(arrow_table([_with_extras(row, types) for _, row in chunk], schema))
+                rows += len(chunk)
+    os.replace(temporary, destination) # Nunca queda una exportación a medias con el nombre final
+    return destination, rows
+
+
+def _columns(rows):
+    """Columnas de todas las filas, en el orden en que aparecen por primera vez."""
+    columns = {}
+    for row in rows:
+        columns.update(dict.fromkeys(row))
+    return list(columns)
+
+
+def content_hash(rows):
+    """Huella del contenido de `rows` (dicts), calculada fila a fila."""
+    digest = hashlib.sha256()
+    for row in rows:
+        digest.update(repr(sorted(row.items())).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def csv_payload(rows, compress=False):
+    """Bytes del CSV de `rows` (dicts), escrito fila a fila; con `compress`, en gzip."""
+    buffer = io.BytesIO()
+    binary = gzip.GzipFile(fileobj=buffer, mode="wb", mtime=0) if compress else buffer
+    text = io.TextIOWrapper(binary, encoding="utf-8", newline="")
+    writer = csv.DictWriter(text, fieldnames=_columns(rows), lineterminator="\n")
+    writer.writeheader()
+    writer.writerows(rows)
+    text.flush()
+    text.detach() # Sin cerrar el búfer
+    if compress:
+        binary.close() # Escribe el final del gzip en `buffer`
+    return buffer.getvalue()
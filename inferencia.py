@@ -0,0 +1,121 @@
+"""
+Inferencia del efecto Ganancia vs Pérdida por remuestreo.
+
+Compara entre los dos grupos la media por sesión de una métrica de `puntuacion`
+(errores totales, tasa de éxito o coeficiente de aprendizaje) con dos pruebas:
+
+- Bootstrap: remuestrea con reposición cada grupo y da el intervalo de confianza
+  percentil de la diferencia de medias (Ganancia - Pérdida).
+- Permutación: reparte al azar las sesiones de ambos grupos y da el valor p
+  bilateral de la diferencia observada.
+
+Cada réplica es una fila de una matriz de índices (o de una permutación) y sus medias
+salen de una sola operación de NumPy sobre el lote, sin un bucle de Python por réplica;
+los lotes tienen como mucho `BATCH_CELLS` celdas para acotar la memoria. `resample`
+calcula un tramo de réplicas con su propia semilla: cada prueba se reparte en
+`PARTS_PER_TEST` trabajos de `trabajos` (`split_seeds`, `split_replicates`), así que usa
+varios procesos y, con la misma semilla, da lo mismo sin importar cuántos haya.
+
+El módulo no tiene efectos al importarse (no importa `registro` ni `metricas`): sus
+funciones se ejecutan en los procesos de `trabajos`.
+"""
+import os
+
+import numpy as np
+
+# --- Parámetros de la inferencia (constantes) ---
+MIN_REPLICATES = 1_000
+MAX_REPLICATES = 1_000_000
+# Réplicas por defecto del panel, dentro de los límites que acepta su campo
+REPLICATES = min(max(int(os.environ.get("EXPERIMENTO_REPLICATES", "10000")), MIN_REPLICATES), MAX_REPLICATES)
+CONFIDENCE = 0.95
+BATCH_CELLS = 2_000_000 # Celdas (réplicas x sesiones) por lote de remuestreo
+PARTS_PER_TEST = 4 # Trabajos en que se reparten las réplicas de cada prueba
+GAIN_GROUP = "Ganancia"
+LOSS_GROUP = "Pérdida"
+METRICS = {
+    "total_errors": "Errores totales",
+    "success_rate": "Tasa de éxito",
+    "learning_coefficient_value": "Coeficiente de aprendizaje",
+}
+TESTS = ("bootstrap", "permutacion")
+
+
+def group_samples(rows, metric):
+    """Valores de `metric` de las sesiones (dicts de `puntuacion.load_scores`) de cada grupo."""
+    samples = {GAIN_GROUP: [], LOSS_GROUP: []}
+    for row in rows:
+        value = row.get(metric)
+        if row.get("group") in samples and isinstance(value, (int, float)) and not isinstance(value, bool):
+            samples[row["group"]].append(value)
+    return np.asarray(samples[GAIN_GROUP], dtype=float), np.asarray(samples[LOSS_GROUP], dtype=float)
+
+
+def split_seeds(seed, parts):
+    """`parts` semillas independientes derivadas de `seed` (una por trabajo)."""
+    return np.random.SeedSequence(seed).spawn(parts)
+
+
+def split_replicates(replicates, parts):
+    """Réplicas de cada trabajo (suman `replicates`)."""
+    return [replicates // parts + (index < replicates % parts) for index in range(parts)]
+
+
+def _batch_sizes(replicates, sessions):
+    batch = max(1, BATCH_CELLS // max(1, sessions))
+    for start in range(0, replicates, batch):
+        yield min(batch, replicates - start)
+
+
+def bootstrap_differences(gain, loss, replicates, rng):
+    """Diferencias de medias (Ganancia - Pérdida) de `replicates` remuestreos con reposición."""
+    differences = np.empty(replicates)
+    start = 0
+    for size in _batch_sizes(replicates, gain.size + loss.size):
+        gain_means = gain[rng.integers(0, gain.size, size=(size, gain.size))].mean(axis=1)
+        loss_means = loss[rng.integers(0, loss.size, size=(size, loss.size))].mean(axis=1)
+        differences[start:start + size] = gain_means - loss_means
+        start += size
+    return differences
+
+
+def permutation_differences(gain, loss, replicates, rng):
+    """Diferencias de medias de `replicates` reasignaciones al azar de las sesiones a los grupos."""
+    pooled = np.concatenate([gain, loss])
+    differences = np.empty(replicates)
+    start = 0
+    for size in _batch_sizes(replicates, pooled.size):
+        shuffled = rng.permuted(np.broadcast_to(pooled, (size, pooled.size)), axis=1) # Una permutación por fila
+        differences[start:start + size] = shuffled[:, :gain.size].mean(axis=1) - shuffled[:, gain.size:].mean(axis=1)
+        start += size
+    return differences
+
+
+def resample(test, gain, loss, replicates, seed):
+    """Un tramo de réplicas de `test` ("bootstrap" o "permutacion"); trabajo de `trabajos`."""
+    rng = np.random.default_rng(seed)
+    if test == "bootstrap":
+        return bootstrap_differences(gain, loss, replicates, rng)
+    if test == "permutacion":
+        return permutation_differences(gain, loss, replicates, rng)
+    raise ValueError(f"Prueba desconocida {test!r}; válidas: {TESTS}")
+
+
+def summarize(metric, gain, loss, bootstrap, permutation, confidence=CONFIDENCE):
+    """Fila (dict) con las medias, la diferencia, su intervalo bootstrap y el valor p de permutación."""
+    difference = float(gain.mean() - loss.mean())
+    tail = (1 - confidence) / 2 * 100
+    ci_low, ci_high = np.percentile(bootstrap, [tail, 100 - tail])
+    extreme = np.count_nonzero(np.abs(permutation) >= abs(difference) - 1e-12) # Tolerancia al redondeo de las medias
+    return {
+        "metric": metric,
+        "sessions_gain": gain.size,
+        "sessions_loss": loss.size,
+        "mean_gain": float(gain.mean()),
+        "mean_loss": float(loss.mean()),
+        "difference": difference,
+        "ci_low": float(ci_low),
+        "ci_high": float(ci_high),
+        "p_value": (extreme + 1) / (permutation.size + 1),
+        "replicates": bootstrap.size,
+    }
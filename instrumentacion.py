@@ -0,0 +1,111 @@
+"""
+Medición del ciclo de vida de cada rerun de Streamlit.
+
+Los scripts del experimento llaman a `begin_rerun()` al comienzo de cada ejecución
+y usan `rerun()` / `stop()` / `end_rerun()` en lugar de `st.rerun()` y `st.stop()`
+directos. Así cada ejecución del script queda medida (tiempo de pared y CPU del
+hilo) y se notifica a los observadores registrados con `add_rerun_listener`. Los
+registrados con `add_rerun_start_listener` se invocan al comenzar cada rerun.
+"""
+import logging
+import threading
+import time
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+logger = logging.getLogger(__name__)
+
+_RERUN_STATE_KEY = "_rerun_started"
+
+# Observadores a nivel de proceso: se comparten entre todas las sesiones
+_listeners = []
+_start_listeners = []
+_listeners_lock = threading.Lock()
+
+
+def add_rerun_listener(listener):
+    """Registra `listener(phase, wall_s, cpu_s)`, que se invoca al terminar cada rerun."""
+    with _listeners_lock:
+        if listener not in _listeners:
+            _listeners.append(listener)
+
+
+def remove_rerun_listener(listener):
+    """Elimina un observador registrado previamente (no falla si no existe)."""
+    with _listeners_lock:
+        if listener in _listeners:
+            _listeners.remove(listener)
+
+
+def add_rerun_start_listener(listener):
+    """Registra `listener(phase)`, que se invoca al comenzar cada rerun."""
+    with _listeners_lock:
+        if listener not in _start_listeners:
+            _start_listeners.append(listener)
+
+
+def remove_rerun_start_listener(listener):
+    """Elimina un observador de inicio registrado previamente (no falla si no existe)."""
+    with _listeners_lock:
+        if listener in _start_listeners:
+            _start_listeners.remove(listener)
+
+
+def _notify(listeners, *args):
+    for listener in listeners:
+        try:
+            listener(*args)
+        except Exception: # Un observador defectuoso nunca debe romper la sesión del participante
+            logger.exception("Error en un observador de reruns")
+
+
+def current_session_id():
+    """Devuelve el id de la sesión de Streamlit actual (estable entre reruns)."""
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx is not None else "bare"
+
+
+def begin_rerun():
+    """Marca el inicio de la ejecución del script para la sesión actual."""
+    phase = st.session_state.get("experiment_phase")
+    with _listeners_lock:
+        start_listeners = list(_start_listeners)
+    _notify(start_listeners, phase)
+    st.session_state[_RERUN_STATE_KEY] = (time.perf_counter_ns(), time.thread_time(), phase)
+
+
+def rerun_started_ns():
+    """`perf_counter_ns` del inicio del rerun actual (o el instante actual si no hay medición)."""
+    if _RERUN_STATE_KEY in st.session_state:
+        return st.session_state[_RERUN_STATE_KEY][0]
+    return time.perf_counter_ns()
+
+
+def end_rerun():
+    """
+    Cierra la medición del rerun actual y notifica a los observadores.
+    Es idempotente: si no hay una medición abierta no hace nada.
+    """
+    if _RERUN_STATE_KEY not in st.session_state:
+        return
+    started_wall, started_cpu, phase = st.session_state[_RERUN_STATE_KEY]
+    del st.session_state[_RERUN_STATE_KEY]
+    wall_s = (time.perf_counter_ns() - started_wall) / 1e9
+    cpu_s = time.thread_time() - started_cpu
+
+    with _listeners_lock:
+        listeners = list(_listeners)
+    _notify(listeners, phase, wall_s, cpu_s)
+
+
+def rerun():
+    """Equivalente a `st.rerun()` que primero cierra la medición del rerun."""
+    end_rerun()
+    st.rerun()
+
+
+def stop():
+    """Equivalente a `st.stop()` que primero cierra la medición del rerun."""
+    end_rerun()
+    st.stop()
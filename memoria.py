@@ -0,0 +1,231 @@
+"""
+Modo de diagnóstico de memoria por sesión (tracemalloc).
+
+Con `EXPERIMENTO_TRACEMALLOC=1`, las transiciones decoradas con `track_transition`
+(`next_phase`, `start_new_block`, `handle_block_end`, `save_results`) toman una
+instantánea de tracemalloc antes y después de ejecutarse y luego vacían las trazas
+(`clear_traces`). Cada instantánea contiene solo lo asignado desde la anterior que sigue
+vivo, así que es pequeña y barata de recorrer aunque el proceso ya haya importado
+Streamlit y pandas. Se registra:
+- la memoria retenida por cada transición y por los reruns entre transiciones (donde se
+  renderiza el markdown), atribuida a la línea de `experimento.py` que la originó y clasificada
+  en `blocks_results`, `final_summary_data`, DataFrames, markdown u otros según el
+  código de esa línea,
+- la memoria retenida en `st.session_state` después de la transición, por categoría,
+  y con ella una proyección para `PROJECTED_SESSIONS` sesiones simultáneas.
+
+El reporte top-N de cada variante se escribe en `EXPERIMENTO_MEMORY_DIR/<variante>.txt`
+después de cada transición (ver también `benchmarks/bench_memoria.py`). tracemalloc es
+global al proceso: lo que asignen otras sesiones simultáneas se mezcla en las ventanas,
+así que conviene diagnosticar con una sola sesión. Sin la variable de entorno,
+`track_transition` devuelve la función sin envolver y no hay costo alguno.
+"""
+import functools
+import linecache
+import logging
+import os
+import sys
+import threading
+import tracemalloc
+
+import pandas as pd
+import streamlit as st
+
+import instrumentacion
+
+logger = logging.getLogger(__name__)
+
+# --- Parámetros del diagnóstico de memoria (constantes) ---
+MEMORY_PROFILE = os.environ.get("EXPERIMENTO_TRACEMALLOC", "") == "1"
+MEMORY_REPORT_DIR = os.environ.get("EXPERIMENTO_MEMORY_DIR", "memoria")
+TRACEBACK_DEPTH = 25 # Marcos guardados por asignación: deben alcanzar hasta la línea del script
+TOP_N = 15
+PROJECTED_SESSIONS = 200
+
+CATEGORIES = ("blocks_results", "final_summary_data", "DataFrame", "markdown", "otros")
+
+
+def _categorize_source(line):
+    """Clasifica una línea de código del script por lo que construye."""
+    for category in ("blocks_results", "final_summary_data"):
+        if category in line:
+            return category
+    if "DataFrame" in line or "df_" in line or "to_csv" in line:
+        return "DataFrame"
+    if "markdown" in line:
+        return "markdown"
+    return "otros"
+
+
+def _categorize_key(key, value):
+    """Clasifica una entrada de `st.session_state` retenida."""
+    if key in ("blocks_results", "final_summary_data"):
+        return key
+    if isinstance(value, pd.DataFrame):
+        return "DataFrame"
+    if isinstance(value, str) and "<" in value: # HTML/markdown ya renderizado
+        return "markdown"
+    return "otros"
+
+
+def deep_sizeof(value, seen=None):
+    """Tamaño en bytes de `value` y de todo lo que contiene (DataFrames con `memory_usage`)."""
+    seen = set() if seen is None else seen
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(deep_sizeof(k, seen) + deep_sizeof(v, seen) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(deep_sizeof(item, seen) for item in value)
+    return size
+
+
+def _session_state_sizes():
+    sizes = dict.fromkeys(CATEGORIES, 0)
+    for key in list(st.session_state.keys()):
+        value = st.session_state[key]
+        sizes[_categorize_key(key, value)] += deep_sizeof(value)
+    return sizes
+
+
+class _VariantReport:
+    """Acumulado de las transiciones de una variante del experimento."""
+
+    def __init__(self):
+        self.transitions = {} # ventana -> [veces, bytes retenidos]
+        self.lines = {} # (archivo, línea) -> bytes retenidos acumulados
+        self.retained = {} # session_id -> bytes por categoría tras la última transición
+
+
+class MemoryTracker:
+    """Acumula las ventanas de tracemalloc por variante; compartido por las sesiones."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._variants = {}
+
+    def record(self, variant, script_path, window, snapshot):
+        """
+        Atribuye la memoria que sigue viva de una ventana (lo asignado desde el último
+        `clear_traces`) a la línea más interna de `script_path` que la originó.
+        """
+        line_sizes = {}
+        retained_bytes = 0
+        for trace in snapshot.filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)]).traces:
+            retained_bytes += trace.size
+            # El marco más interno que pertenece al script es la línea responsable; el
+            # traceback va del más externo al más interno (el despachador de fases primero)
+            frame = next((f for f in reversed(trace.traceback) if f.filename == script_path), None)
+            if frame is not None:
+                line_sizes[frame.lineno] = line_sizes.get(frame.lineno, 0) + trace.size
+        retained = _session_state_sizes()
+        session_id = instrumentacion.current_session_id()
+
+        with self._lock:
+            report = self._variants.setdefault(variant, _VariantReport())
+            totals = report.transitions.setdefault(window, [0, 0])
+            totals[0] += 1
+            totals[1] += retained_bytes
+            for lineno, size in line_sizes.items():
+                report.lines[(script_path, lineno)] = report.lines.get((script_path, lineno), 0) + size
+            report.retained[session_id] = retained
+
+    def variants(self):
+        with self._lock:
+            return sorted(self._variants)
+
+    def render(self, variant):
+        """Reporte de texto top-N de la variante."""
+        with self._lock:
+            report = self._variants[variant]
+            transitions = {name: list(totals) for name, totals in report.transitions.items()}
+            lines = sorted(report.lines.items(), key=lambda item: item[1], reverse=True)
+            retained = [dict(sizes) for sizes in report.retained.values()]
+
+        output = [f"Variante: {variant}", "", "Memoria retenida por ventana:"]
+        for name, (count, retained_bytes) in sorted(transitions.items()):
+            output.append(f"  {name:<20} {count:>6} veces  {retained_bytes / 1024:>10.1f} KiB  "
+                          f"({retained_bytes / count / 1024:.1f} KiB/vez)")
+
+        output += ["", f"Top {TOP_N} líneas del script por memoria retenida:"]
+        totals_by_category = dict.fromkeys(CATEGORIES, 0)
+        for rank, ((script_path, lineno), size_diff) in enumerate(lines):
+            source = linecache.getline(script_path, lineno).strip()
+            category = _categorize_source(source)
+            totals_by_category[category] += size_diff
+            if rank < TOP_N:
+                output.append(f"  {size_diff / 1024:>10.1f} KiB  {category:<18} línea {lineno}: {source[:80]}")
+        output.append("  Por categoría: " + ", ".join(
+            f"{category} {size / 1024:.1f} KiB" for category, size in totals_by_category.items()))
+
+        per_session = max(retained, key=lambda sizes: sum(sizes.values()), default=dict.fromkeys(CATEGORIES, 0))
+        session_total = sum(per_session.values())
+        output += ["", f"Retenido en st.session_state (mayor de {len(retained)} sesiones):"]
+        output += [f"  {category:<20} {size / 1024:>10.1f} KiB" for category, size in per_session.items()]
+        output += [f"  {'total':<20} {session_total / 1024:>10.1f} KiB",
+                   f"  Proyección de st.session_state para {PROJECTED_SESSIONS} sesiones: "
+                   f"{session_total * PROJECTED_SESSIONS / 1024 ** 2:.1f} MiB"]
+        return "\n".join(output) + "\n"
+
+    def write_report(self, variant):
+        os.makedirs(MEMORY_REPORT_DIR, exist_ok=True)
+        path = os.path.join(MEMORY_REPORT_DIR, f"{variant}.txt")
+        with open(f"{path}.tmp", "w", encoding="utf-8") as report_file:
+            report_file.write(self.render(variant))
+        os.replace(f"{path}.tmp", path) # Escritura atómica
+
+
+tracker = MemoryTracker()
+
+
+# Solo la transición más externa de cada hilo mide (`handle_block_end` llama a `next_phase`)
+_active = threading.local()
+_tracing_lock = threading.Lock()
+
+
+def _current_variant():
+    # Todas las variantes comparten las transiciones de `experimento.py`
+    return st.session_state.get("variant", "desconocida")
+
+
+def _take_window(variant, script_path, window):
+    """Registra lo asignado desde la ventana anterior y abre una nueva."""
+    with _tracing_lock:
+        snapshot = tracemalloc.take_snapshot()
+        tracemalloc.clear_traces()
+    tracker.record(variant, script_path, window, snapshot)
+
+
+def track_transition(func):
+    """Decorador de las transiciones de fase; sin el modo de diagnóstico no hace nada."""
+    if not MEMORY_PROFILE:
+        return func
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(TRACEBACK_DEPTH)
+    script_path = func.__code__.co_filename
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if getattr(_active, "transition", None) is not None:
+            return func(*args, **kwargs)
+        _active.transition = func.__name__
+        variant = _current_variant() # Antes de la transición: un reinicio borra `variant`
+        try:
+            # Lo asignado desde la transición anterior: reruns, markdown renderizado, etc.
+            _take_window(variant, script_path, "reruns previos")
+        except Exception: # El diagnóstico nunca debe romper la sesión del participante
+            logger.exception("Error en el diagnóstico de memoria antes de %s", func.__name__)
+        try:
+            return func(*args, **kwargs)
+        finally: # También cuando la transición termina en un rerun
+            _active.transition = None
+            try:
+                _take_window(variant, script_path, func.__name__)
+                tracker.write_report(variant)
+            except Exception:
+                logger.exception("Error en el diagnóstico de memoria de %s", func.__name__)
+    return wrapper
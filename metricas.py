@@ -0,0 +1,286 @@
+"""
+Métricas de latencia y rendimiento del servidor del experimento.
+
+Expone, en formato de texto de Prometheus:
+- histograma de la duración de los reruns por `experiment_phase`,
+- respuestas totales (por resultado) y respuestas por segundo,
+- sesiones activas por fase,
+- uso de recursos por variante (reruns, tiempo de pared y CPU, sesiones activas), para
+  cuando `servidor.py` sirve todas las variantes en un mismo proceso, y la memoria
+  residente máxima del proceso,
+- profundidad de las colas de escritura registradas con `register_queue_gauge`,
+- histograma del retraso con que se detecta el fin de un bloque.
+
+Las métricas se sirven en `http://127.0.0.1:<EXPERIMENTO_METRICS_PORT>/metrics` y/o se
+escriben cada `METRICS_FILE_INTERVAL_S` segundos en `EXPERIMENTO_METRICS_FILE`; los
+exportadores los inicia `start_exporters()`, que llaman `servidor.py` y
+`experimento.run` (no el import: los procesos de `trabajos` también importan este
+módulo y no deben abrir el puerto ni pisar el archivo). Cada
+observación es un `bisect` y una suma bajo un lock (microsegundos), muy por debajo del
+1% del costo de un rerun.
+"""
+import bisect
+import logging
+import os
+import sys
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import streamlit as st
+
+import instrumentacion
+
+try:
+    import resource # Solo en sistemas tipo Unix
+except ImportError:
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+# --- Parámetros de las métricas (constantes) ---
+METRICS_PORT = int(os.environ.get("EXPERIMENTO_METRICS_PORT", "0")) # 0 = sin endpoint HTTP
+METRICS_FILE = os.environ.get("EXPERIMENTO_METRICS_FILE", "") # Vacío = sin archivo
+METRICS_FILE_INTERVAL_S = 15
+RERUN_BUCKETS_S = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+EXPIRY_LAG_BUCKETS_S = (0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 300)
+ANSWER_RATE_WINDOW_S = 60
+SESSION_IDLE_S = 300 # Una sesión sin reruns durante este tiempo deja de contarse como activa
+
+
+class _Histogram:
+    """Histograma acumulativo con buckets fijos (no es seguro entre hilos por sí solo)."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1) # El último es +Inf
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def render(self, name, labels):
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets + ("+Inf",), self.counts):
+            cumulative += bucket_count
+            lines.append(f'{name}_bucket{{{labels}le="{bound}"}} {cumulative}')
+        plain_labels = f"{{{labels.rstrip(',')}}}" if labels else ""
+        lines.append(f"{name}_sum{plain_labels} {self.total}")
+        lines.append(f"{name}_count{plain_labels} {self.count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Métricas del proceso, compartidas por todas las sesiones."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rerun_duration = {} # fase -> _Histogram
+        self._expiry_lag = _Histogram(EXPIRY_LAG_BUCKETS_S)
+        self._answers = {} # resultado -> total
+        self._answer_times = deque() # instantes de las respuestas recientes
+        self._sessions = {} # session_id -> (fase, variante, último instante visto)
+        self._variant_usage = {} # variante -> [reruns, segundos de pared, segundos de CPU]
+        self._queue_gauges = {} # nombre -> función que devuelve la profundidad
+
+    def observe_rerun(self, phase, wall_s, cpu_s):
+        """Observador de `instrumentacion`: duración del rerun, fase y variante de la sesión."""
+        phase = phase or "UNKNOWN"
+        session_id = instrumentacion.current_session_id()
+        variant = st.session_state.get("variant") # Falta justo después de un reinicio
+        now = time.monotonic()
+        with self._lock:
+            histogram = self._rerun_duration.get(phase)
+            if histogram is None:
+                histogram = self._rerun_duration[phase] = _Histogram(RERUN_BUCKETS_S)
+            histogram.observe(wall_s)
+            if variant is None:
+                variant = self._sessions.get(session_id, (None, "UNKNOWN"))[1]
+            self._sessions[session_id] = (phase, variant, now)
+            usage = self._variant_usage.setdefault(variant, [0, 0.0, 0.0])
+            usage[0] += 1
+            usage[1] += wall_s
+            usage[2] += cpu_s
+
+    def observe_answer(self, outcome):
+        """Cuenta una respuesta del participante."""
+        now = time.monotonic()
+        with self._lock:
+            self._answers[outcome] = self._answers.get(outcome, 0) + 1
+            self._answer_times.append(now)
+            self._trim_answer_times(now)
+
+    def observe_block_expiry_lag(self, lag_s):
+        """Registra cuántos segundos después del límite se detectó el fin de un bloque."""
+        with self._lock:
+            self._expiry_lag.observe(max(0.0, lag_s))
+
+    def register_queue_gauge(self, name, depth_fn):
+        """Registra una cola de escritura; `depth_fn()` devuelve su profundidad actual."""
+        with self._lock:
+            self._queue_gauges[name] = depth_fn
+
+    def _trim_answer_times(self, now):
+        horizon = now - ANSWER_RATE_WINDOW_S
+        while self._answer_times and self._answer_times[0] < horizon:
+            self._answer_times.popleft()
+
+    def render(self):
+        """Devuelve todas las métricas en formato de texto de Prometheus."""
+        now = time.monotonic()
+        with self._lock:
+            self._trim_answer_times(now)
+            for session_id, (_, _, last_seen) in list(self._sessions.items()):
+                if now - last_seen > SESSION_IDLE_S:
+                    del self._sessions[session_id]
+
+            lines = [
+                "# HELP experimento_rerun_duration_seconds Duración de la ejecución del script por fase.",
+                "# TYPE experimento_rerun_duration_seconds histogram",
+            ]
+            for phase, histogram in sorted(self._rerun_duration.items()):
+                lines += histogram.render("experimento_rerun_duration_seconds", f'phase="{phase}",')
+
+            lines += [
+                "# HELP experimento_answers_total Respuestas recibidas por resultado.",
+                "# TYPE experimento_answers_total counter",
+            ]
+            lines += [f'experimento_answers_total{{outcome="{outcome}"}} {total}'
+                      for outcome, total in sorted(self._answers.items())]
+            lines += [
+                f"# HELP experimento_answers_per_second Respuestas por segundo en los últimos {ANSWER_RATE_WINDOW_S} s.",
+                "# TYPE experimento_answers_per_second gauge",
+                f"experimento_answers_per_second {len(self._answer_times) / ANSWER_RATE_WINDOW_S}",
+            ]
+
+            sessions_by_phase = {}
+            sessions_by_variant = {}
+            for phase, variant, _ in self._sessions.values():
+                sessions_by_phase[phase] = sessions_by_phase.get(phase, 0) + 1
+                sessions_by_variant[variant] = sessions_by_variant.get(variant, 0) + 1
+            lines += [
+                "# HELP experimento_active_sessions Sesiones activas por fase.",
+                "# TYPE experimento_active_sessions gauge",
+            ]
+            lines += [f'experimento_active_sessions{{phase="{phase}"}} {total}'
+                      for phase, total in sorted(sessions_by_phase.items())]
+
+            lines += [
+                "# HELP experimento_variant_reruns_total Reruns ejecutados por variante.",
+                "# TYPE experimento_variant_reruns_total counter",
+            ]
+            lines += [f'experimento_variant_reruns_total{{variant="{variant}"}} {usage[0]}'
+                      for variant, usage in sorted(self._variant_usage.items())]
+            lines += [
+                "# HELP experimento_variant_rerun_seconds_total Tiempo de pared de los reruns por variante.",
+                "# TYPE experimento_variant_rerun_seconds_total counter",
+            ]
+            lines += [f'experimento_variant_rerun_seconds_total{{variant="{variant}"}} {usage[1]}'
+                      for variant, usage in sorted(self._variant_usage.items())]
+            lines += [
+                "# HELP experimento_variant_cpu_seconds_total Tiempo de CPU de los reruns por variante.",
+                "# TYPE experimento_variant_cpu_seconds_total counter",
+            ]
+            lines += [f'experimento_variant_cpu_seconds_total{{variant="{variant}"}} {usage[2]}'
+                      for variant, usage in sorted(self._variant_usage.items())]
+            lines += [
+                "# HELP experimento_variant_active_sessions Sesiones activas por variante.",
+                "# TYPE experimento_variant_active_sessions gauge",
+            ]
+            lines += [f'experimento_variant_active_sessions{{variant="{variant}"}} {total}'
+                      for variant, total in sorted(sessions_by_variant.items())]
+
+            queue_gauges = dict(self._queue_gauges)
+            lines += [
+                "# HELP experimento_block_expiry_lag_seconds Retraso en detectar el fin de un bloque.",
+                "# TYPE experimento_block_expiry_lag_seconds histogram",
+            ]
+            lines += self._expiry_lag.render("experimento_block_expiry_lag_seconds", "")
+
+        if resource is not None:
+            max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            lines += [
+                "# HELP experimento_process_max_rss_bytes Memoria residente máxima del proceso (todas las variantes).",
+                "# TYPE experimento_process_max_rss_bytes gauge",
+                # Linux informa KiB; macOS, bytes
+                f"experimento_process_max_rss_bytes {max_rss if sys.platform == 'darwin' else max_rss * 1024}",
+            ]
+
+        # Las colas se consultan fuera del lock: cada una tiene el suyo
+        lines += [
+            "# HELP experimento_writer_queue_depth Elementos pendientes en cada cola de escritura.",
+            "# TYPE experimento_writer_queue_depth gauge",
+        ]
+        for name, depth_fn in sorted(queue_gauges.items()):
+            try:
+                lines.append(f'experimento_writer_queue_depth{{writer="{name}"}} {depth_fn()}')
+            except Exception:
+                logger.exception("No se pudo leer la profundidad de la cola %s", name)
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+instrumentacion.add_rerun_listener(registry.observe_rerun)
+
+observe_answer = registry.observe_answer
+observe_block_expiry_lag = registry.observe_block_expiry_lag
+register_queue_gauge = registry.register_queue_gauge
+
+
+# --- Exportadores (endpoint HTTP local y/o archivo periódico) ---
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args): # Sin ruido en la consola de Streamlit
+        pass
+
+
+def _write_metrics_file_forever(path):
+    while True:
+        temporary_path = f"{path}.tmp"
+        try:
+            with open(temporary_path, "w", encoding="utf-8") as metrics_file:
+                metrics_file.write(registry.render())
+            os.replace(temporary_path, path) # Escritura atómica para quien lea el archivo
+        except OSError:
+            logger.exception("No se pudo escribir el archivo de métricas %s", path)
+        time.sleep(METRICS_FILE_INTERVAL_S)
+
+
+_exporters_lock = threading.Lock()
+_exporters_started = False
+
+
+def start_exporters():
+    """Inicia (una sola vez por proceso) los exportadores configurados."""
+    global _exporters_started
+    with _exporters_lock:
+        if _exporters_started:
+            return
+        _exporters_started = True
+
+    if METRICS_PORT:
+        try:
+            server = ThreadingHTTPServer(("127.0.0.1", METRICS_PORT), _MetricsHandler)
+        except OSError:
+            logger.exception("No se pudo abrir el puerto de métricas %s", METRICS_PORT)
+        else:
+            threading.Thread(target=server.serve_forever, name="metricas-http", daemon=True).start()
+    if METRICS_FILE:
+        threading.Thread(target=_write_metrics_file_forever, args=(METRICS_FILE,),
+                         name="metricas-archivo", daemon=True).start()
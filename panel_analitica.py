@@ -0,0 +1,69 @@
+"""
+Página del experimentador: mapas de calor de errores y latencia por paso.
+
+Muestra, para una variante, la tasa de error y el tiempo de reacción medio de cada
+transición de la secuencia (filas) por bloque (columnas), separados por grupo. Las
+matrices de `analitica` se calculan en el pool de `trabajos` y se cachean con
+`st.cache_data` usando como clave la firma del archivo de respuestas (mtime y tamaño):
+se recalculan solo cuando llegan datos nuevos.
+"""
+import os
+
+import altair as alt
+import streamlit as st
+
+import analitica
+import experimentador
+import registro
+import trabajos
+
+METRICS = {
+    "Tasa de error": ("error_rate", ".0%"),
+    "Tiempo de reacción medio (ms)": ("mean_latency_ms", ",.0f"),
+}
+
+
+def _answers_signature(path):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+@st.cache_data(max_entries=4, show_spinner="Calculando matrices...")
+def step_frames(path, signature):
+    """DataFrames largos de `analitica` por variante; `signature` invalida el caché."""
+    return trabajos.pool.run("matrices por paso", analitica.step_frames, path) # Fuera de los hilos de Streamlit
+
+
+def _heatmap(frame, column, value_format, title):
+    transitions = list(dict.fromkeys(frame["transition"])) # En el orden de la secuencia
+    return alt.Chart(frame, title=title).mark_rect().encode(
+        x=alt.X("block:O", title="Bloque"),
+        y=alt.Y("transition:N", title="Paso", sort=transitions),
+        color=alt.Color(f"{column}:Q", title=title, scale=alt.Scale(scheme="reds")),
+        tooltip=["transition", "block", "group", "attempts", "errors",
+                 alt.Tooltip(f"{column}:Q", format=value_format)],
+    ).facet(column=alt.Column("group:N", title="Grupo"))
+
+
+def render():
+    experimentador.require_authorization()
+    st.title("Errores por paso de la secuencia")
+
+    frames = step_frames(registro.ANSWERS_FILE, _answers_signature(registro.ANSWERS_FILE))
+    if not frames:
+        st.info(f"Todavía no hay respuestas registradas en {registro.ANSWERS_FILE}.")
+        return
+
+    variant_name = st.selectbox("Variante", sorted(frames))
+    metric_label = st.radio("Métrica", list(METRICS), horizontal=True)
+    column, value_format = METRICS[metric_label]
+    frame = frames[variant_name]
+    st.altair_chart(_heatmap(frame, column, value_format, metric_label))
+
+    st.subheader("Pasos con más errores")
+    by_step = frame.groupby(["step", "transition"], as_index=False)[["attempts", "errors"]].sum()
+    by_step["error_rate"] = by_step["errors"] / by_step["attempts"].where(by_step["attempts"] > 0)
+    st.dataframe(by_step.sort_values("error_rate", ascending=False).head(10), hide_index=True)
@@ -0,0 +1,123 @@
+"""
+Página del experimentador: consultas sobre los datos registrados.
+
+Responde preguntas como "tiempo medio del bloque 3 para Pérdida en ganancia_v2" sin
+exportar nada, con el almacén columnar de `consultas` en `EXPERIMENTO_DATA_DIR/almacen`.
+El almacén se pone al día en el pool de `trabajos` como mucho cada `STORE_TTL_S`
+segundos, aunque los registros se escriban sin parar durante la corrida (ponerlo al
+día sin filas nuevas solo lee un offset); los resultados de cada consulta se cachean
+con `st.cache_data` durante `QUERY_TTL_S` segundos, con la versión del almacén en la
+clave. Con DuckDB instalado se pueden escribir consultas SQL libres.
+"""
+import datetime
+import os
+import time
+
+import streamlit as st
+
+import consultas
+import experimentador
+import registro
+import trabajos
+import variantes
+
+STORE_TTL_S = 30
+QUERY_TTL_S = 300
+STORE_DIR = os.path.join(registro.DATA_DIR, "almacen")
+TABLES = {
+    "respuestas": registro.ANSWERS_FILE,
+    "bloques": registro.BLOCKS_FILE,
+    "sesiones": registro.SESSIONS_FILE,
+}
+# Consulta -> (tabla, columna, agregación); se agrupa por variante, grupo y, si la tabla lo tiene, bloque
+CANNED_QUERIES = {
+    "Tiempo medio por bloque (s)": ("bloques", "time_taken_s", "mean"),
+    "Tasa de éxito por bloque": ("bloques", "success", "mean"),
+    "Errores medios por bloque": ("bloques", "errors", "mean"),
+    "Tiempo de reacción mediano (ms)": ("respuestas", "reaction_time_ms", "approximate_median"),
+    "Respuestas por bloque": ("respuestas", "reaction_time_ms", "count"),
+    "Dinero final medio": ("sesiones", "final_money", "mean"),
+}
+BLOCKLESS_TABLES = ("sesiones",)
+SQL_EXAMPLE = """SELECT variant, "group", block, avg(time_taken_s) AS tiempo_medio_s, count(*) AS bloques
+FROM bloques
+WHERE block = 3
+GROUP BY ALL
+ORDER BY ALL"""
+
+
+def _table_dir(table):
+    return os.path.join(STORE_DIR, table)
+
+
+@st.cache_data(ttl=STORE_TTL_S, max_entries=1, show_spinner="Actualizando el almacén...")
+def refresh_store():
+    """Copia al almacén las filas nuevas (en el pool); sin argumentos, se repite solo al vencer el TTL."""
+    tables = {table: (source, _table_dir(table)) for table, source in TABLES.items()}
+    trabajos.pool.run("actualizar almacén", consultas.update_stores, tables)
+    return {table: consultas.store_version(_table_dir(table)) for table in TABLES}
+
+
+@st.cache_data(ttl=QUERY_TTL_S, max_entries=64, show_spinner=False)
+def canned_query(table, column, how, by, filters, version):
+    """Resultado de `consultas.aggregate`; `version` (del almacén) invalida el caché."""
+    started = time.perf_counter()
+    frame = consultas.aggregate(_table_dir(table), column, how, by, filters)
+    return frame, (time.perf_counter() - started) * 1e3
+
+
+@st.cache_data(ttl=QUERY_TTL_S, max_entries=16, show_spinner=False)
+def sql_query(query, versions):
+    started = time.perf_counter()
+    frame = consultas.sql(query, {table: _table_dir(table) for table in TABLES})
+    return frame, (time.perf_counter() - started) * 1e3
+
+
+def render():
+    experimentador.require_authorization()
+    st.title("Consultas")
+
+    versions = refresh_store()
+
+    # Un formulario: elegir filtros no provoca reruns hasta consultar
+    with st.form("query_form"):
+        query_label = st.selectbox("Consulta", list(CANNED_QUERIES))
+        left, right = st.columns(2)
+        selected_variants = left.multiselect("Variantes (vacío = todas)", list(variantes.VARIANTS))
+        selected_groups = right.multiselect("Grupos (vacío = todos)", sorted({
+            group for variant in variantes.VARIANTS.values() for group in variant.group_names}))
+        max_blocks = max(variant.max_blocks for variant in variantes.VARIANTS.values())
+        selected_blocks = left.multiselect("Bloques (vacío = todos)", list(range(1, max_blocks + 1)))
+        dates = right.date_input("Fechas (vacío = todas)", value=(), max_value=datetime.date.today())
+        st.form_submit_button("Consultar")
+
+    table, column, how = CANNED_QUERIES[query_label]
+    by = ("variant", "group") if table in BLOCKLESS_TABLES else ("variant", "group", "block")
+    filters = {
+        "variant": tuple(selected_variants),
+        "group": tuple(selected_groups),
+        "block": () if table in BLOCKLESS_TABLES else tuple(selected_blocks),
+        "start_date": dates[0] if dates else None,
+        "end_date": dates[-1] if dates else None,
+    }
+    frame, elapsed_ms = canned_query(table, column, how, by, filters, versions[table])
+    if frame.empty:
+        st.info("No hay datos para esta consulta.")
+    else:
+        st.dataframe(frame, hide_index=True)
+    st.caption(f"{elapsed_ms:.0f} ms al calcularla; el resultado se reutiliza durante {QUERY_TTL_S} s.")
+
+    st.subheader("SQL")
+    if not consultas.SQL_AVAILABLE:
+        st.caption("Las consultas SQL libres necesitan DuckDB en el servidor (pip install duckdb).")
+        return
+    st.caption(f"Tablas: {', '.join(TABLES)} (particionadas por variante, grupo y fecha).")
+    query = st.text_area("Consulta SQL", SQL_EXAMPLE, height=150)
+    if st.button("Ejecutar"):
+        try:
+            frame, elapsed_ms = sql_query(query, versions)
+        except Exception as error: # Errores de sintaxis o de columnas en la consulta
+            st.error(f"{type(error).__name__}: {error}")
+            return
+        st.dataframe(frame, hide_index=True)
+        st.caption(f"{elapsed_ms:.0f} ms")
@@ -0,0 +1,131 @@
+"""
+Página del experimentador: efecto Ganancia vs Pérdida.
+
+Compara los grupos en errores totales, tasa de éxito y coeficiente de aprendizaje por
+sesión con los intervalos bootstrap y los valores p de permutación de `inferencia`.
+Las sesiones y sus puntuaciones salen de `puntuacion.load_scores` (que reutiliza las ya
+guardadas); el remuestreo de cada prueba se reparte en `inferencia.PARTS_PER_TEST`
+trabajos del pool de `trabajos`, que corren en paralelo. Ambos pasos se cachean con
+`st.cache_data` usando la firma del registro de bloques (mtime y tamaño) como clave:
+se recalculan solo cuando llegan bloques nuevos o cambian las opciones.
+"""
+import itertools
+import os
+import time
+
+import altair as alt
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+import experimentador
+import inferencia
+import puntuacion
+import registro
+import trabajos
+import variantes
+
+HISTOGRAM_BINS = 60
+
+
+def _blocks_signature(path):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+@st.cache_data(max_entries=4, show_spinner="Puntuando sesiones...")
+def session_scores(signature):
+    """Puntuaciones de las sesiones registradas; `signature` invalida el caché."""
+    return trabajos.pool.run("puntuar sesiones", puntuacion.load_scores, registro.BLOCKS_FILE, registro.SCORES_FILE)
+
+
+@st.cache_data(max_entries=16, show_spinner="Remuestreando...")
+def group_effects(signature, selected_variants, complete_only, replicates, seed):
+    """
+    (tabla de resultados, {métrica: {prueba: diferencias}}, ms) de las sesiones de
+    `selected_variants` (vacío = todas). Todas las pruebas se encolan antes de esperar.
+    """
+    started = time.perf_counter()
+    rows = [row for row in session_scores(signature)
+            if (not selected_variants or row["variant"] in selected_variants)
+            and (not complete_only or row["blocks"] == variantes.VARIANTS[row["variant"]].max_blocks)]
+    parts = inferencia.PARTS_PER_TEST
+    seeds = iter(inferencia.split_seeds(seed, len(inferencia.METRICS) * len(inferencia.TESTS) * parts))
+    samples, jobs = {}, {}
+    for metric, test in itertools.product(inferencia.METRICS, inferencia.TESTS):
+        part_seeds = [next(seeds) for _ in range(parts)] # Semillas fijas por métrica aunque se salte alguna
+        gain, loss = samples.setdefault(metric, inferencia.group_samples(rows, metric))
+        if gain.size < 2 or loss.size < 2:
+            continue
+        jobs[metric, test] = [
+            trabajos.pool.submit(f"{test} {metric}", inferencia.resample, test, gain, loss, part_replicates, part_seed)
+            for part_replicates, part_seed in zip(inferencia.split_replicates(replicates, parts), part_seeds)]
+
+    differences = {}
+    for (metric, test), parts_jobs in jobs.items():
+        differences.setdefault(metric, {})[test] = np.concatenate([job.future.result()[1] for job in parts_jobs])
+    table = pd.DataFrame([inferencia.summarize(metric, *samples[metric], tests["bootstrap"], tests["permutacion"])
+                          for metric, tests in differences.items()])
+    return table, differences, (time.perf_counter() - started) * 1e3
+
+
+def _distribution_chart(tests, observed, ci_low, ci_high, title):
+    """Histogramas de las diferencias bootstrap y de permutación, con la observada y el intervalo."""
+    values = np.concatenate(list(tests.values()))
+    edges = np.histogram_bin_edges(values, bins=HISTOGRAM_BINS)
+    frame = pd.concat([pd.DataFrame({
+        "test": test,
+        "difference": (edges[:-1] + edges[1:]) / 2,
+        "replicates": np.histogram(replicate_differences, bins=edges)[0],
+    }) for test, replicate_differences in tests.items()])
+    bars = alt.Chart(frame, title=title).mark_bar(opacity=0.6).encode(
+        x=alt.X("difference:Q", title="Diferencia de medias (Ganancia - Pérdida)"),
+        y=alt.Y("replicates:Q", title="Réplicas", stack=None),
+        color=alt.Color("test:N", title="Prueba"),
+    )
+    lines = pd.DataFrame({"difference": [observed, ci_low, ci_high],
+                          "marca": ["observada", "intervalo", "intervalo"]})
+    rules = alt.Chart(lines).mark_rule().encode(
+        x="difference:Q", strokeDash=alt.StrokeDash("marca:N", title=None))
+    return bars + rules
+
+
+def render():
+    experimentador.require_authorization()
+    st.title("Efecto Ganancia vs Pérdida")
+
+    # Un formulario: elegir opciones no provoca reruns (ni remuestreos) hasta calcular
+    with st.form("effect_form"):
+        selected_variants = st.multiselect("Variantes (vacío = todas)", list(variantes.VARIANTS))
+        left, right = st.columns(2)
+        replicates = left.number_input("Réplicas", min_value=inferencia.MIN_REPLICATES,
+                                       max_value=inferencia.MAX_REPLICATES, value=inferencia.REPLICATES,
+                                       step=inferencia.MIN_REPLICATES)
+        seed = right.number_input("Semilla", min_value=0, value=0, step=1)
+        complete_only = st.checkbox("Solo sesiones con todos los bloques", value=True)
+        st.form_submit_button("Calcular")
+
+    signature = _blocks_signature(registro.BLOCKS_FILE)
+    if signature is None:
+        st.info(f"Todavía no hay bloques registrados en {registro.BLOCKS_FILE}.")
+        return
+    table, differences, elapsed_ms = group_effects(signature, tuple(selected_variants), complete_only,
+                                                   int(replicates), int(seed))
+    if table.empty:
+        st.info(f"Hacen falta al menos dos sesiones de {inferencia.GAIN_GROUP} y dos de {inferencia.LOSS_GROUP}.")
+        return
+
+    st.dataframe(table.assign(metric=table["metric"].map(inferencia.METRICS)), hide_index=True,
+                 column_config={"p_value": st.column_config.NumberColumn(format="%.4f")})
+    st.caption(f"Intervalos bootstrap percentil al {inferencia.CONFIDENCE:.0%} y valores p bilaterales de "
+               f"permutación, con {int(replicates):,} réplicas cada uno; {elapsed_ms:.0f} ms al calcularlos "
+               "(se reutilizan hasta que lleguen bloques nuevos). Puntuación: "
+               f"{puntuacion.CURRENT_SCORER}.")
+
+    metric = st.radio("Distribución", list(differences), format_func=inferencia.METRICS.get, horizontal=True)
+    row = table.set_index("metric").loc[metric]
+    st.altair_chart(_distribution_chart(differences[metric], row["difference"], row["ci_low"], row["ci_high"],
+                                        inferencia.METRICS[metric]))
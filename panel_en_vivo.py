@@ -0,0 +1,101 @@
+"""
+Página del experimentador: progreso de la corrida en vivo.
+
+Muestra sesiones por fase, tasa de éxito y errores medios por bloque y grupo, y la
+distribución del dinero final, a partir de los contadores de `agregados`. Solo el
+fragmento se refresca cada `REFRESH_S` segundos; las tablas se recalculan únicamente
+cuando cambia la versión de los agregados, y ese cálculo se comparte entre todos los
+experimentadores conectados, así que el panel abierto no suma trabajo por respuesta a
+las sesiones de los participantes.
+"""
+import threading
+
+import pandas as pd
+import streamlit as st
+
+import agregados
+import experimentador
+
+REFRESH_S = 1
+PHASES = ("WELCOME", "INSTRUCTIONS", "EXPERIMENT", "PAUSE_BETWEEN_BLOCKS", "RESULTS")
+
+_frames_lock = threading.Lock()
+_frames = (None, None) # (versión, tablas) calculadas por última vez
+
+
+def _build_frames(snapshot):
+    phases = pd.DataFrame([(variant, phase, count) for (variant, phase), count in snapshot["phases"].items()],
+                          columns=["variant", "phase", "sessions"])
+    blocks = pd.DataFrame([(*key, *totals) for key, totals in snapshot["blocks"].items()],
+                          columns=["variant", "group", "block", "played", "successes", "errors"])
+    blocks["success_rate"] = blocks["successes"] / blocks["played"]
+    blocks["mean_errors"] = blocks["errors"] / blocks["played"]
+    money = pd.DataFrame([(variant, group, amount, count)
+                          for (variant, group), histogram in snapshot["money"].items()
+                          for amount, count in histogram.items()],
+                         columns=["variant", "group", "final_money", "sessions"])
+    answers = pd.DataFrame([(variant, outcome, count) for (variant, outcome), count in snapshot["answers"].items()],
+                           columns=["variant", "outcome", "answers"])
+    return {"phases": phases, "blocks": blocks, "money": money, "answers": answers}
+
+
+def live_frames():
+    """Tablas del panel; se recalculan solo si los agregados cambiaron."""
+    global _frames
+    version, snapshot = agregados.aggregates.snapshot()
+    with _frames_lock:
+        if _frames[0] != version:
+            _frames = (version, _build_frames(snapshot))
+        return _frames[1]
+
+
+def _pivot(frame, values, index, columns):
+    return frame.pivot_table(index=index, columns=columns, values=values, aggfunc="sum", observed=True)
+
+
+@st.fragment(run_every=REFRESH_S)
+def _live_view(variant):
+    frames = live_frames()
+    phases = frames["phases"]
+    if variant is not None:
+        phases = phases[phases["variant"] == variant]
+    by_phase = phases.groupby("phase")["sessions"].sum().reindex(PHASES, fill_value=0)
+    columns = st.columns(len(PHASES))
+    for column, (phase, count) in zip(columns, by_phase.items()):
+        column.metric(phase, int(count))
+
+    blocks = frames["blocks"]
+    money = frames["money"]
+    answers = frames["answers"]
+    if variant is not None:
+        blocks = blocks[blocks["variant"] == variant]
+        money = money[money["variant"] == variant]
+        answers = answers[answers["variant"] == variant]
+    if blocks.empty:
+        st.info("Todavía no terminó ningún bloque.")
+        return
+
+    left, right = st.columns(2)
+    with left:
+        st.subheader("Tasa de éxito por bloque")
+        st.line_chart(_pivot(blocks, "success_rate", "block", "group"))
+    with right:
+        st.subheader("Errores medios por bloque")
+        st.bar_chart(_pivot(blocks, "mean_errors", "block", "group"), stack=False)
+
+    st.subheader("Dinero final")
+    if money.empty:
+        st.caption("Ninguna sesión terminó todavía.")
+    else:
+        st.bar_chart(_pivot(money, "sessions", "final_money", "group"), stack=False)
+    st.caption("Respuestas: " + ", ".join(f"{outcome} {count}" for outcome, count in
+                                          answers.groupby("outcome")["answers"].sum().items()))
+
+
+def render():
+    experimentador.require_authorization()
+    st.title("Experimento en vivo")
+    _, snapshot = agregados.aggregates.snapshot()
+    variants = sorted({key[0] for part in ("phases", "blocks", "money") for key in snapshot[part]})
+    choice = st.selectbox("Variante", ["Todas", *variants])
+    _live_view(None if choice == "Todas" else choice)
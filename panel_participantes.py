@@ -0,0 +1,53 @@
+"""
+Página del experimentador: padrón de participantes.
+
+Carga códigos de participante (uno por línea, pegados o desde un archivo de texto) en
+el padrón de `participantes`, muestra cuántos se reclamaron y permite volver a
+habilitar uno si la sesión de ese participante se cortó. El padrón se usa solo con
+`EXPERIMENTO_ROSTER=1`.
+"""
+import pandas as pd
+import streamlit as st
+
+import experimentador
+import participantes
+
+
+def _release_selected():
+    if participantes.release(st.session_state.release_participant):
+        st.toast("El código se puede volver a usar.")
+
+
+def render():
+    experimentador.require_authorization()
+    st.title("Participantes")
+    if not participantes.ROSTER_MODE:
+        st.warning("El modo padrón está desactivado: los participantes no necesitan código (EXPERIMENTO_ROSTER=1 lo activa).")
+
+    with st.form("roster_form", clear_on_submit=True):
+        pasted = st.text_area("Códigos (uno por línea)")
+        uploaded = st.file_uploader("O un archivo de texto con un código por línea", type=["txt", "csv"])
+        submitted = st.form_submit_button("Agregar al padrón")
+    if submitted:
+        tokens = pasted.splitlines()
+        if uploaded is not None:
+            tokens += uploaded.getvalue().decode("utf-8-sig").splitlines()
+        added = participantes.add_tokens(tokens)
+        st.toast(f"{added} códigos nuevos ({len(tokens) - added} vacíos o ya cargados)")
+
+    claims = participantes.claims()
+    left, right = st.columns(2)
+    left.metric("Códigos cargados", participantes.roster_size())
+    right.metric("Reclamados", len(claims))
+    st.caption("El padrón guarda solo el SHA-256 de cada código (sin espacios y en mayúsculas), que es la "
+               "columna `participant` de los resultados y del registro.")
+    if not claims:
+        return
+
+    frame = pd.DataFrame(claims)
+    if "claimed_at" in frame:
+        frame["claimed_at"] = pd.to_datetime(frame["claimed_at"], unit="s")
+    st.dataframe(frame, hide_index=True)
+    with st.form("release_form"):
+        st.selectbox("Código reclamado", frame["participant"], key="release_participant")
+        st.form_submit_button("Volver a habilitar", on_click=_release_selected)
@@ -0,0 +1,31 @@
+"""
+Página del experimentador: sesiones marcadas por `deteccion` en tiempo real.
+
+La tabla se refresca sola cada `REFRESH_S` segundos (solo el fragmento, no la página)
+leyendo el monitor del proceso; no toca el registro en disco.
+"""
+import pandas as pd
+import streamlit as st
+
+import deteccion
+import experimentador
+
+REFRESH_S = 2
+
+
+@st.fragment(run_every=REFRESH_S)
+def _suspicious_table():
+    rows = deteccion.monitor.suspicious_sessions()
+    if not rows:
+        st.success("Ninguna sesión marcada.")
+        return
+    st.dataframe(pd.DataFrame(rows).drop(columns="last_seen"), hide_index=True)
+
+
+def render():
+    experimentador.require_authorization()
+    st.title("Sesiones sospechosas")
+    st.caption(f"Demasiado rápida: alguna de las últimas {deteccion.ROLLING_WINDOW} respuestas en menos de "
+               f"{deteccion.MIN_HUMAN_LATENCY_MS} ms. Periódica: coeficiente de variación menor que "
+               f"{deteccion.PERIODIC_MAX_CV:.0%} tras {deteccion.MIN_ANSWERS} respuestas.")
+    _suspicious_table()
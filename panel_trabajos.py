@@ -0,0 +1,110 @@
+"""
+Página del experimentador: trabajos en segundo plano.
+
+Lanza las exportaciones del registro (respuestas, bloques o sesiones, en CSV, JSONL o
+Parquet, filtradas por variante, grupo y fechas) en el pool de `trabajos` y muestra el
+estado de todos los trabajos del proceso (exportaciones y analítica), refrescando solo
+la tabla cada `REFRESH_S` segundos. "Puntuaciones" exporta el resumen de cada sesión
+según `puntuacion.CURRENT_SCORER`, reutilizando las puntuaciones ya guardadas.
+
+Las exportaciones terminadas se listan con su ruta, filas y tamaño, y cada una tiene su
+botón de descarga: el archivo se lee recién al hacer clic, en bloques de
+`DOWNLOAD_CHUNK_BYTES`, no en cada rerun de la página.
+"""
+import datetime
+import io
+import os
+import shutil
+
+import pandas as pd
+import streamlit as st
+
+import experimentador
+import exportacion
+import puntuacion
+import registro
+import trabajos
+import variantes
+
+REFRESH_S = 1
+DOWNLOAD_CHUNK_BYTES = 1 << 20
+EXPORT_JOB_PREFIX = "exportar "
+EXPORT_DIR = os.path.join(registro.DATA_DIR, "exportaciones")
+EXPORTS = {
+    "Respuestas": registro.ANSWERS_FILE,
+    "Bloques": registro.BLOCKS_FILE,
+    "Sesiones": registro.SESSIONS_FILE,
+    "Puntuaciones": registro.SCORES_FILE,
+}
+
+
+@st.fragment(run_every=REFRESH_S)
+def _jobs_table():
+    rows = trabajos.pool.jobs()
+    if not rows:
+        st.caption("No hay trabajos.")
+        return
+    st.dataframe(pd.DataFrame(rows), hide_index=True)
+
+
+def _file_reader(path):
+    """Contenido diferido de `st.download_button`: lee `path` en bloques al hacer clic."""
+    def payload():
+        buffer = io.BytesIO()
+        with open(path, "rb") as source:
+            shutil.copyfileobj(source, buffer, DOWNLOAD_CHUNK_BYTES)
+        buffer.seek(0)
+        return buffer
+    return payload
+
+
+@st.fragment(run_every=REFRESH_S)
+def _finished_exports():
+    exports = [(job, *job.result) for job in trabajos.pool.finished(EXPORT_JOB_PREFIX)
+               if os.path.exists(job.result[0])] # Salvo los archivos que se borraron después
+    if not exports:
+        st.caption("No hay exportaciones terminadas.")
+        return
+    for job, path, rows in exports:
+        info, download = st.columns([4, 1], vertical_alignment="center")
+        info.markdown(f"**{job.name}** · `{os.path.abspath(path)}` · {rows:,} filas · "
+                      f"{os.path.getsize(path) / 1024:,.1f} KiB")
+        download.download_button("Descargar", _file_reader(path), file_name=os.path.basename(path),
+                                 mime="application/octet-stream", on_click="ignore", key=f"export_{job.job_id}")
+
+
+def render():
+    experimentador.require_authorization()
+    st.title("Trabajos en segundo plano")
+
+    # Un formulario: elegir filtros no provoca reruns hasta encolar la exportación
+    with st.form("export_form"):
+        left, right = st.columns(2)
+        label = left.selectbox("Registro", list(EXPORTS))
+        file_format = right.selectbox("Formato", exportacion.FORMATS, format_func=str.upper)
+        selected_variants = left.multiselect("Variantes (vacío = todas)", list(variantes.VARIANTS))
+        selected_groups = right.multiselect("Grupos (vacío = todos)", sorted({
+            group for variant in variantes.VARIANTS.values() for group in variant.group_names}))
+        dates = st.date_input("Fechas (vacío = todas)", value=(), max_value=datetime.date.today())
+        submitted = st.form_submit_button("Exportar")
+    if submitted:
+        export_filter = exportacion.ExportFilter(
+            variants=tuple(selected_variants), groups=tuple(selected_groups),
+            start_date=dates[0] if dates else None, end_date=dates[-1] if dates else None)
+        source = EXPORTS[label]
+        destination = exportacion.export_path(EXPORT_DIR, source, file_format)
+        if source == registro.SCORES_FILE: # Se calculan (o reutilizan) a partir de los bloques
+            job = trabajos.pool.submit(f"{EXPORT_JOB_PREFIX}puntuaciones ({file_format})", puntuacion.export_scores,
+                                       registro.BLOCKS_FILE, source, destination, file_format, export_filter)
+        else:
+            job = trabajos.pool.submit(f"{EXPORT_JOB_PREFIX}{label.lower()} ({file_format})", exportacion.export_records,
+                                       source, destination, file_format, export_filter)
+        st.toast(f"Trabajo {job.job_id} en cola: {destination}")
+
+    st.caption(f"Las exportaciones se escriben en {os.path.abspath(EXPORT_DIR)}. En CSV y Parquet, las columnas "
+               f"son las de las primeras {exportacion.CHUNK_ROWS:,} filas; lo demás queda como JSON en "
+               f"`{exportacion.EXTRAS_COLUMN}`.")
+    st.subheader("Exportaciones terminadas")
+    _finished_exports()
+    st.subheader("Trabajos")
+    _jobs_table()
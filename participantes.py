@@ -0,0 +1,101 @@
+"""
+Padrón de participantes con códigos de un solo uso (opcional).
+
+Con `EXPERIMENTO_ROSTER=1`, el experimentador precarga los códigos de los participantes
+(página "Participantes") y cada sesión debe reclamar uno en la bienvenida para empezar.
+El padrón guarda solo el SHA-256 de cada código, como un archivo `<hash>.token` en
+`EXPERIMENTO_DATA_DIR/participantes/`: buscar un código es comprobar un nombre de
+archivo, sin leer ni recorrer el padrón. Reclamarlo es crear `<hash>.claim` con
+`O_CREAT | O_EXCL` (igual que las ranuras de `agregados_compartidos`): entre todas las
+sesiones y procesos solo una lo consigue, y una segunda participación se rechaza en el
+acto.
+
+El hash queda en los resultados y en el registro como `participant`; `token_hash()`
+aplicado a la lista original de códigos da la misma clave para unirlos con datos
+externos.
+"""
+import hashlib
+import json
+import os
+import time
+
+import registro
+
+# --- Parámetros del padrón (constantes) ---
+ROSTER_MODE = os.environ.get("EXPERIMENTO_ROSTER", "") == "1"
+ROSTER_DIR = os.path.join(registro.DATA_DIR, "participantes")
+
+CLAIMED = "reclamado"
+UNKNOWN = "desconocido"
+ALREADY_USED = "usado"
+
+
+def token_hash(token):
+    """Clave del participante: SHA-256 del código sin espacios y en mayúsculas."""
+    return hashlib.sha256(token.strip().upper().encode("utf-8")).hexdigest()
+
+
+def _path(digest, extension, roster_dir):
+    return os.path.join(roster_dir, f"{digest}.{extension}")
+
+
+def add_tokens(tokens, roster_dir=ROSTER_DIR):
+    """Agrega los códigos al padrón (los repetidos se ignoran); devuelve cuántos son nuevos."""
+    os.makedirs(roster_dir, exist_ok=True)
+    added = 0
+    for token in tokens:
+        if not token.strip():
+            continue
+        try:
+            os.close(os.open(_path(token_hash(token), "token", roster_dir), os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            added += 1
+        except FileExistsError:
+            pass
+    return added
+
+
+def claim(token, session_id, variant_name, roster_dir=ROSTER_DIR):
+    """Reclama el código para la sesión; devuelve (CLAIMED, UNKNOWN o ALREADY_USED, hash)."""
+    digest = token_hash(token)
+    if not token.strip() or not os.path.exists(_path(digest, "token", roster_dir)):
+        return UNKNOWN, digest
+    try:
+        fd = os.open(_path(digest, "claim", roster_dir), os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        return ALREADY_USED, digest
+    with os.fdopen(fd, "w", encoding="utf-8") as claim_file:
+        json.dump({"session_id": session_id, "variant": variant_name, "claimed_at": time.time()}, claim_file)
+    return CLAIMED, digest
+
+
+def release(digest, roster_dir=ROSTER_DIR):
+    """Vuelve a habilitar un código reclamado (por ejemplo, si la sesión se cortó)."""
+    try:
+        os.remove(_path(digest, "claim", roster_dir))
+    except FileNotFoundError:
+        return False
+    return True
+
+
+def claims(roster_dir=ROSTER_DIR):
+    """Filas (dict) de los códigos reclamados, el más reciente primero."""
+    rows = []
+    if not os.path.isdir(roster_dir):
+        return rows
+    for entry in os.scandir(roster_dir):
+        if not entry.name.endswith(".claim"):
+            continue
+        try:
+            with open(entry.path, encoding="utf-8") as claim_file:
+                record = json.load(claim_file)
+        except (OSError, ValueError): # Reclamo recién creado, todavía sin contenido
+            record = {}
+        rows.append({"participant": entry.name.removesuffix(".claim"), **record})
+    return sorted(rows, key=lambda row: row.get("claimed_at", 0), reverse=True)
+
+
+def roster_size(roster_dir=ROSTER_DIR):
+    """Cantidad de códigos cargados."""
+    if not os.path.isdir(roster_dir):
+        return 0
+    return sum(1 for entry in os.scandir(roster_dir) if entry.name.endswith(".token"))
@@ -0,0 +1,197 @@
+"""
+Perfilador bajo demanda para una sesión concreta del experimento.
+
+Cuando una máquina del laboratorio "se siente lenta", el experimentador abre (o
+recarga) la página de ese participante con `?perfil=<EXPERIMENTO_PROFILE_TOKEN>` y,
+desde ese momento, cada rerun de esa sesión se ejecuta bajo cProfile y/o un perfilador
+por muestreo. Por cada fase se escribe en `EXPERIMENTO_PROFILE_DIR/<sesión>/`:
+- `<fase>.pstats`: estadísticas acumuladas de cProfile (`python -m pstats`, snakeviz),
+- `<fase>.folded`: pilas muestreadas en formato "plegado" (flamegraph.pl, speedscope),
+- `reruns.csv`: fase, tiempo de pared y CPU de cada rerun perfilado.
+
+`&perfil_modo=cprofile|muestreo|ambos` elige el perfilador (por defecto, ambos). Si no
+se define el token, el módulo no registra nada: las sesiones sin perfilar no pagan
+costo alguno. Con el token definido, una sesión sin perfilar paga una consulta a
+`st.query_params` por rerun.
+"""
+import cProfile
+import csv
+import hmac
+import logging
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+from collections import Counter
+
+import streamlit as st
+
+import instrumentacion
+
+logger = logging.getLogger(__name__)
+
+# --- Parámetros del perfilador (constantes) ---
+PROFILE_TOKEN = os.environ.get("EXPERIMENTO_PROFILE_TOKEN", "") # Vacío = perfilador deshabilitado
+PROFILE_DIR = os.environ.get("EXPERIMENTO_PROFILE_DIR", "perfiles")
+PROFILE_QUERY_PARAM = "perfil"
+PROFILE_MODE_QUERY_PARAM = "perfil_modo"
+PROFILE_MODES = ("cprofile", "muestreo", "ambos")
+SAMPLE_INTERVAL_S = 0.005
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    # ";" separa los marcos en el formato plegado
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})".replace(";", ",")
+
+
+def _fold_stack(frame):
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+class _StackSampler:
+    """Hilo que muestrea la pila de otro hilo cada `SAMPLE_INTERVAL_S` segundos."""
+
+    def __init__(self, thread_id, stacks):
+        self._thread_id = thread_id
+        self._stacks = stacks # Counter de pilas plegadas -> muestras
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="perfilador-muestreo", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop_event.wait(SAMPLE_INTERVAL_S):
+            frame = sys._current_frames().get(self._thread_id)
+            if frame is not None:
+                self._stacks[_fold_stack(frame)] += 1
+
+
+class SessionProfiler:
+    """Perfila los reruns de una sesión y acumula los resultados por fase."""
+
+    def __init__(self, session_id, mode):
+        self.mode = mode
+        session_label = re.sub(r"\W", "", session_id)[:8]
+        self.output_dir = os.path.join(PROFILE_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}_{session_label}")
+        os.makedirs(self.output_dir, exist_ok=True)
+        self._stats = {} # fase -> pstats.Stats acumulado
+        self._stacks = {} # fase -> Counter de pilas plegadas
+        self._profile = None
+        self._sampler = None
+
+    def start(self, phase):
+        phase = phase or "UNKNOWN"
+        self.discard_unfinished()
+        if self.mode in ("cprofile", "ambos"):
+            self._profile = cProfile.Profile()
+            try:
+                self._profile.enable()
+            except ValueError: # Otro perfilador ya está activo en el intérprete
+                logger.warning("No se pudo activar cProfile en %s", self.output_dir)
+                self._profile = None
+        if self.mode in ("muestreo", "ambos"):
+            self._sampler = _StackSampler(threading.get_ident(), self._stacks.setdefault(phase, Counter()))
+            self._sampler.start()
+
+    def stop(self, phase, wall_s, cpu_s):
+        phase = phase or "UNKNOWN"
+        profile, self._profile = self._profile, None
+        sampler, self._sampler = self._sampler, None
+        if profile is not None:
+            profile.disable()
+        if sampler is not None:
+            sampler.stop()
+
+        # La escritura ocurre con los perfiladores ya detenidos
+        if profile is not None:
+            if phase in self._stats:
+                self._stats[phase].add(profile)
+            else:
+                self._stats[phase] = pstats.Stats(profile)
+            self._stats[phase].dump_stats(os.path.join(self.output_dir, f"{phase}.pstats"))
+        if sampler is not None:
+            lines = [f"{stack} {count}\n" for stack, count in self._stacks[phase].most_common()]
+            self._write_atomic(f"{phase}.folded", "".join(lines))
+        self._append_rerun(phase, wall_s, cpu_s)
+
+    def discard_unfinished(self):
+        """Detiene los perfiladores de un rerun que no llegó a `stop()` (terminó con una excepción)."""
+        # Un rerun que terminó con una excepción no pasa por `stop()`
+        if self._profile is not None:
+            self._profile.disable()
+            self._profile = None
+        if self._sampler is not None:
+            self._sampler.stop()
+            self._sampler = None
+
+    def _write_atomic(self, filename, text):
+        path = os.path.join(self.output_dir, filename)
+        with open(f"{path}.tmp", "w", encoding="utf-8") as output_file:
+            output_file.write(text)
+        os.replace(f"{path}.tmp", path)
+
+    def _append_rerun(self, phase, wall_s, cpu_s):
+        path = os.path.join(self.output_dir, "reruns.csv")
+        write_header = not os.path.exists(path)
+        with open(path, "a", newline="", encoding="utf-8") as reruns_file:
+            writer = csv.writer(reruns_file)
+            if write_header:
+                writer.writerow(["phase", "wall_s", "cpu_s"])
+            writer.writerow([phase, f"{wall_s:.6f}", f"{cpu_s:.6f}"])
+
+
+# Sesiones perfiladas de este proceso: session_id -> SessionProfiler. Vive fuera de
+# `st.session_state` para sobrevivir a los reinicios que borran todas sus claves.
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def _requested_mode():
+    """Modo pedido en la URL de la sesión actual, o None si el token no coincide."""
+    token = st.query_params.get(PROFILE_QUERY_PARAM)
+    if not token or not hmac.compare_digest(token, PROFILE_TOKEN):
+        return None
+    mode = st.query_params.get(PROFILE_MODE_QUERY_PARAM, "ambos")
+    return mode if mode in PROFILE_MODES else "ambos"
+
+
+def _on_rerun_start(phase):
+    """Observador de inicio de `instrumentacion`: activa el perfilador si la URL lo pide."""
+    session_id = instrumentacion.current_session_id()
+    mode = _requested_mode()
+    with _sessions_lock:
+        profiler = _sessions.get(session_id)
+        if mode is None: # Sin token (o se quitó de la URL): la sesión no se perfila
+            if profiler is not None:
+                profiler.discard_unfinished()
+                del _sessions[session_id]
+            return
+        if profiler is None or profiler.mode != mode:
+            profiler = _sessions[session_id] = SessionProfiler(session_id, mode)
+            logger.info("Perfilando la sesión %s en %s", session_id, profiler.output_dir)
+    profiler.start(phase)
+
+
+def _on_rerun_end(phase, wall_s, cpu_s):
+    """Observador de `instrumentacion`: detiene el perfilador y guarda los resultados."""
+    with _sessions_lock:
+        profiler = _sessions.get(instrumentacion.current_session_id())
+    if profiler is not None:
+        profiler.stop(phase, wall_s, cpu_s)
+
+
+if PROFILE_TOKEN:
+    instrumentacion.add_rerun_start_listener(_on_rerun_start)
+    instrumentacion.add_rerun_listener(_on_rerun_end)
@@ -0,0 +1,310 @@
+"""
+Puntuación de las sesiones: resumen final versionado y memoizado.
+
+Cada fórmula del resumen (errores totales, coeficiente de aprendizaje, resultado del
+dinero, detalle por bloque) es una función registrada con `@scorer("<id>")`. Cambiar una
+fórmula es registrar una versión nueva y apuntar `CURRENT_SCORER` a ella: las versiones
+anteriores siguen disponibles para recalcular o comparar puntuaciones viejas.
+
+`data_hash` resume todo lo que entra en el cálculo (los campos de puntuación de cada
+bloque, el dinero final y la configuración de la variante y el grupo que usan las
+fórmulas). `iter_scores` reconstruye las sesiones desde `bloques.jsonl` a medida que lo
+lee y guarda cada resultado en `puntuaciones.jsonl` (`ScoreStore`) con la clave (hash de
+los datos, versión): las siguientes llamadas reutilizan lo guardado y solo puntúan las
+sesiones con bloques nuevos o las que falta puntuar con una versión nueva. El almacén
+solo crece por el final; una sesión que sumó bloques tiene otro hash y su fila anterior
+queda sin usar. Varios trabajos pueden agregar al almacén a la vez: cada escritura toma
+un `flock` exclusivo sobre el archivo. `export_scores` escribe cada fila apenas la obtiene, así que su memoria
+no crece con el registro.
+
+El módulo no importa `registro` ni tiene efectos al importarse: `load_scores` y
+`export_scores` son trabajos de `trabajos` y reciben las rutas como argumentos.
+"""
+import hashlib
+import json
+import os
+
+try:
+    import fcntl
+except ImportError: # Sin fcntl (Windows) no se bloquea el almacén; `get` igual verifica la clave de cada línea
+    fcntl = None
+
+import exportacion
+import variantes
+
+# --- Parámetros de la puntuación (constantes) ---
+CURRENT_SCORER = "resumen@2"
+SCORING_FIELDS = ("block", "success", "errors", "time_taken_s") # Campos de cada bloque que usan las fórmulas
+SESSION_GAP_S = 3600 # Sin bloques nuevos durante este tiempo (según el registro), la sesión se abandonó
+STALE_CHECK_ROWS = 1000 # Cada cuántas filas del registro se buscan sesiones abandonadas
+
+SCORERS = {}
+
+
+def scorer(version):
+    """Registra una función (variant, group_name, blocks_results, final_money) -> dict como `version`."""
+    def register(function):
+        if version in SCORERS:
+            raise ValueError(f"Versión de puntuación repetida: {version!r}")
+        SCORERS[version] = function
+        return function
+    return register
+
+
+def _learning_coefficient(variant, blocks_results):
+    """
+    Coeficiente de aprendizaje: errores (o tiempo) del bloque 1 contra los últimos bloques.
+    Devuelve (texto para los resultados, valor numérico o None si no hay uno).
+    """
+    block1_data = next((res for res in blocks_results if res['block'] == 1), None)
+    if not block1_data: # No data for block 1 at all (not completed)
+        return "N/A (Bloque 1 no completado o datos no disponibles)", None
+
+    only_successful = variant.learning_coefficient == "exitosos"
+    compared = [res for res in blocks_results if res['block'] in variant.coefficient_blocks]
+    errors_compared = [res['errors'] for res in compared if res['success'] or not only_successful]
+    times_compared_successful = [res['time_taken_s'] for res in compared if res['success']]
+    blocks_text = " o ".join(str(block) for block in variant.coefficient_blocks)
+
+    block1_errors = block1_data['errors']
+    if block1_errors > 0:
+        if errors_compared: # If we have errors from a later block to compare
+            coefficient_val = (block1_errors - min(errors_compared)) / block1_errors
+            return f"{coefficient_val:.2f}", coefficient_val
+        return ("No aplica (sin datos suficientes para comparar mejora de errores en bloques "
+                f"{blocks_text}{' exitosos' if only_successful else ''})"), None
+
+    # Special case: 0 errors in block 1
+    block1_time_s = block1_data['time_taken_s']
+    if not block1_data['success']:
+        return "Perfecto (0 errores en Bloque 1)", None # Assumed perfect and no specific comparison needed
+    if times_compared_successful and block1_time_s > 0: # Avoid division by zero
+        coefficient_val = (block1_time_s - min(times_compared_successful)) / block1_time_s
+        return f"{coefficient_val:.2f} (basado en tiempo)", coefficient_val
+    return "Perfecto (0 errores en Bloque 1, no hay tiempos posteriores exitosos para comparar)", None
+
+
+@scorer("resumen@1")
+def final_summary_v1(variant, group_name, blocks_results, final_money):
+    """Resumen de la pantalla de resultados (el cálculo original del experimento)."""
+    group = variant.groups[group_name]
+    summary = {"total_errors": sum(block_res['errors'] for block_res in blocks_results)}
+    if variant.learning_coefficient != "no":
+        summary["learning_coefficient"], _ = _learning_coefficient(variant, blocks_results)
+
+    money_difference = final_money - group.initial_money
+    if group.rewards.kind == "perdida": # Solo se puede perder dinero
+        if money_difference < 0:
+            summary["money_outcome_description"] = f"Pérdida Total: ${abs(money_difference):,.0f}"
+        else:
+            summary["money_outcome_description"] = "No hubo pérdidas."
+    elif money_difference > 0:
+        summary["money_outcome_description"] = f"Ganancia Total: ${money_difference:,.0f}"
+    elif money_difference < 0: # Grupo híbrido con más pérdidas que ganancias
+        summary["money_outcome_description"] = f"Pérdida Total: ${abs(money_difference):,.0f}"
+    else:
+        summary["money_outcome_description"] = "No hubo ganancias."
+
+    # Errores y tiempos de los bloques que se detallan en los resultados
+    for block in variant.block_detail:
+        block_res = next((res for res in blocks_results if res['block'] == block), None)
+        summary[f"errors_block{block}"] = block_res['errors'] if block_res else "N/A"
+        if block_res is None:
+            summary[f"time_block{block}_s"] = "N/A"
+        elif block_res['success']:
+            summary[f"time_block{block}_s"] = f"{block_res['time_taken_s']:.2f}s"
+        else:
+            summary[f"time_block{block}_s"] = "No completado"
+    return summary
+
+
+@scorer("resumen@2")
+def final_summary_v2(variant, group_name, blocks_results, final_money):
+    """`resumen@1` más valores numéricos para la inferencia: tasa de éxito y coeficiente de aprendizaje."""
+    summary = final_summary_v1(variant, group_name, blocks_results, final_money)
+    completed = sum(bool(res['success']) for res in blocks_results)
+    summary["success_rate"] = completed / len(blocks_results) if blocks_results else None
+    summary["learning_coefficient_value"] = (
+        None if variant.learning_coefficient == "no" else _learning_coefficient(variant, blocks_results)[1])
+    return summary
+
+
+def data_hash(variant, group_name, blocks_results, final_money):
+    """Huella de los datos de una sesión y de la configuración que usan las fórmulas."""
+    group = variant.groups[group_name]
+    payload = {
+        "variant": variant.name,
+        "group": group_name,
+        "learning_coefficient": variant.learning_coefficient,
+        "coefficient_blocks": variant.coefficient_blocks,
+        "block_detail": variant.block_detail,
+        "initial_money": group.initial_money,
+        "rewards": (group.rewards.success_rewards, group.rewards.failure_penalties),
+        "blocks": [[res.get(key) for key in SCORING_FIELDS] for res in blocks_results],
+        "final_money": final_money,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def score(variant, group_name, blocks_results, final_money, version=CURRENT_SCORER):
+    """Resumen de una sesión con la fórmula `version`."""
+    if version not in SCORERS:
+        raise ValueError(f"Versión de puntuación desconocida {version!r}; válidas: {list(SCORERS)}")
+    return SCORERS[version](variant, group_name, blocks_results, final_money)
+
+
+def final_money(group, blocks_results):
+    """Dinero al final de los bloques jugados, con las reglas de recompensa del grupo."""
+    money = group.initial_money
+    success_count = 0
+    for res in blocks_results:
+        success_count += bool(res['success'])
+        money += group.rewards.money_change(res['block'], success_count, res['success'])
+    return money
+
+
+def logged_sessions(blocks_file):
+    """
+    Generador de las sesiones del registro de bloques: dicts con session_id, participant,
+    variant, group, started_at, logged_at y blocks_results. Una pestaña del modo kiosco (o
+    un reinicio) reutiliza el session_id; un bloque que no sigue al anterior empieza otra
+    sesión. Cada sesión se entrega al cerrarse (al jugar el último bloque de su variante,
+    al empezar otra con su session_id, tras `SESSION_GAP_S` sin bloques suyos en el
+    registro o al final del archivo), así que solo las abiertas ocupan memoria.
+    """
+    if not os.path.exists(blocks_file):
+        return
+    open_sessions = {}
+    with open(blocks_file, encoding="utf-8") as log_file:
+        for line_number, line in enumerate(log_file):
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            session_id = row.get("session_id")
+            session = open_sessions.get(session_id)
+            if session is not None and row["block"] <= session["blocks_results"][-1]["block"]:
+                yield open_sessions.pop(session_id)
+                session = None
+            if session is None:
+                session = open_sessions[session_id] = {
+                    "session_id": session_id,
+                    "participant": row.get("participant"),
+                    "variant": row.get("variant"),
+                    "group": row.get("group"),
+                    "started_at": row.get("logged_at"),
+                    "blocks_results": [],
+                }
+            session["logged_at"] = row.get("logged_at")
+            session["blocks_results"].append({key: row.get(key) for key in SCORING_FIELDS})
+            variant = variantes.VARIANTS.get(session["variant"])
+            if variant is not None and row["block"] >= variant.max_blocks:
+                yield open_sessions.pop(session_id)
+            if line_number % STALE_CHECK_ROWS == 0 and row.get("logged_at") is not None:
+                for stale_id in [stale_id for stale_id, stale in open_sessions.items()
+                                 if row["logged_at"] - (stale["logged_at"] or 0) > SESSION_GAP_S]:
+                    yield open_sessions.pop(stale_id) # Sesión abandonada
+    yield from open_sessions.values()
+
+
+class ScoreStore:
+    """
+    Puntuaciones guardadas en `scores_file`. En memoria solo queda el índice
+    (hash de los datos, versión) -> posición de su línea; el resumen se lee al reutilizarlo.
+    """
+
+    def __init__(self, scores_file):
+        self._index = {}
+        os.makedirs(os.path.dirname(scores_file) or ".", exist_ok=True)
+        self._file = open(scores_file, "a+b")
+        self._file.seek(0)
+        offset = 0
+        for line in self._file:
+            try:
+                entry = json.loads(line) if line.endswith(b"\n") else None # Sin terminar: escritura interrumpida
+            except ValueError: # Escritura interrumpida que ya se cerró con un salto de línea
+                entry = None
+            if entry:
+                self._index[(entry["data_hash"], entry["scorer"])] = offset
+            offset += len(line)
+
+    def get(self, digest, version):
+        offset = self._index.get((digest, version))
+        if offset is None:
+            return None
+        self._file.seek(offset)
+        try:
+            entry = json.loads(self._file.readline())
+        except ValueError:
+            entry = None
+        if not entry or (entry["data_hash"], entry["scorer"]) != (digest, version): # No debería pasar; se recalcula
+            del self._index[(digest, version)]
+            return None
+        return entry["summary"]
+
+    def put(self, digest, version, summary):
+        line = (json.dumps({"data_hash": digest, "scorer": version, "summary": summary}, ensure_ascii=False)
+                + "\n").encode("utf-8")
+        if fcntl is not None: # Otro proceso no puede agregar entre la posición y la escritura
+            fcntl.flock(self._file, fcntl.LOCK_EX)
+        try:
+            end = self._file.seek(0, os.SEEK_END)
+            if end and self._last_byte(end) != b"\n": # Termina la línea interrumpida para no pegarle la nueva
+                self._file.write(b"\n")
+                end += 1
+            self._file.write(line)
+            self._file.flush()
+        finally:
+            if fcntl is not None:
+                fcntl.flock(self._file, fcntl.LOCK_UN)
+        self._index[(digest, version)] = end
+
+    def _last_byte(self, end):
+        self._file.seek(end - 1)
+        last = self._file.read(1)
+        self._file.seek(end)
+        return last
+
+    def close(self):
+        self._file.close()
+
+
+def iter_scores(blocks_file, scores_file, version=CURRENT_SCORER):
+    """
+    Generador de una fila por sesión registrada con su resumen según `version`.
+    Reutiliza las puntuaciones guardadas en `scores_file` y agrega cada una que falta
+    apenas la calcula.
+    """
+    store = ScoreStore(scores_file)
+    try:
+        for session in logged_sessions(blocks_file):
+            variant = variantes.VARIANTS.get(session["variant"])
+            if variant is None or session["group"] not in variant.groups: # Variante o grupo que ya no existe
+                continue
+            blocks_results = session.pop("blocks_results")
+            money = final_money(variant.groups[session["group"]], blocks_results)
+            digest = data_hash(variant, session["group"], blocks_results, money)
+            summary = store.get(digest, version)
+            if summary is None:
+                summary = score(variant, session["group"], blocks_results, money, version)
+                store.put(digest, version, summary)
+            yield {**session, "scorer": version, "blocks": len(blocks_results), "final_money": money, **summary}
+    finally:
+        store.close()
+
+
+def load_scores(blocks_file, scores_file, version=CURRENT_SCORER):
+    """Lista de las filas de `iter_scores` (para los paneles, que las usan en memoria)."""
+    return list(iter_scores(blocks_file, scores_file, version))
+
+
+def export_scores(blocks_file, scores_file, destination, file_format, export_filter=exportacion.ExportFilter()):
+    """Exporta las puntuaciones actuales (filtradas) como `exportacion.export_records`; devuelve (ruta, filas)."""
+    temporary = f"{destination}.jsonl.tmp"
+    os.makedirs(os.path.dirname(destination) or ".", exist_ok=True)
+    with open(temporary, "w", encoding="utf-8") as output:
+        for row in iter_scores(blocks_file, scores_file): # Cada fila se escribe apenas se puntúa
+            output.write(json.dumps(row, ensure_ascii=False) + "\n")
+    try:
+        return exportacion.export_records(temporary, destination, file_format, export_filter)
+    finally:
+        os.remove(temporary)
@@ -0,0 +1,90 @@
+"""
+Motor de recompensas por tablas para cualquier número de bloques.
+
+Cada grupo tiene un `RewardSchedule` compilado a partir de dos tablas de su variante:
+- `success_rewards`: lo que se gana al completar con éxito el 1.º, 2.º, ... bloque
+  (por número de éxitos, no por índice de bloque),
+- `failure_penalties`: lo que se pierde al fallar el bloque 1, 2, ... (por índice).
+
+Un grupo con solo la primera es de ganancia, con solo la segunda de pérdida y con las
+dos, híbrido. Cada tabla tiene exactamente un monto por bloque (o no se usa), así que
+ningún bloque queda sin definir. Las tablas se completan con ceros al compilar, de modo
+que `money_change` es una sola indexación por bloque, y la misma tabla alimenta el
+texto de las instrucciones (`reward_lines`) y la simulación por lotes (`simulate`).
+"""
+from dataclasses import dataclass
+
+import numpy as np
+
+ORDINALS = ("Primer", "Segundo", "Tercer", "Cuarto", "Quinto", "Sexto", "Séptimo", "Octavo", "Noveno", "Décimo")
+
+
+def ordinal(number):
+    """Ordinal en palabras hasta el décimo ("Primer"); después, en cifras ("11.º")."""
+    return ORDINALS[number - 1] if number <= len(ORDINALS) else f"{number}.º"
+
+
+@dataclass(frozen=True)
+class RewardSchedule:
+    """Tablas de ganancia/pérdida de un grupo, densas para `num_blocks` bloques."""
+    num_blocks: int
+    success_rewards: tuple # Tal como en la configuración (vacía = sin ganancias)
+    failure_penalties: tuple # Tal como en la configuración (vacía = sin pérdidas)
+    gain_by_success_count: tuple # Índice 0..num_blocks; el 0 nunca se usa al ganar
+    loss_by_block: tuple # Índice 0..num_blocks; el 0 nunca se usa al perder
+
+    @classmethod
+    def from_tables(cls, num_blocks, success_rewards=(), failure_penalties=()):
+        for table in (success_rewards, failure_penalties):
+            if table and len(table) != num_blocks:
+                raise ValueError(f"la tabla necesita exactamente {num_blocks} montos, tiene {len(table)}")
+        return cls(
+            num_blocks=num_blocks,
+            success_rewards=tuple(success_rewards),
+            failure_penalties=tuple(failure_penalties),
+            gain_by_success_count=(0, *(success_rewards or (0,) * num_blocks)),
+            loss_by_block=(0, *(failure_penalties or (0,) * num_blocks)),
+        )
+
+    @property
+    def kind(self):
+        """"ganancia", "perdida" o "hibrido"."""
+        if self.success_rewards and self.failure_penalties:
+            return "hibrido"
+        return "ganancia" if self.success_rewards else "perdida"
+
+    def money_change(self, block, success_count, completed):
+        """
+        Cambio de dinero al terminar el bloque `block` (1..num_blocks). `success_count`
+        incluye este bloque si se completó con éxito.
+        """
+        return self.gain_by_success_count[success_count] if completed else -self.loss_by_block[block]
+
+    def simulate(self, outcomes):
+        """
+        Cambio neto de dinero de muchos participantes a la vez. `outcomes` es un arreglo
+        booleano (participantes x bloques) con True en los bloques completados.
+        """
+        outcomes = np.asarray(outcomes, dtype=bool).reshape(-1, self.num_blocks)
+        gains = np.asarray(self.gain_by_success_count)
+        losses = np.asarray(self.loss_by_block[1:])
+        success_counts = np.cumsum(outcomes, axis=1)
+        return np.where(outcomes, gains[success_counts], -losses).sum(axis=1)
+
+    def reward_lines(self, target_threshold):
+        """Líneas HTML de la lógica de recompensa para las instrucciones."""
+        lines = []
+        if self.success_rewards:
+            lines.append(f"Por cada bloque que completes con éxito (llegando a {target_threshold} o menos):<br/>")
+            for index, amount in enumerate(self.success_rewards):
+                extra = " adicionales" if index else ""
+                lines.append(f"- {ordinal(index + 1)} bloque exitoso: ganas <span style='font-weight:bold;'>${amount:,.0f}</span>{extra}.<br/>")
+            lines.append("<span style='font-weight:bold;'>Tu objetivo es ganar la mayor cantidad de dinero posible.</span>")
+        if self.failure_penalties:
+            lines.append("Por cada bloque que <span style='font-weight:bold; text-decoration:underline;'>NO</span> completes con éxito "
+                         f"(no llegando a {target_threshold} o menos en el tiempo asignado):<br/>")
+            for index, amount in enumerate(self.failure_penalties):
+                extra = " adicionales" if index else ""
+                lines.append(f"- {ordinal(index + 1)} bloque fallido: pierdes <span style='font-weight:bold;'>${amount:,.0f}</span>{extra}.<br/>")
+            lines.append("<span style='font-weight:bold;'>Tu objetivo es evitar perder la mayor cantidad de dinero posible.</span>")
+        return lines
@@ -0,0 +1,100 @@
+"""
+Registro persistente de respuestas y bloques de todos los participantes.
+
+Al terminar cada bloque, `log_block` encola el resultado del bloque y sus respuestas
+(con el paso de la secuencia de cada una) para que un hilo de escritura los agregue a
+`EXPERIMENTO_DATA_DIR/respuestas.jsonl` y `EXPERIMENTO_DATA_DIR/bloques.jsonl`, una fila
+JSON por línea con la sesión, la variante y el grupo. `log_session` archiva del mismo
+modo el registro final de cada participante en `sesiones.jsonl`. El rerun del
+participante solo paga el `put` en la cola; la profundidad de la cola se expone en
+`metricas`. El hilo lo inicia `start_writer()` desde el servidor (`experimento.run`), no
+el import. Es la fuente de datos de `analitica`.
+"""
+import json
+import logging
+import os
+import queue
+import threading
+import time
+
+import instrumentacion
+import metricas
+
+logger = logging.getLogger(__name__)
+
+# --- Parámetros del registro (constantes) ---
+DATA_DIR = os.environ.get("EXPERIMENTO_DATA_DIR", "datos")
+ANSWERS_FILE = os.path.join(DATA_DIR, "respuestas.jsonl")
+BLOCKS_FILE = os.path.join(DATA_DIR, "bloques.jsonl")
+SESSIONS_FILE = os.path.join(DATA_DIR, "sesiones.jsonl")
+SCORES_FILE = os.path.join(DATA_DIR, "puntuaciones.jsonl") # Lo escribe `puntuacion`, no el hilo de este módulo
+
+
+class _JsonlWriter:
+    """Hilo único que agrega filas a archivos JSONL en el orden en que se encolaron."""
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def start(self):
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="registro-escritura", daemon=True)
+                self._thread.start()
+
+    def put(self, path, rows):
+        self._queue.put((path, rows))
+
+    def depth(self):
+        return self._queue.qsize()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            while not self._queue.empty(): # Agrupa lo pendiente en una sola escritura por archivo
+                batch.append(self._queue.get_nowait())
+            lines_by_path = {}
+            for path, rows in batch:
+                lines_by_path.setdefault(path, []).extend(json.dumps(row, ensure_ascii=False, default=str) + "\n" for row in rows)
+            for path, lines in lines_by_path.items():
+                try:
+                    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+                    with open(path, "a", encoding="utf-8") as log_file:
+                        log_file.writelines(lines)
+                except OSError:
+                    logger.exception("No se pudieron escribir %d filas en %s", len(lines), path)
+
+
+_writer = _JsonlWriter()
+metricas.register_queue_gauge("registro", _writer.depth)
+
+
+def start_writer():
+    """Inicia (una sola vez por proceso) el hilo de escritura; lo encolado antes se escribe al iniciarlo."""
+    _writer.start()
+
+
+def log_block(variant_name, group, block_result, block_answers, participant=None):
+    """Encola el resultado de un bloque y sus respuestas para escribirlos en disco."""
+    context = {
+        "session_id": instrumentacion.current_session_id(),
+        "participant": participant, # Hash del código del padrón (None sin modo padrón)
+        "variant": variant_name,
+        "group": group,
+        "logged_at": time.time(),
+    }
+    _writer.put(ANSWERS_FILE, [{**context, **answer} for answer in block_answers])
+    _writer.put(BLOCKS_FILE, [{**context, **block_result}])
+
+
+def log_session(variant_name, group, record):
+    """Encola el registro final de un participante (resultados, resumen y cuestionario)."""
+    _writer.put(SESSIONS_FILE, [{
+        "session_id": instrumentacion.current_session_id(),
+        "variant": variant_name,
+        "group": group,
+        "logged_at": time.time(),
+        **record,
+    }])
@@ -0,0 +1,79 @@
+"""
+Servidor único con todas las variantes del experimento.
+
+    streamlit run servidor.py
+
+Cada variante de `config_variantes/` es una página del mismo proceso, en `/<nombre>`
+(por ejemplo `/ganancia_v2`) o, a partir del código de estudio que recibe el
+participante, en `/?estudio=<código>`. Sin código en la URL, la página inicial lo pide.
+Todas las páginas comparten el intérprete ya cargado (Streamlit, pandas), el motor de
+`experimento.py`, las variantes compiladas, el control de admisión y las métricas, que
+reportan el uso de recursos por variante (`experimento_variant_*`). La navegación está
+oculta: un participante solo ve la variante a la que llegó.
+
+Con `EXPERIMENTO_ADMIN_TOKEN` definido se publican además las páginas del experimentador
+(ver `experimentador`), por ejemplo `/analitica?clave=<token>`.
+"""
+import functools
+
+import streamlit as st
+
+import experimentador
+import experimento
+import metricas
+import panel_analitica
+import panel_consultas
+import panel_efecto
+import panel_en_vivo
+import panel_participantes
+import panel_sesiones
+import panel_trabajos
+import registro
+import variantes
+
+# --- Parámetros del servidor (constantes) ---
+STUDY_QUERY_PARAM = "estudio"
+
+
+def render_study_selector(pages):
+    """Página inicial: enruta por `?estudio=<código>` o pide el código al participante."""
+    variant = variantes.find_by_study_code(st.query_params.get(STUDY_QUERY_PARAM))
+    if variant is not None:
+        st.switch_page(pages[variant.name])
+
+    st.markdown(experimento.GLOBAL_STYLES, unsafe_allow_html=True)
+    st.markdown("<h1 style='text-align: center; color:#4a235a; font-size: 3em; font-weight: bold;'>Experimento de Motivación Cognitiva</h1>", unsafe_allow_html=True)
+    st.markdown("<p style='text-align: center; color:#666666; font-size:1.2em;'>Ingresa el código de estudio que te entregó el experimentador.</p>", unsafe_allow_html=True)
+    with st.form("codigo_estudio"):
+        code = st.text_input("Código de estudio")
+        submitted = st.form_submit_button("Comenzar")
+    if submitted:
+        variant = variantes.find_by_study_code(code)
+        if variant is None:
+            st.error("El código de estudio no es válido.")
+        else:
+            st.switch_page(pages[variant.name])
+
+
+def main():
+    metricas.start_exporters() # Una sola vez por proceso
+    registro.start_writer()
+    pages = {
+        name: st.Page(functools.partial(experimento.run, name), title=variant.page_title, url_path=name)
+        for name, variant in variantes.VARIANTS.items()
+    }
+    selector = st.Page(functools.partial(render_study_selector, pages), title="Experimento de Motivación Cognitiva",
+                       url_path="", default=True)
+    admin_pages = []
+    if experimentador.ADMIN_TOKEN:
+        admin_pages.append(st.Page(panel_en_vivo.render, title="Experimento en vivo", url_path="en_vivo"))
+        admin_pages.append(st.Page(panel_analitica.render, title="Errores por paso", url_path="analitica"))
+        admin_pages.append(st.Page(panel_sesiones.render, title="Sesiones sospechosas", url_path="sospechosas"))
+        admin_pages.append(st.Page(panel_trabajos.render, title="Trabajos", url_path="trabajos"))
+        admin_pages.append(st.Page(panel_consultas.render, title="Consultas", url_path="consultas"))
+        admin_pages.append(st.Page(panel_participantes.render, title="Participantes", url_path="participantes"))
+        admin_pages.append(st.Page(panel_efecto.render, title="Efecto Ganancia vs Pérdida", url_path="efecto"))
+    st.navigation([selector, *pages.values(), *admin_pages], position="hidden").run()
+
+
+main()
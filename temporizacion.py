@@ -0,0 +1,155 @@
+"""
+Temporización monotónica de bloques y respuestas.
+
+El servidor mide con `time.perf_counter_ns()` (no salta con ajustes de NTP) y cada
+respuesta trae además las marcas `performance.now()` del navegador (ver
+`entrada_respuesta`). `time_taken_s` y los tiempos de reacción se calculan con el reloj
+del cliente, que no incluye la latencia de red ni la del rerun; si el reloj del cliente
+se desfasa del servidor más de lo tolerado, se marca y se usa el del servidor.
+
+Además se calibra la sobrecarga de cada bloque: el tiempo de ejecución del script de
+cada rerun (medido en el servidor) y la espera del participante entre enviar una
+respuesta y ver el número siguiente (medida en el cliente; incluye el envío de los
+deltas y la red). Los bloques cuya sobrecarga supera `OVERHEAD_THRESHOLD_S` se marcan
+para poder excluirlos o corregirlos en el análisis.
+"""
+import time
+
+import streamlit as st
+
+import agregados
+import deteccion
+import instrumentacion
+import metricas
+
+# --- Parámetros de temporización (constantes) ---
+CLOCK_SKEW_TOLERANCE_MS = 1000 # Desfase máximo aceptado entre el reloj del cliente y el del servidor
+OVERHEAD_THRESHOLD_S = 3.0 # Sobrecarga acumulada por bloque a partir de la cual el bloque se marca como contaminado
+
+
+def start_block_clock():
+    """Registra el inicio del bloque actual con el reloj monotónico del servidor."""
+    now_ns = time.perf_counter_ns()
+    st.session_state.block_start_ns = now_ns
+    st.session_state.block_start_time = now_ns / 1e9 # Mismo reloj que time.perf_counter()
+    st.session_state.block_first_answer_index = len(st.session_state.answers)
+    st.session_state.block_overhead_reruns = 0
+    st.session_state.block_overhead_script_s = 0.0
+
+
+def _accumulate_rerun_overhead(phase, wall_s, cpu_s):
+    """Observador de `instrumentacion`: suma la ejecución de cada rerun del bloque en curso."""
+    if phase != "EXPERIMENT" or "block_overhead_script_s" not in st.session_state:
+        return
+    st.session_state.block_overhead_reruns += 1
+    st.session_state.block_overhead_script_s += wall_s
+
+
+instrumentacion.add_rerun_listener(_accumulate_rerun_overhead)
+
+
+def block_elapsed_s():
+    """Segundos transcurridos del bloque actual según el servidor."""
+    return time.perf_counter() - st.session_state.block_start_time
+
+
+def _clock_skew_ms(event):
+    server_elapsed_ms = (event["server_receipt_ns"] - st.session_state.block_start_ns) / 1e6
+    client_elapsed_ms = event["client_submit_ms"] - event["client_mounted_ms"]
+    return server_elapsed_ms - client_elapsed_ms
+
+
+def answer_elapsed_s(event):
+    """
+    Segundos del bloque transcurridos al momento de enviar la respuesta: reloj del
+    cliente, salvo que su desfase con el servidor supere la tolerancia.
+    """
+    if abs(_clock_skew_ms(event)) > CLOCK_SKEW_TOLERANCE_MS:
+        return (event["server_receipt_ns"] - st.session_state.block_start_ns) / 1e9
+    return (event["client_submit_ms"] - event["client_mounted_ms"]) / 1e3
+
+
+def record_answer(event, step, expected, outcome):
+    """
+    Guarda una respuesta con las marcas de ambos relojes en `st.session_state.answers`.
+    `step` es la posición de `expected` en la secuencia esperada de la variante.
+    `outcome` es "correct", "wrong", "invalid" (no numérica) o "late" (fuera de tiempo).
+    """
+    answer = {
+        "block": st.session_state.current_block,
+        "step": step,
+        "answer": event["value"],
+        "expected": expected,
+        "outcome": outcome,
+        "reaction_time_ms": round(event["client_submit_ms"] - event["client_shown_ms"], 1),
+        "client_mounted_ms": event["client_mounted_ms"],
+        "client_shown_ms": event["client_shown_ms"],
+        "client_submit_ms": event["client_submit_ms"],
+        "client_epoch_ms": event["client_epoch_ms"],
+        "server_receipt_ns": event["server_receipt_ns"],
+        "clock_skew_ms": round(_clock_skew_ms(event), 1),
+        "auto_submitted": event.get("auto_submitted", False),
+    }
+    st.session_state.answers.append(answer)
+    metricas.observe_answer(outcome)
+    agregados.aggregates.observe_answer(st.session_state.get("variant"), outcome)
+    deteccion.monitor.observe(instrumentacion.current_session_id(), st.session_state.get("variant"),
+                              answer["reaction_time_ms"])
+    return answer
+
+
+def _client_wait_s(block_answers):
+    """Suma de esperas entre enviar una respuesta y ver el número siguiente (reloj del cliente)."""
+    wait_ms = 0.0
+    for previous, answer in zip(block_answers, block_answers[1:]):
+        if answer["client_mounted_ms"] == previous["client_mounted_ms"]: # Mismo iframe, mismo reloj
+            wait_ms += max(0.0, answer["client_shown_ms"] - previous["client_submit_ms"])
+    return wait_ms / 1e3
+
+
+def _close_block_overhead(block_answers, clock_source):
+    """Cierra la calibración de sobrecarga del bloque y devuelve los campos a guardar."""
+    # El rerun en curso (el que termina el bloque) todavía no pasó por el observador
+    in_progress_s = (time.perf_counter_ns() - instrumentacion.rerun_started_ns()) / 1e9
+    reruns = st.session_state.pop("block_overhead_reruns", 0) + 1
+    script_s = st.session_state.pop("block_overhead_script_s", 0.0) + in_progress_s
+    client_wait_s = _client_wait_s(block_answers) if len(block_answers) > 1 else None
+
+    # La espera en el cliente ya incluye el script, el envío de deltas y la red
+    overhead_s = client_wait_s if clock_source == "client" and client_wait_s is not None else script_s
+    return {
+        "overhead_reruns": reruns,
+        "overhead_script_s": round(script_s, 3),
+        "overhead_client_wait_s": round(client_wait_s, 3) if client_wait_s is not None else None,
+        "overhead_s": round(overhead_s, 3),
+        "overhead_flagged": overhead_s > OVERHEAD_THRESHOLD_S,
+    }
+
+
+def close_block_clock():
+    """
+    Calcula la duración del bloque que termina.
+    Devuelve `(time_taken_s, details)`, donde `details` se guarda junto al resultado del
+    bloque: reloj usado, duración según el servidor, desfase máximo observado y la
+    sobrecarga del servidor acumulada durante el bloque.
+    """
+    server_time_s = block_elapsed_s()
+    block_answers = st.session_state.answers[st.session_state.block_first_answer_index:]
+    max_clock_skew_ms = max((abs(answer["clock_skew_ms"]) for answer in block_answers), default=None)
+    clock_skew_detected = max_clock_skew_ms is not None and max_clock_skew_ms > CLOCK_SKEW_TOLERANCE_MS
+
+    if block_answers and not clock_skew_detected:
+        last_answer = block_answers[-1]
+        time_taken_s = (last_answer["client_submit_ms"] - last_answer["client_mounted_ms"]) / 1e3
+        clock_source = "client"
+    else: # Sin respuestas en el bloque o reloj del cliente poco confiable
+        time_taken_s = server_time_s
+        clock_source = "server"
+
+    return time_taken_s, {
+        "time_taken_server_s": round(server_time_s, 2),
+        "clock_source": clock_source,
+        "max_clock_skew_ms": max_clock_skew_ms,
+        "clock_skew_detected": clock_skew_detected,
+        **_close_block_overhead(block_answers, clock_source),
+    }
@@ -0,0 +1,86 @@
+"""
+Exportación del registro (`exportacion.export_records`): filtros, columna de extras y
+escritura atómica en los tres formatos.
+
+    python -m pytest tests
+"""
+import csv
+import datetime
+import json
+import time
+
+import pytest
+
+import exportacion
+
+DAY_1 = datetime.date(2026, 1, 1)
+DAY_2 = datetime.date(2026, 1, 2)
+
+
+def _logged_at(day, hour):
+    return time.mktime(datetime.datetime.combine(day, datetime.time(hour)).timetuple())
+
+
+def _rows():
+    rows = []
+    for index in range(10):
+        rows.append({
+            "session_id": f"s{index}",
+            "variant": "ganancia" if index % 2 else "perdida",
+            "group": "Ganancia" if index % 2 else "Pérdida",
+            "logged_at": _logged_at(DAY_1 if index < 6 else DAY_2, 12),
+            "errors": index,
+        })
+    rows[7]["mood_rating"] = 4 # Aparece después del primer bloque
+    return rows
+
+
+@pytest.fixture
+def source(tmp_path, monkeypatch):
+    monkeypatch.setattr(exportacion, "CHUNK_ROWS", 3)
+    path = tmp_path / "bloques.jsonl"
+    path.write_text("".join(json.dumps(row, ensure_ascii=False) + "\n" for row in _rows()), encoding="utf-8")
+    return str(path)
+
+
+def _read(path, file_format):
+    if file_format == "jsonl":
+        with open(path, encoding="utf-8") as exported:
+            return [json.loads(line) for line in exported]
+    if file_format == "csv":
+        with open(path, encoding="utf-8", newline="") as exported:
+            return list(csv.DictReader(exported))
+    return exportacion.pq.read_table(path).to_pylist()
+
+
+@pytest.mark.parametrize("file_format", exportacion.FORMATS)
+@pytest.mark.parametrize("export_filter, expected", [
+    (exportacion.ExportFilter(), 10),
+    (exportacion.ExportFilter(variants=("ganancia",)), 5),
+    (exportacion.ExportFilter(groups=("Pérdida",)), 5),
+    (exportacion.ExportFilter(start_date=DAY_2, end_date=DAY_2), 4),
+    (exportacion.ExportFilter(variants=("ganancia",), end_date=DAY_1), 3),
+])
+def test_filters(source, tmp_path, file_format, export_filter, expected):
+    destination = str(tmp_path / "exportaciones" / f"bloques.{file_format}")
+    path, rows = exportacion.export_records(source, destination, file_format, export_filter)
+    assert path == destination
+    assert rows == expected == len(_read(destination, file_format))
+    assert not list((tmp_path / "exportaciones").glob("*.tmp"))
+
+
+@pytest.mark.parametrize("file_format", [file_format for file_format in exportacion.FORMATS if file_format != "jsonl"])
+def test_late_keys_go_to_extras(source, tmp_path, file_format):
+    destination = str(tmp_path / f"bloques.{file_format}")
+    exportacion.export_records(source, destination, file_format)
+    exported = _read(destination, file_format)
+    assert "mood_rating" not in exported[0]
+    assert json.loads(exported[7][exportacion.EXTRAS_COLUMN]) == {"mood_rating": 4}
+    assert all(not row[exportacion.EXTRAS_COLUMN] for index, row in enumerate(exported) if index != 7)
+    assert [int(row["errors"]) for row in exported] == list(range(10))
+
+
+def test_jsonl_keeps_lines(source, tmp_path):
+    destination = str(tmp_path / "bloques.jsonl")
+    exportacion.export_records(source, destination, "jsonl")
+    assert _read(destination, "jsonl") == _rows()
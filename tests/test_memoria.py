@@ -0,0 +1,52 @@
+"""
+Atribución de `memoria.MemoryTracker.record`: la memoria va a la línea más interna del
+script, no al despachador de fases que la llamó.
+
+    python -m pytest tests
+"""
+import importlib.util
+import textwrap
+import tracemalloc
+
+import memoria
+
+SCRIPT = textwrap.dedent("""
+    def build_results():
+        blocks_results = [bytearray(50_000) for _ in range(20)]
+        return blocks_results
+
+
+    def dispatch():
+        return build_results()
+""")
+
+
+def _load_script(tmp_path):
+    path = tmp_path / "guion.py"
+    path.write_text(SCRIPT, encoding="utf-8")
+    spec = importlib.util.spec_from_file_location("guion", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module, str(path)
+
+
+def test_allocation_lands_in_its_own_category(tmp_path):
+    script, script_path = _load_script(tmp_path)
+    tracemalloc.start(memoria.TRACEBACK_DEPTH)
+    try:
+        tracemalloc.clear_traces()
+        retained = script.dispatch() # Sigue viva al tomar la instantánea
+        snapshot = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+
+    tracker = memoria.MemoryTracker()
+    tracker.record("prueba", script_path, "dispatch", snapshot)
+    report = tracker.render("prueba")
+
+    lines = [line for line in report.splitlines() if " línea " in line]
+    assert "blocks_results" in lines[0] and "línea 3:" in lines[0] # La asignación, no `dispatch()`
+    assert not any("línea 8:" in line for line in lines)
+    by_category = next(line for line in report.splitlines() if "Por categoría" in line)
+    blocks_kib = float(by_category.split("blocks_results ")[1].split(" KiB")[0])
+    assert blocks_kib >= len(retained) * 50_000 / 1024
@@ -0,0 +1,82 @@
+"""
+Almacén de puntuaciones (`puntuacion.ScoreStore`) compartido por varios trabajos: cada
+clave (hash de los datos, versión) debe devolver su propio resumen aunque otro almacén
+agregue líneas al mismo archivo a la vez.
+
+    python -m pytest tests
+"""
+import multiprocessing
+
+import pytest
+
+import puntuacion
+
+ENTRIES = 400
+
+
+def _summary(writer, index):
+    return {"writer": writer, "index": index, "total_errors": index % 7}
+
+
+def _fill(scores_file, writer, barrier):
+    """Agrega `ENTRIES` puntuaciones y cuenta las que su propio índice devuelve mal."""
+    store = puntuacion.ScoreStore(scores_file)
+    barrier.wait() # Las escrituras de ambos procesos se intercalan
+    try:
+        for index in range(ENTRIES):
+            store.put(f"{writer}-{index}", puntuacion.CURRENT_SCORER, _summary(writer, index))
+        return sum(store.get(f"{writer}-{index}", puntuacion.CURRENT_SCORER) != _summary(writer, index)
+                   for index in range(ENTRIES))
+    finally:
+        store.close()
+
+
+def test_interleaved_stores_in_one_process(tmp_path):
+    scores_file = str(tmp_path / "puntuaciones.jsonl")
+    first, second = puntuacion.ScoreStore(scores_file), puntuacion.ScoreStore(scores_file)
+    try:
+        for index in range(20):
+            first.put(f"a-{index}", "resumen@2", _summary("a", index))
+            second.put(f"b-{index}", "resumen@2", _summary("b", index))
+        for index in range(20):
+            assert first.get(f"a-{index}", "resumen@2") == _summary("a", index)
+            assert second.get(f"b-{index}", "resumen@2") == _summary("b", index)
+            assert first.get(f"b-{index}", "resumen@2") is None # Lo de otro almacén no está en su índice
+    finally:
+        first.close()
+        second.close()
+
+
+def test_interrupted_line_from_another_store(tmp_path):
+    scores_file = tmp_path / "puntuaciones.jsonl"
+    store = puntuacion.ScoreStore(str(scores_file))
+    try:
+        with open(scores_file, "ab") as other:
+            other.write(b'{"data_hash": "roto"') # Escritura interrumpida de otro trabajo
+        store.put("a", "resumen@2", _summary("a", 0))
+        assert store.get("a", "resumen@2") == _summary("a", 0)
+    finally:
+        store.close()
+    reopened = puntuacion.ScoreStore(str(scores_file))
+    try:
+        assert reopened.get("a", "resumen@2") == _summary("a", 0)
+    finally:
+        reopened.close()
+
+
+@pytest.mark.skipif("fork" not in multiprocessing.get_all_start_methods(), reason="requiere fork")
+def test_concurrent_writers(tmp_path):
+    scores_file = str(tmp_path / "puntuaciones.jsonl")
+    context = multiprocessing.get_context("fork")
+    barrier = context.Manager().Barrier(2)
+    with context.Pool(2) as pool:
+        mismatches = pool.starmap(_fill, [(scores_file, "a", barrier), (scores_file, "b", barrier)])
+    assert mismatches == [0, 0]
+
+    store = puntuacion.ScoreStore(scores_file)
+    try:
+        for writer in "ab":
+            for index in range(ENTRIES):
+                assert store.get(f"{writer}-{index}", puntuacion.CURRENT_SCORER) == _summary(writer, index)
+    finally:
+        store.close()
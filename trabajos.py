@@ -0,0 +1,156 @@
+"""
+Cola local de trabajos pesados ejecutados en un pool de procesos.
+
+La exportación masiva y la analítica no deben correr en los hilos de Streamlit que
+atienden a los participantes: compiten por el GIL e inflan sus tiempos. `submit()`
+encola una función (de nivel de módulo, para poder enviarla a otro proceso) en un
+`ProcessPoolExecutor` de `EXPERIMENTO_JOB_WORKERS` procesos creados con "spawn" (no
+heredan los hilos del servidor) y con prioridad baja (`os.nice`), de modo que los
+reruns de los participantes siempre ganan. Mientras se crean, `__main__` es un módulo
+vacío: Streamlit instala el script (`servidor.py`) como `__main__` y cada proceso nuevo
+lo volvería a ejecutar, importando el experimento y los paneles. Un proceso del pool
+solo importa los módulos de las funciones que ejecuta. `run()` encola y espera; mientras espera,
+el hilo que llama libera el GIL.
+
+El estado de los últimos `MAX_JOBS` trabajos (en cola, ejecutando, terminado, error)
+se consulta con `jobs()` y se muestra en la página del experimentador; `finished()` da
+los terminados (con su resultado) de un tipo, por ejemplo las exportaciones.
+"""
+import contextlib
+import itertools
+import logging
+import multiprocessing
+import os
+import sys
+import threading
+import time
+import types
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+
+import metricas
+
+logger = logging.getLogger(__name__)
+
+# --- Parámetros de la cola de trabajos (constantes) ---
+JOB_WORKERS = int(os.environ.get("EXPERIMENTO_JOB_WORKERS", "2"))
+WORKER_NICENESS = 10
+MAX_JOBS = 50 # Trabajos terminados que se conservan para el panel
+
+
+@dataclass
+class Job:
+    """Estado de un trabajo encolado."""
+    job_id: int
+    name: str
+    submitted_at: float
+    status: str = "en cola"
+    started_at: float = None
+    finished_at: float = None
+    result: object = field(default=None, repr=False)
+    error: str = None
+    future: Future = field(default=None, repr=False)
+
+    @property
+    def current_status(self):
+        if self.finished_at is None and self.future is not None and self.future.running():
+            return "ejecutando"
+        return self.status
+
+
+def _lower_priority():
+    if hasattr(os, "nice"): # Solo en sistemas tipo Unix
+        os.nice(WORKER_NICENESS)
+
+
+@contextlib.contextmanager
+def _neutral_main():
+    """Oculta el `__main__` real mientras "spawn" crea procesos (leen de él qué reimportar)."""
+    main_module = sys.modules.get("__main__")
+    neutral = sys.modules["__main__"] = types.ModuleType("__main__")
+    try:
+        yield
+    finally:
+        if sys.modules.get("__main__") is neutral: # Salvo que un rerun de Streamlit lo haya reemplazado
+            sys.modules["__main__"] = main_module
+
+
+def _timed_call(function, args, kwargs):
+    """Se ejecuta en el proceso del pool: devuelve (instante de inicio, resultado)."""
+    return time.time(), function(*args, **kwargs)
+
+
+class JobQueue:
+    """Pool de procesos compartido por todas las sesiones, con el estado de cada trabajo."""
+
+    def __init__(self, workers=JOB_WORKERS):
+        self._workers = workers
+        self._executor = None # Se crea con el primer trabajo: los procesos cuestan arrancar
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._jobs = {} # job_id -> Job, en orden de llegada
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self._workers, initializer=_lower_priority,
+                                                 mp_context=multiprocessing.get_context("spawn"))
+        return self._executor
+
+    def submit(self, name, function, *args, **kwargs):
+        """Encola `function(*args, **kwargs)` y devuelve su `Job` (con `job.future`)."""
+        with self._lock:
+            job = Job(job_id=next(self._ids), name=name, submitted_at=time.time())
+            self._jobs[job.job_id] = job
+            self._forget_finished()
+            with _neutral_main(): # `submit` crea los procesos del pool a medida que hacen falta
+                job.future = self._get_executor().submit(_timed_call, function, args, kwargs)
+        job.future.add_done_callback(lambda done: self._finish(job, done))
+        return job
+
+    def run(self, name, function, *args, **kwargs):
+        """Encola y espera el resultado (relanza la excepción del trabajo)."""
+        return self.submit(name, function, *args, **kwargs).future.result()[1]
+
+    def _finish(self, job, future):
+        with self._lock:
+            job.finished_at = time.time()
+            try:
+                job.started_at, job.result = future.result()
+                job.status = "terminado"
+            except Exception as error:
+                job.status = "error"
+                job.error = f"{type(error).__name__}: {error}"
+                logger.error("El trabajo %s (%s) falló: %s", job.job_id, job.name, job.error)
+
+    def _forget_finished(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished_at is not None]
+        for job_id in finished[:max(0, len(finished) - MAX_JOBS)]:
+            del self._jobs[job_id]
+
+    def pending(self):
+        """Trabajos aún sin terminar (en cola o ejecutando)."""
+        with self._lock:
+            return sum(1 for job in self._jobs.values() if job.finished_at is None)
+
+    def finished(self, name_prefix):
+        """Trabajos terminados sin error cuyo nombre empieza con `name_prefix`, el más reciente primero."""
+        with self._lock:
+            return [job for job in reversed(self._jobs.values())
+                    if job.status == "terminado" and job.name.startswith(name_prefix)]
+
+    def jobs(self):
+        """Filas (dict) con el estado de los trabajos, el más reciente primero."""
+        with self._lock:
+            return [{
+                "id": job.job_id,
+                "trabajo": job.name,
+                "estado": job.current_status,
+                "encolado": time.strftime("%H:%M:%S", time.localtime(job.submitted_at)),
+                "espera_s": round(job.started_at - job.submitted_at, 2) if job.started_at else None,
+                "duracion_s": round(job.finished_at - job.started_at, 2) if job.started_at else None,
+                "error": job.error,
+            } for job in reversed(self._jobs.values())]
+
+
+pool = JobQueue()
+metricas.register_queue_gauge("trabajos", pool.pending)
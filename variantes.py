@@ -0,0 +1,283 @@
+"""
+Variantes del experimento definidas en archivos de configuración.
+
+Cada `config_variantes/<nombre>.toml` describe una condición experimental: parámetros
+de la tarea, grupos con su dinero inicial y sus tablas de recompensa, textos de la
+bienvenida y qué se muestra en los resultados. Los archivos se validan y se compilan
+una sola vez por proceso (al importar este módulo) en objetos `Variant` inmutables con
+todo lo que no depende del participante ya calculado: la secuencia esperada y el HTML
+de las instrucciones de cada grupo. Los reruns solo leen esos objetos.
+
+Agregar una condición es agregar un `.toml`: `servidor.py` la publica en `/<nombre>` y,
+si define `study_code`, también en `/?estudio=<código>`. Para servirla sola basta un
+script de dos líneas que llame a `experimento.run("<nombre>")`.
+"""
+import os
+import tomllib
+from dataclasses import dataclass
+from types import MappingProxyType
+
+import cuestionarios
+import recompensas
+
+# --- Parámetros de las variantes (constantes) ---
+VARIANTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "config_variantes")
+LEARNING_COEFFICIENT_MODES = ("exitosos", "todos", "no") # Bloques de comparación del coeficiente de aprendizaje
+
+
+class VariantConfigError(ValueError):
+    """Un archivo de variante es inválido; el mensaje indica el archivo y el campo."""
+
+
+@dataclass(frozen=True)
+class Group:
+    """Grupo experimental de una variante con sus tablas de recompensa."""
+    name: str
+    label: str # Texto que ve el participante ("GANANCIA", "EVITAR PÉRDIDA")
+    color: str
+    initial_money: int
+    rewards: recompensas.RewardSchedule
+
+
+@dataclass(frozen=True)
+class Variant:
+    """Variante compilada: parámetros, grupos y textos precalculados (inmutable)."""
+    name: str
+    study_code: str # Código que reciben los participantes (vacío = solo por URL)
+    page_title: str
+    welcome_subtitle: str
+    subtract_value: int
+    start_number: int
+    target_threshold: int
+    max_blocks: int
+    block_duration_s: int
+    pause_duration_s: int
+    auto_submit: bool # La respuesta se envía sola al escribir tantos caracteres como la esperada
+    groups: MappingProxyType # nombre -> Group
+    expected_sequence: tuple # Paso -> número: start_number, start_number - subtract_value, ... hasta llegar al umbral
+    instructions_html: MappingProxyType # nombre del grupo -> HTML de las instrucciones
+    learning_coefficient: str # Uno de LEARNING_COEFFICIENT_MODES
+    coefficient_blocks: tuple # Bloques que se comparan contra el bloque 1
+    block_detail: tuple # Bloques con detalle en la pantalla de resultados
+    money_summary_label: str
+    survey: tuple # cuestionarios.Question del formulario final (vacía = sin cuestionario ni descarga del CSV)
+    restart_button: bool
+    results_file_name: str # Puede usar {group}
+
+    @property
+    def group_names(self):
+        return tuple(self.groups)
+
+    @property
+    def final_step(self):
+        """Paso cuya respuesta correcta completa el bloque (el primero en llegar al umbral)."""
+        return len(self.expected_sequence) - 1
+
+
+# --- Validación ---
+
+def _require(config, key, kind, path):
+    if key not in config:
+        raise VariantConfigError(f"{path}: falta el campo '{key}'")
+    value = config[key]
+    if kind is int and isinstance(value, bool) or not isinstance(value, kind):
+        raise VariantConfigError(f"{path}: '{key}' debe ser {kind.__name__}, no {type(value).__name__}")
+    return value
+
+
+def _positive(config, key, path):
+    value = _require(config, key, int, path)
+    if value <= 0:
+        raise VariantConfigError(f"{path}: '{key}' debe ser positivo")
+    return value
+
+
+def _money_table(config, key, max_blocks, path):
+    table = config.get(key, [])
+    if not isinstance(table, list) or not all(isinstance(v, int) and not isinstance(v, bool) and v >= 0 for v in table):
+        raise VariantConfigError(f"{path}: '{key}' debe ser una lista de montos enteros no negativos")
+    if table and len(table) != max_blocks: # Un bloque sin monto ganaría o perdería $0 sin aviso
+        raise VariantConfigError(f"{path}: '{key}' debe tener un monto por bloque ({max_blocks}), tiene {len(table)}")
+    return tuple(table)
+
+
+def _reject_unknown(config, allowed, path):
+    unknown = set(config) - set(allowed)
+    if unknown:
+        raise VariantConfigError(f"{path}: campos desconocidos {sorted(unknown)}")
+
+
+# --- Textos precalculados ---
+
+def _instructions_html(variant_fields, group, random_assignment):
+    sequence = variant_fields["expected_sequence"]
+    auto_submit_line = " Tu respuesta se envía sola al escribir tantas cifras como el resultado." if variant_fields["auto_submit"] else ""
+    reward_lines = "\n                    ".join(group.rewards.reward_lines(variant_fields["target_threshold"]))
+    logic_title = "Lógica de Penalización" if group.rewards.kind == "perdida" else "Lógica de Recompensa"
+    if random_assignment:
+        group_line = f"Tu grupo asignado es: <span style='color:{group.color};'>{group.label}</span>."
+        logic_title += f" ({group.name})"
+    else:
+        group_line = f"Estás en el grupo: <span style='color:{group.color};'>{group.label}</span>."
+    return f"""
+        <div style='text-align: left; background-color: #ffffff; padding: 25px; border-radius: 10px; box-shadow: 0 2px 10px rgba(0,0,0,0.05);'>
+            <p style='color:#333333; font-size:1.1em; line-height:1.6;'>
+                ¡Hola!<br/><br/>
+                Este experimento consta de una tarea aritmética simple que realizarás durante
+                <span style='font-weight:bold;'>{variant_fields["max_blocks"]} bloques de {variant_fields["block_duration_s"]} segundo(s) cada uno</span>.<br/>
+                Tu tarea es <span style='font-weight:bold;'>restar {variant_fields["subtract_value"]} repetidamente, comenzando desde {sequence[0]}</span>.
+                Por ejemplo: {", ".join(str(number) for number in sequence[:3])}, etc.<br/>
+                Deberás ingresar cada resultado.{auto_submit_line} Si cometes un error, la secuencia se
+                <span style='font-weight:bold; color:red;'>REINICIARÁ desde {sequence[0]}</span> en ese mismo bloque.<br/>
+                Para completar un bloque con éxito, debes hacer que el número actual sea
+                <span style='font-weight:bold;'>igual o menor que {variant_fields["target_threshold"]}</span>.
+            </p>
+            <div style='background-color: #f9f9f9; padding: 20px; border-radius: 8px; margin-top: 20px; border: 1px solid #eee;'>
+                <p style='font-size:1.2em; font-weight:bold; color:#4a235a;'>{group_line}</p>
+                <p style='color:#333333; font-size:1.05em;'>
+                    <span style='font-weight:bold; color:{group.color};'>{logic_title}:</span><br/>
+                    Comienzas con <span style='font-weight:bold;'>${group.initial_money:,.0f}</span> (ficticios).<br/>
+                    {reward_lines}
+                </p>
+            </div>
+        </div>
+        """
+
+
+def _survey(results, path):
+    """Preguntas de `survey`: true/false, el nombre de una escala o una lista de nombres."""
+    value = results.get("survey", False)
+    if isinstance(value, bool):
+        scale_names = [cuestionarios.DEFAULT_SCALE] if value else []
+    elif isinstance(value, str):
+        scale_names = [value]
+    elif isinstance(value, list) and all(isinstance(name, str) for name in value):
+        scale_names = value
+    else:
+        raise VariantConfigError(f"{path}: 'survey' debe ser true/false, una escala o una lista de escalas")
+    unknown = [name for name in scale_names if name not in cuestionarios.SCALES]
+    if unknown:
+        raise VariantConfigError(f"{path}: escalas desconocidas {unknown} en 'survey' (válidas: {tuple(cuestionarios.SCALES)})")
+    return cuestionarios.questions(scale_names)
+
+
+# --- Compilación ---
+
+_TOP_LEVEL_KEYS = ("study_code", "page_title", "welcome_subtitle", "task", "groups", "results")
+_TASK_KEYS = ("subtract_value", "start_number", "target_threshold", "max_blocks", "block_duration_s", "pause_duration_s")
+_TASK_OPTIONS = ("auto_submit",)
+_GROUP_KEYS = ("name", "label", "color", "initial_money", "success_rewards", "failure_penalties")
+_RESULTS_KEYS = ("learning_coefficient", "block_detail", "money_summary_label", "survey", "restart_button", "file_name")
+
+
+def compile_variant(name, config, path="<config>"):
+    """Valida un dict de configuración y devuelve la `Variant` compilada."""
+    _reject_unknown(config, _TOP_LEVEL_KEYS, path)
+    task = _require(config, "task", dict, path)
+    _reject_unknown(task, _TASK_KEYS + _TASK_OPTIONS, f"{path} [task]")
+    fields = {key: _positive(task, key, f"{path} [task]") for key in _TASK_KEYS}
+    fields["auto_submit"] = _require(task, "auto_submit", bool, f"{path} [task]") if "auto_submit" in task else False
+    if fields["start_number"] <= fields["target_threshold"]:
+        raise VariantConfigError(f"{path}: 'start_number' debe ser mayor que 'target_threshold'")
+
+    sequence = [fields["start_number"]]
+    while sequence[-1] > fields["target_threshold"]:
+        sequence.append(sequence[-1] - fields["subtract_value"])
+    fields["expected_sequence"] = tuple(sequence)
+
+    group_configs = _require(config, "groups", list, path)
+    if not group_configs:
+        raise VariantConfigError(f"{path}: debe haber al menos un grupo")
+    groups = {}
+    for index, group_config in enumerate(group_configs):
+        group_path = f"{path} [[groups]] #{index + 1}"
+        _reject_unknown(group_config, _GROUP_KEYS, group_path)
+        group = Group(
+            name=_require(group_config, "name", str, group_path),
+            label=_require(group_config, "label", str, group_path),
+            color=_require(group_config, "color", str, group_path),
+            initial_money=_require(group_config, "initial_money", int, group_path),
+            rewards=recompensas.RewardSchedule.from_tables(
+                fields["max_blocks"],
+                success_rewards=_money_table(group_config, "success_rewards", fields["max_blocks"], group_path),
+                failure_penalties=_money_table(group_config, "failure_penalties", fields["max_blocks"], group_path),
+            ),
+        )
+        if group.name in groups:
+            raise VariantConfigError(f"{group_path}: el grupo '{group.name}' está repetido")
+        if not group.rewards.success_rewards and not group.rewards.failure_penalties:
+            raise VariantConfigError(f"{group_path}: el grupo necesita 'success_rewards', 'failure_penalties' o ambas")
+        groups[group.name] = group
+
+    results = _require(config, "results", dict, path)
+    _reject_unknown(results, _RESULTS_KEYS, f"{path} [results]")
+    learning_coefficient = _require(results, "learning_coefficient", str, f"{path} [results]")
+    if learning_coefficient not in LEARNING_COEFFICIENT_MODES:
+        raise VariantConfigError(f"{path} [results]: 'learning_coefficient' debe ser uno de {LEARNING_COEFFICIENT_MODES}")
+    block_detail = tuple(results.get("block_detail", []))
+    if not all(isinstance(block, int) and 1 <= block <= fields["max_blocks"] for block in block_detail):
+        raise VariantConfigError(f"{path} [results]: 'block_detail' debe contener bloques entre 1 y {fields['max_blocks']}")
+
+    random_assignment = len(groups) > 1
+    return Variant(
+        name=name,
+        study_code=_require(config, "study_code", str, path).strip().upper() if "study_code" in config else "",
+        page_title=_require(config, "page_title", str, path),
+        welcome_subtitle=_require(config, "welcome_subtitle", str, path),
+        groups=MappingProxyType(groups),
+        instructions_html=MappingProxyType({
+            group_name: _instructions_html(fields, group, random_assignment) for group_name, group in groups.items()
+        }),
+        learning_coefficient=learning_coefficient,
+        coefficient_blocks=tuple(range(max(2, fields["max_blocks"] - 1), fields["max_blocks"] + 1)), # Los dos últimos bloques
+        block_detail=block_detail,
+        money_summary_label=results.get("money_summary_label", "Resumen Dinero"),
+        survey=_survey(results, f"{path} [results]"),
+        restart_button=results.get("restart_button", False),
+        results_file_name=results.get("file_name", "resultados_experimento_{group}"),
+        **fields,
+    )
+
+
+def load_variants(directory=VARIANTS_DIR):
+    """Lee, valida y compila todos los `.toml` de `directory`."""
+    variants = {}
+    for file_name in sorted(os.listdir(directory)):
+        if not file_name.endswith(".toml"):
+            continue
+        path = os.path.join(directory, file_name)
+        with open(path, "rb") as config_file:
+            try:
+                config = tomllib.load(config_file)
+            except tomllib.TOMLDecodeError as error:
+                raise VariantConfigError(f"{path}: {error}") from error
+        name = os.path.splitext(file_name)[0]
+        variants[name] = compile_variant(name, config, path)
+
+    study_codes = {}
+    for variant in variants.values():
+        if variant.study_code in study_codes:
+            raise VariantConfigError(f"{directory}: el código de estudio '{variant.study_code}' se repite en "
+                                     f"'{study_codes[variant.study_code]}' y '{variant.name}'")
+        if variant.study_code:
+            study_codes[variant.study_code] = variant.name
+    return MappingProxyType(variants)
+
+
+# Se compilan una sola vez por proceso; un error de configuración impide arrancar
+VARIANTS = load_variants()
+STUDY_CODES = MappingProxyType({variant.study_code: variant.name for variant in VARIANTS.values() if variant.study_code})
+
+
+def get(name):
+    """Devuelve la variante compilada `name`."""
+    try:
+        return VARIANTS[name]
+    except KeyError:
+        raise VariantConfigError(f"No existe la variante '{name}' en {VARIANTS_DIR}") from None
+
+
+def find_by_study_code(code):
+    """Variante con el código de estudio `code` (sin distinguir mayúsculas), o None."""
+    name = STUDY_CODES.get((code or "").strip().upper())
+    return VARIANTS[name] if name is not None else None